@@ -0,0 +1,119 @@
+import re
+
+from sqlalchemy import and_, func, literal_column, or_, text
+
+# Composite (sort column, id) indexes so every sortable page is an index seek
+ADMIN_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_user_type_id ON user (user_type, id)",
+    "CREATE INDEX IF NOT EXISTS ix_user_name_id ON user (name, id)",
+    "CREATE INDEX IF NOT EXISTS ix_user_class_level_id ON user (class_level, id)",
+    "CREATE INDEX IF NOT EXISTS ix_user_location_id ON user (coalesce(location, ''), id)",
+]
+
+
+def ensure_admin_indexes(engine):
+    with engine.begin() as connection:
+        for statement in ADMIN_INDEXES:
+            connection.execute(text(statement))
+        # Refresh planner statistics so low-cardinality filters (user_type) do not
+        # win over the ordered sort index
+        connection.execute(text("PRAGMA optimize"))
+
+
+# Nullable columns are sorted through coalesce() so keyset comparisons never meet NULL;
+# the expression matches ix_user_location_id exactly
+def sort_expression(column):
+    if column.nullable:
+        return func.coalesce(column, literal_column("''"))
+    return column
+
+
+# Operators accepted in DataTable filter_query strings, mapped to SQL comparisons
+FILTER_OPERATORS = {
+    "=": "eq",
+    "eq": "eq",
+    "!=": "ne",
+    "ne": "ne",
+    "<": "lt",
+    "lt": "lt",
+    "<=": "le",
+    "le": "le",
+    ">": "gt",
+    "gt": "gt",
+    ">=": "ge",
+    "ge": "ge",
+    "contains": "contains",
+}
+
+# "{column} operator value", where value is quoted or a bare word/number
+FILTER_PATTERN = re.compile(
+    r"\{(?P<column>[^}]+)\}\s+(?P<operator>s?contains|[<>!]?=|[<>]|eq|ne|lt|le|gt|ge)\s+"
+    r"(?P<value>\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'|\S+)"
+)
+
+
+def _literal(value):
+    if value[:1] in ("'", '"'):
+        return value[1:-1].replace("\\" + value[0], value[0])
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+# Parse a DataTable filter_query ("{a} > 5 && {b} contains x") into (column, operator, value)
+def parse_filter_query(filter_query, columns):
+    filters = []
+    for clause in (filter_query or "").split(" && "):
+        match = FILTER_PATTERN.fullmatch(clause.strip())
+        if not match or match["column"] not in columns:
+            continue
+        operator = FILTER_OPERATORS.get(match["operator"].lstrip("s"))
+        if operator:
+            filters.append((match["column"], operator, _literal(match["value"])))
+    return filters
+
+
+def apply_filters(query, columns, filters):
+    for name, operator, value in filters:
+        column = columns[name]
+        if operator == "contains":
+            query = query.filter(column.ilike(f"%{value}%"))
+        elif operator == "eq":
+            query = query.filter(column == value)
+        elif operator == "ne":
+            query = query.filter(column != value)
+        elif operator == "lt":
+            query = query.filter(column < value)
+        elif operator == "le":
+            query = query.filter(column <= value)
+        elif operator == "gt":
+            query = query.filter(column > value)
+        elif operator == "ge":
+            query = query.filter(column >= value)
+    return query
+
+
+# Fetch one page ordered by (sort column, id). With a cursor (the last row of the previous
+# page) the page is found by an index seek; without one the caller's offset is used.
+def fetch_page(query, sort_column, id_column, descending, page_size, cursor=None, offset=0):
+    if sort_column is id_column:
+        order = [id_column.desc() if descending else id_column]
+    else:
+        order = [sort_column.desc(), id_column.desc()] if descending else [sort_column, id_column]
+
+    if cursor is not None:
+        sort_value, last_id = cursor
+        after_id = id_column < last_id if descending else id_column > last_id
+        if sort_column is id_column:
+            query = query.filter(after_id)
+        else:
+            # Expanded instead of a row-value comparison, which SQLite cannot seek on
+            # when the sort key is an expression index
+            after_value = sort_column < sort_value if descending else sort_column > sort_value
+            query = query.filter(or_(after_value, and_(sort_column == sort_value, after_id)))
+    query = query.order_by(*order)
+    if cursor is None:
+        query = query.offset(offset)
+    rows = query.limit(page_size + 1).all()
+    return rows[:page_size], len(rows) > page_size
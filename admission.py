@@ -0,0 +1,69 @@
+import math
+import threading
+import time
+
+
+# Per-client token buckets for one kind of request: each client may make 'burst' requests at
+# once and 'rate' per second after that
+class RateLimiter:
+    def __init__(self, rate, burst, max_clients=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients  # Idle clients are forgotten beyond this many
+        self.clock = clock
+        self._buckets = {}  # client -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    # Take a token for 'client'; returns 0 when the request may proceed, otherwise the seconds
+    # until a token is available
+    def acquire(self, client):
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[client] = (tokens - 1, now)
+                if len(self._buckets) > self.max_clients:
+                    self._forget_idle(now)
+                return 0.0
+            self._buckets[client] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+    # Drop clients whose bucket has refilled, as they are indistinguishable from new ones
+    def _forget_idle(self, now):
+        for client, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * self.rate >= self.burst:
+                del self._buckets[client]
+
+    def clients(self):
+        with self._lock:
+            return len(self._buckets)
+
+
+# Bounded number of requests of one kind in flight; a request that finds the gate full is turned
+# away at once instead of queueing behind the others
+class ConcurrencyGate:
+    def __init__(self, limit, clock=time.monotonic):
+        self.limit = limit
+        self.clock = clock
+        self.in_flight = 0
+        self.average_seconds = 0.0  # Moving average of how long admitted requests take
+        self._lock = threading.Lock()
+
+    # Returns the entry time when admitted, None when the gate is full
+    def enter(self):
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return None
+            self.in_flight += 1
+        return self.clock()
+
+    def leave(self, entered):
+        elapsed = self.clock() - entered
+        with self._lock:
+            self.in_flight -= 1
+            self.average_seconds += 0.2 * (elapsed - self.average_seconds)
+
+    # Whole seconds a turned-away client should wait: about one request's duration
+    def retry_after(self):
+        return max(1, math.ceil(self.average_seconds))
@@ -0,0 +1,138 @@
+from collections import defaultdict
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+
+from capabilities import covers
+from snapshot import split_subjects
+
+
+# The aggregate rows a user contributes to: one per listed subject, none once withdrawn.
+# The capability mask is part of the key, so demand_supply can match needs to skills.
+def count_keys(user_type, location, subject, class_level, capability_mask, withdrawn):
+    if not location or withdrawn or user_type not in ("child", "scribe"):
+        return []
+    subjects = sorted({subj.lower() for subj in split_subjects(subject) if subj})
+    return [(location, subj, class_level, user_type, capability_mask) for subj in subjects]
+
+
+# Add 'delta' to the counts of the given keys with SQLite upserts; the caller commits
+def adjust_counts(session, model, keys, delta):
+    for location, subject, class_level, user_type, capability_mask in keys:
+        statement = insert(model).values(
+            location=location,
+            subject=subject,
+            class_level=class_level,
+            user_type=user_type,
+            capability_mask=capability_mask,
+            count=delta,
+        )
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["location", "subject", "class_level", "user_type", "capability_mask"],
+                set_={"count": model.count + delta},
+            )
+        )
+
+
+# Recompute every count from the user table (used to back-fill an empty aggregate table)
+def rebuild_counts(session, model, user_model):
+    session.query(model).delete()
+    totals = defaultdict(int)
+    rows = session.query(
+        user_model.user_type,
+        user_model.location,
+        user_model.subject,
+        user_model.class_level,
+        user_model.capability_mask,
+        user_model.withdrawn,
+    ).yield_per(10000)
+    for row in rows:
+        for key in count_keys(*row):
+            totals[key] += 1
+    session.bulk_insert_mappings(
+        model,
+        [
+            {
+                "location": key[0],
+                "subject": key[1],
+                "class_level": key[2],
+                "user_type": key[3],
+                "capability_mask": key[4],
+                "count": count,
+            }
+            for key, count in totals.items()
+        ],
+    )
+
+
+# Demand (children) and eligible supply per (location, subject). A scribe is eligible for a child
+# in a lower class level with skills covering every need, the test reports.py applies to
+# individual users. Works on the aggregate rows only, so the cost depends on the number of
+# cells and capability masks, not users.
+def demand_supply(rows, class_level=None):
+    children = defaultdict(lambda: defaultdict(int))  # (level, needs) -> count, per cell
+    scribes = defaultdict(lambda: defaultdict(int))  # (level, skills) -> count, per cell
+    for location, subject, level, user_type, mask, count in rows:
+        if not 1 <= level <= 12:
+            continue
+        target = children if user_type == "child" else scribes
+        target[(location, subject)][(level, mask)] += count
+
+    cells = {}
+    for key in set(children) | set(scribes):
+        child_counts = children[key]
+        scribe_counts = scribes[key]
+        # eligible_scribes is the most scribes any one group of children could choose from
+        demand = supply_for_demand = unserved = 0
+        for (level, needs), count in child_counts.items():
+            if class_level is not None and level != class_level:
+                continue
+            demand += count
+            eligible = sum(
+                scribe_count
+                for (scribe_level, skills), scribe_count in scribe_counts.items()
+                if scribe_level < level and covers(needs, skills)
+            )
+            supply_for_demand = max(supply_for_demand, eligible)
+            if eligible == 0:
+                unserved += count
+        cells[key] = {
+            "children": demand,
+            "scribes": sum(
+                scribe_count
+                for (level, _), scribe_count in scribe_counts.items()
+                if class_level is None or level < class_level
+            ),
+            "eligible_scribes": supply_for_demand,
+            "unserved_children": unserved,
+        }
+    return cells
+
+
+# Demand-vs-supply matrices for the heatmap: rows are locations, columns are subjects
+def heatmap_matrices(cells):
+    locations = sorted({location for location, _ in cells})
+    subjects = sorted({subject for _, subject in cells})
+    empty = {"children": 0, "scribes": 0, "eligible_scribes": 0, "unserved_children": 0}
+    matrix = {
+        field: [[cells.get((location, subject), empty)[field] for subject in subjects] for location in locations]
+        for field in empty
+    }
+    return locations, subjects, matrix
+
+
+def aggregate_rows(session, model):
+    return session.query(
+        model.location, model.subject, model.class_level, model.user_type, model.capability_mask, model.count
+    ).filter(model.count > 0).all()
+
+
+# Drop a demand_supply_count table from before capability_mask joined its key; SQLite cannot
+# change a primary key in place. create_all then makes the new table and initialize_database
+# back-fills it from the user table.
+def ensure_count_key(engine):
+    with engine.begin() as connection:
+        columns = {row[1] for row in connection.execute(text("PRAGMA table_info(demand_supply_count)"))}
+        if columns and "capability_mask" not in columns:
+            connection.execute(text("DROP TABLE demand_supply_count"))
@@ -0,0 +1,99 @@
+import hashlib
+import json
+
+from flask import Response, request
+
+API_PREFIX = "/api/v1"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, headers=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.headers = headers or {}  # e.g. Retry-After on 429
+
+
+# Strong ETag for the current request, derived from the data version and the request URL
+def request_etag(version):
+    digest = hashlib.sha1(request.full_path.encode("utf-8")).hexdigest()[:16]
+    return f"v{version}-{digest}"
+
+
+# Compression (see Dash(compress=True)) appends ":<algorithm>" to strong ETags; ignore it here
+def _etag_matches(etag):
+    header = request.headers.get("If-None-Match", "")
+    candidates = {tag.strip().strip('"').split(":", 1)[0] for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+# Answer with 304 when the client already holds this version; 'build' is only called otherwise
+def conditional_json(version, build):
+    etag = request_etag(version)
+    headers = {"Cache-Control": "no-cache"}
+    if _etag_matches(etag):
+        headers["ETag"] = f'"{etag}"'
+        return Response(status=304, headers=headers)
+
+    body = json.dumps(build(), separators=(",", ":"), default=str)
+    response = Response(body, status=200, mimetype="application/json", headers=headers)
+    response.set_etag(etag)
+    return response
+
+
+# File download of a CSV export, e.g. ?format=csv
+def csv_response(body, filename):
+    return Response(
+        body,
+        status=200,
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-cache"},
+    )
+
+
+def error_response(error):
+    body = json.dumps({"error": error.message})
+    return Response(body, status=error.status, mimetype="application/json", headers=error.headers)
+
+
+def limit_param():
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("'limit' must be an integer.")
+    if limit < 1:
+        raise ApiError("'limit' must be positive.")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+# Keyset pagination parameters: ?after=<last id seen>&limit=<page size>
+def page_params():
+    try:
+        after = int(request.args.get("after", 0))
+    except ValueError:
+        raise ApiError("'after' and 'limit' must be integers.")
+    return after, limit_param()
+
+
+# Feed cursor: the last sequence number seen in each shard, e.g. ?after=120,1000000044
+def sequence_cursor():
+    try:
+        return [int(part) for part in request.args.get("after", "").split(",") if part.strip()]
+    except ValueError:
+        raise ApiError("'after' must be a comma-separated list of sequence numbers.")
+
+
+# Wrap one page of rows; 'next_after' is the cursor for the following page
+def page(rows, limit, key="id"):
+    next_after = rows[-1][key] if len(rows) == limit else None
+    return {"data": rows, "next_after": next_after}
+
+
+# Repeated or comma-separated query parameter, e.g. ?location=Pune&location=Nagpur
+def list_param(name):
+    values = []
+    for value in request.args.getlist(name):
+        values.extend(part.strip() for part in value.split(",") if part.strip())
+    return values or None
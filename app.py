@@ -1,32 +1,156 @@
 import dash
 import dash_bootstrap_components as dbc
-from dash import html, dcc, Input, Output, State, callback_context, MATCH, ALL
+from dash import html, dcc, dash_table, Input, Output, State, callback_context, ClientsideFunction, MATCH, ALL
 import dash_cytoscape as cyto
-from flask import Flask
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+from flask import Flask, g, has_request_context, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from collections import OrderedDict
+from datetime import datetime
 import base64
+import click
+import json
+import math
+import os
+import threading
+
+from admission import ConcurrencyGate, RateLimiter
+from admin_table import apply_filters, ensure_admin_indexes, fetch_page, parse_filter_query, sort_expression
+from analytics import (
+    adjust_counts,
+    aggregate_rows,
+    count_keys,
+    demand_supply,
+    ensure_count_key,
+    heatmap_matrices,
+    rebuild_counts,
+)
+from assignments import AssignmentMap, ensure_withdrawn_column, path_from_child, path_from_scribe
+from archive import academic_year_of, archive_users, ensure_academic_year, users_to_archive
+from api import (
+    API_PREFIX,
+    ApiError,
+    conditional_json,
+    csv_response,
+    error_response,
+    limit_param,
+    list_param,
+    page,
+    page_params,
+    sequence_cursor,
+)
+from capabilities import SKILL_OPTIONS, capability_labels, capability_mask, ensure_capability_columns
+from certificates import CertificatePipeline, upload_payload
+from locations import (
+    LocationTree,
+    count_by_path,
+    ensure_location_path_column,
+    node_path,
+    path_depth,
+    path_end,
+    read_hierarchy,
+    rollup_counts,
+)
+from health import WarmUp, latency_probe, touch_indexes
+from duplicates import duplicate_pairs, find_duplicates, rebuild_name_bands, replace_name_bands
+from changelog import (
+    ChangeLogCompactor,
+    change_log_bounds,
+    changed_users,
+    compact_changes,
+    cursor_expired,
+    ensure_change_log,
+    fetch_changes,
+)
+from metrics import metrics
+from notifications import FileTransport, NotificationWorker, SMTPTransport
+from matching import EdgeComputer, location_partitions, partition_edges
+from network_diff import diff_elements, element_id, elements_patch
+from reports import rebuild_user_subjects, refresh_unmatched, replace_user_subjects, report_csv, unmatched_report
+from schedule import ScheduleIndex, format_slot, format_slots, parse_slots
+from search import ensure_search_index, highlight_parts, search_users
+from sharding import DEFAULT_SHARD, SHARD_ID_SPAN, RoutingSession, ShardRouter, merge_sorted
+from versioning import data_version, ensure_data_version
+from snapshot import SNAPSHOT_FIELDS, SnapshotStore, split_subjects
 
 # Initialize Flask app and configure SQLAlchemy
 server = Flask(__name__)
-server.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///users.db"
+server.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///users.db")
 server.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-db = SQLAlchemy(server)
-
-# Initialize Flask-Migrate
-migrate = Migrate(server, db)
-
-# Initialize Dash app
+server.config["CERTIFICATE_WORKERS"] = 2  # Processes used to normalise uploaded certificates
+server.config["NOTIFICATION_TRANSPORT"] = "file"  # 'file' or 'smtp'
+server.config["NOTIFICATION_FILE"] = "notifications.jsonl"  # Relative to the instance folder
+server.config["NOTIFICATION_BATCH_SIZE"] = 100
+server.config["BACKGROUND_WORKERS"] = True  # Drain the notification outbox and compact the change log in serving processes
+server.config["SMTP_HOST"] = "localhost"
+server.config["SMTP_PORT"] = 8025
+server.config["EDGE_WORKERS"] = None  # Processes for per-location edge computation (None = CPU count)
+server.config["PARALLEL_EDGE_MIN_PAIRS"] = 2_000_000  # Candidate pairs before going parallel
+server.config["CLIENT_FILTER_MAX_ELEMENTS"] = 5000  # Ship the whole graph and filter in the browser up to this size (0 disables)
+server.config["NETWORK_LAYOUT"] = "breadthfirst"  # Cytoscape layout; extra layouts such as 'dagre' load a larger bundle
+server.config["NETWORK_PATCH_MAX_FRACTION"] = 0.5  # Send a full element list instead when the diff exceeds this share of it
+server.config["NETWORK_QUERY_CACHE_SIZE"] = 64  # Server-filtered element lists kept to diff the next query against
+server.config["CHANGE_LOG_RETENTION_DAYS"] = 30  # Change feed entries older than this are compacted away
+server.config["CHANGE_LOG_COMPACT_INTERVAL"] = 3600  # Seconds between compactions of the change log
+server.config["ACADEMIC_YEAR_START_MONTH"] = 6  # Registrations from this month on belong to the next academic year
+server.config["ARCHIVE_BATCH_SIZE"] = 500  # Users moved to the archive tables per transaction
+server.config["SCRIBE_CAPACITY"] = 1  # Children assigned to one scribe at most
+server.config["ASSIGNMENT_REPAIR_MAX_VISITS"] = 1000  # Children an augmenting-path search may visit
+server.config["DUPLICATE_MIN_SIMILARITY"] = 0.5  # Name shingle similarity at which registrations go to review
+# Admission control by kind of request: 'write' is a registration or update submit, 'network' a
+# server-side graph query. Each client gets (requests per second, burst); a kind without an
+# entry is not limited.
+server.config["RATE_LIMITS"] = {"write": (0.5, 5), "network": (2.0, 10)}
+server.config["MAX_IN_FLIGHT"] = {"write": 4, "network": 2}  # Concurrent requests of each kind
+server.config["RATE_LIMIT_TRUST_FORWARDED_FOR"] = False  # Key clients by X-Forwarded-For (only behind a proxy that sets it)
+server.config["READY_MAX_DB_LATENCY_MS"] = 250  # /readyz fails while a database round trip takes longer
+# Location-group shards besides 'default' (which holds every unlisted location), e.g.
+# DATABASE_SHARDS='{"west": {"number": 1, "url": "sqlite:///west.db", "locations": ["Pune", "Mumbai"]}}'
+shard_map = json.loads(os.environ.get("DATABASE_SHARDS", "{}"))
+server.config["SHARDS"] = {DEFAULT_SHARD: 0, **{name: spec["number"] for name, spec in shard_map.items()}}
+server.config["SHARD_LOCATIONS"] = {
+    location: name for name, spec in shard_map.items() for location in spec["locations"]
+}
+server.config["SQLALCHEMY_BINDS"] = {name: spec["url"] for name, spec in shard_map.items()}
+db = SQLAlchemy(server, session_options={"class_": RoutingSession})
+shard_router = ShardRouter(server, db, server.config["SHARDS"], server.config["SHARD_LOCATIONS"])
+
+# Serve the theme from assets/ once vendor_assets.py has downloaded it, otherwise from the CDN
+VENDORED_THEME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "vendor", "flatly.min.css")
+
+# Initialize Dash app; compress=True gzips callback, layout and asset responses (flask-compress)
 app = dash.Dash(
     __name__,
-    external_stylesheets=[dbc.themes.FLATLY],
+    external_stylesheets=[] if os.path.exists(VENDORED_THEME) else [dbc.themes.FLATLY],
     server=server,
     suppress_callback_exceptions=True,
     title="Scribe Matching Platform",
+    compress=True,
 )
 
-# Load extra layouts for Cytoscape
-cyto.load_extra_layouts()
+# Fingerprinted component bundles and ?m=<mtime> assets never change under the same URL
+@server.after_request
+def cache_fingerprinted_assets(response):
+    if response.status_code != 200:
+        return response
+    fingerprinted_suite = (
+        request.path.startswith("/_dash-component-suites/")
+        and response.cache_control.max_age is not None
+    )
+    versioned_asset = request.path.startswith("/assets/") and "m" in request.args
+    if fingerprinted_suite or versioned_asset:
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+# Layouts that are not part of the default Cytoscape bundle
+CYTOSCAPE_EXTRA_LAYOUTS = {"cose-bilkent", "cola", "euler", "spread", "dagre", "klay"}
+
+# Academic year (by its starting calendar year) that new registrations belong to
+def current_academic_year():
+    return academic_year_of(datetime.utcnow(), server.config["ACADEMIC_YEAR_START_MONTH"])
 
 # Define database models
 class User(db.Model):
@@ -35,6 +159,7 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     location = db.Column(db.String(100))
+    location_path = db.Column(db.String(300))  # Hierarchy node of the location (see locations.py)
     age_or_school = db.Column(db.String(50))  # Age for child, School info for scribes and mentors
     subject = db.Column(db.String(200))  # Subject expertise or needs
     class_level = db.Column(db.Integer, nullable=False)  # Class level for both child and scribe
@@ -42,18 +167,209 @@ class User(db.Model):
     disabilities = db.Column(db.String(200), nullable=True)  # Only for children
     assistance_needed = db.Column(db.String(200), nullable=True)  # Only for children
     certificate = db.Column(db.LargeBinary, nullable=True)  # To store uploaded certificate
+    skills = db.Column(db.String(200), nullable=True)  # Only for scribes: assistance they can give
+    capability_mask = db.Column(db.Integer, nullable=False, default=0)  # Needs (child) or skills (scribe) as bits
+    withdrawn = db.Column(db.Boolean, nullable=False, default=False)  # Left matching, e.g. a scribe dropping out
+    academic_year = db.Column(db.Integer, nullable=False, default=current_academic_year)  # Exam cycle
 
     def __repr__(self):
         return f"<User {self.name}, {self.user_type}>"
 
-# Ensure tables are created
-with server.app_context():
-    db.create_all()
+# Users of past academic years, moved out of "user" by `flask --app app archive-users`
+class ArchivedUser(db.Model):
+    __tablename__ = "user_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_type = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)  # May recur across years
+    location = db.Column(db.String(100))
+    age_or_school = db.Column(db.String(50))
+    subject = db.Column(db.String(200))
+    class_level = db.Column(db.Integer, nullable=False)
+    category_of_disability = db.Column(db.String(50), nullable=True)
+    disabilities = db.Column(db.String(200), nullable=True)
+    assistance_needed = db.Column(db.String(200), nullable=True)
+    certificate = db.Column(db.LargeBinary, nullable=True)
+    skills = db.Column(db.String(200), nullable=True)
+    capability_mask = db.Column(db.Integer, nullable=False, default=0)
+    withdrawn = db.Column(db.Boolean, nullable=False, default=False)
+    academic_year = db.Column(db.Integer, nullable=False, index=True)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedUser {self.name}, {self.academic_year}>"
+
+# Processing state of the most recent certificate upload for a user
+class CertificateStatus(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    status = db.Column(db.String(20), nullable=False)  # 'processing', 'ready', 'rejected'
+    version = db.Column(db.Integer, nullable=False, default=0)  # Bumped on every new upload
+    content_type = db.Column(db.String(50))
+    original_size = db.Column(db.Integer)  # Bytes as uploaded
+    stored_size = db.Column(db.Integer)  # Bytes after recompression
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    page_count = db.Column(db.Integer)
+    thumbnail = db.Column(db.LargeBinary)  # Small JPEG preview for images
+    reason = db.Column(db.String(200))  # Why the upload was rejected
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CertificateStatus {self.user_id}, {self.status}>"
+
+# Certificate state of archived users
+class ArchivedCertificateStatus(db.Model):
+    __tablename__ = "certificate_status_archive"
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.String(20), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    content_type = db.Column(db.String(50))
+    original_size = db.Column(db.Integer)
+    stored_size = db.Column(db.Integer)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    page_count = db.Column(db.Integer)
+    thumbnail = db.Column(db.LargeBinary)
+    reason = db.Column(db.String(200))
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+# Transactional outbox of notifications, written in the same commit as the user change
+class OutboxMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    recipient_email = db.Column(db.String(120), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # 'new_match'
+    payload = db.Column(db.Text, nullable=False)  # JSON event data
+    status = db.Column(db.String(20), nullable=False, default="pending")  # 'pending', 'sent', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    last_error = db.Column(db.String(200))
+
+    __table_args__ = (db.Index("ix_outbox_pending", "status", "next_attempt_at"),)
+
+    def __repr__(self):
+        return f"<OutboxMessage {self.id}, {self.kind}, {self.status}>"
+
+# Exam slots a child needs a scribe for
+class ExamSession(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    child_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    starts_at = db.Column(db.DateTime, nullable=False)
+    ends_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<ExamSession {self.child_id}, {self.starts_at}-{self.ends_at}>"
+
+# Time windows during which a scribe is available
+class AvailabilityWindow(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    scribe_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    starts_at = db.Column(db.DateTime, nullable=False)
+    ends_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<AvailabilityWindow {self.scribe_id}, {self.starts_at}-{self.ends_at}>"
+
+# Pre-aggregated counts of users taking part per (location, subject, class level, user type,
+# capability mask)
+class DemandSupplyCount(db.Model):
+    location = db.Column(db.String(100), primary_key=True)
+    subject = db.Column(db.String(100), primary_key=True)  # Lower-cased single subject
+    class_level = db.Column(db.Integer, primary_key=True)
+    user_type = db.Column(db.String(50), primary_key=True)
+    capability_mask = db.Column(db.Integer, primary_key=True)  # Needs (child) or skills (scribe)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"<DemandSupplyCount {self.location}, {self.subject}, {self.class_level}, {self.user_type}, "
+            f"{self.capability_mask}: {self.count}>"
+        )
+
+# Scribe assigned to a child; each child has at most one
+class Assignment(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    child_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, unique=True)
+    scribe_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    assigned_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Assignment {self.child_id} -> {self.scribe_id}>"
+
+# Assignments that involved an archived user
+class ArchivedAssignment(db.Model):
+    __tablename__ = "assignment_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    child_id = db.Column(db.Integer, nullable=False, index=True)
+    scribe_id = db.Column(db.Integer, nullable=False)
+    assigned_at = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+# One row per (user, lower-cased subject) so matching rules can be evaluated in SQL
+class UserSubject(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    subject = db.Column(db.String(100), primary_key=True)
+    location = db.Column(db.String(100))  # Copied from the user for the anti-join lookup
+    user_type = db.Column(db.String(50), nullable=False)
+
+    __table_args__ = (db.Index("ix_user_subject_lookup", "subject", "location", "user_type", "user_id"),)
+
+    def __repr__(self):
+        return f"<UserSubject {self.user_id}, {self.subject}>"
+
+# Children with no eligible scribe, maintained incrementally on every registration change
+class UnmatchedChild(db.Model):
+    child_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+
+    def __repr__(self):
+        return f"<UnmatchedChild {self.child_id}>"
+
+# LSH band keys of each user's name signature (see duplicates.py), so registrations that look
+# alike are found by key lookups
+class NameBand(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    band = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.BigInteger, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<NameBand {self.user_id}, {self.band}>"
+
+# Registration that may repeat an earlier one, queued for a coordinator to merge or dismiss
+class DuplicateCandidate(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)  # The later registration
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    similarity = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # 'pending', 'merged', 'dismissed'
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    reviewed_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.UniqueConstraint("user_id", "duplicate_of_id"), db.Index("ix_duplicate_candidate_status", "status", "id"))
+
+    def __repr__(self):
+        return f"<DuplicateCandidate {self.user_id} ~ {self.duplicate_of_id}, {self.status}>"
+
+# Node of the location hierarchy (see locations.py). Shards hold copies of the imported
+# hierarchy and the stand-in nodes of their own users; the tree is the union of them.
+class LocationNode(db.Model):
+    path = db.Column(db.String(300), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    level = db.Column(db.String(50))  # 'State', 'District', ...; None for a stand-in added for an unknown location
+
+    def __repr__(self):
+        return f"<LocationNode {self.path}>"
 
 # Sample data to be added on app creation if database is empty
 def add_sample_data():
     with server.app_context():
-        if User.query.first() is None:  # Check if the database is empty
+        # Check if the database is empty
+        if not any(shard_router.scatter(lambda shard: User.query.first() is not None)):
             # Sample data for children
             children_data = [
                 {
@@ -123,6 +439,7 @@ def add_sample_data():
                     "category_of_disability": None,  # Not applicable
                     "disabilities": None,  # Not applicable
                     "assistance_needed": None,  # Not applicable
+                    "skills": "computer_use",
                     "certificate": None,
                 },
                 {
@@ -141,25 +458,662 @@ def add_sample_data():
             ]
 
             # Add sample users to the database
+            # Each user is written to the shard of its location
             for data in children_data + scribes_data:
-                user = User(
-                    user_type=data["user_type"],
-                    name=data["name"],
-                    email=data["email"],
-                    location=data["location"],
-                    age_or_school=data["age_or_school"],
-                    subject=data["subject"],
-                    class_level=data["class_level"],
-                    category_of_disability=data.get("category_of_disability"),
-                    disabilities=data.get("disabilities"),
-                    assistance_needed=data.get("assistance_needed"),
-                    certificate=data.get("certificate"),
+                with shard_router.use(shard_router.shard_for(data["location"])):
+                    user = User(
+                        id=shard_router.first_row_id(User, ArchivedUser),
+                        user_type=data["user_type"],
+                        name=data["name"],
+                        email=data["email"],
+                        location=data["location"],
+                        age_or_school=data["age_or_school"],
+                        subject=data["subject"],
+                        class_level=data["class_level"],
+                        category_of_disability=data.get("category_of_disability"),
+                        disabilities=data.get("disabilities"),
+                        assistance_needed=data.get("assistance_needed"),
+                        skills=data.get("skills"),
+                        capability_mask=capability_mask(
+                            data["user_type"], data.get("assistance_needed"), data.get("skills")
+                        ),
+                        certificate=data.get("certificate"),
+                    )
+                    db.session.add(user)
+                    db.session.commit()
+
+# Create tables and indexes, add the sample data and back-fill derived tables; run once by
+# create_app() rather than at import, so importing the module never touches the database
+def initialize_database():
+    # Every shard holds the full schema for the users of its locations
+    def create_schema(shard):
+        engine = shard_router.engine(shard)
+        ensure_count_key(engine)
+        db.metadata.create_all(engine)
+        ensure_capability_columns(engine)
+        ensure_withdrawn_column(engine)
+        ensure_location_path_column(engine)
+        ensure_academic_year(engine, current_academic_year())
+        ensure_search_index(engine)
+        ensure_search_index(engine, table="user_archive", index="user_archive_search")
+        ensure_data_version(engine)
+        ensure_change_log(engine, first_seq=shard_router.shards[shard] * SHARD_ID_SPAN)
+        ensure_admin_indexes(engine)
+
+    shard_router.scatter(create_schema)
+    add_sample_data()
+
+    tree = location_tree()
+
+    # Back-fill aggregates for databases created before they existed
+    def backfill(shard):
+        if DemandSupplyCount.query.first() is None and User.query.first() is not None:
+            rebuild_counts(db.session, DemandSupplyCount, User)
+            db.session.commit()
+        if UserSubject.query.first() is None and User.query.first() is not None:
+            rebuild_user_subjects(db.session, UserSubject, User)
+            refresh_unmatched(db.session)
+            db.session.commit()
+        if NameBand.query.first() is None and User.query.first() is not None:
+            rebuild_name_bands(db.session, NameBand, User)
+            db.session.commit()
+        if User.query.filter(User.location.isnot(None), User.location_path.is_(None)).first() is not None:
+            attach_locations(tree)
+            db.session.commit()
+
+    shard_router.scatter(backfill)
+
+# Total data version over all shards; it only grows, as each shard's version does
+def current_data_version():
+    version = sum(shard_router.scatter(lambda shard: data_version(db.session)))
+    if has_request_context():
+        g.snapshot_data_version = version  # Saves snapshot_data_version a read
+    return version
+
+# Location hierarchy merged from every shard; rebuilt when the data version moves, which node
+# changes also bump
+_location_trees = {}
+
+def location_tree():
+    version = current_data_version()
+    tree = _location_trees.get(version)
+    if tree is None:
+        rows = shard_router.scatter(
+            lambda shard: db.session.query(LocationNode.path, LocationNode.name, LocationNode.level).all()
+        )
+        tree = LocationTree([row for shard_rows in rows for row in shard_rows])
+        _location_trees.clear()
+        _location_trees[version] = tree
+    return tree
+
+# Path of the hierarchy node for a location in the current shard, adding a top-level stand-in
+# node when the hierarchy does not know the location; the caller commits
+def location_node_path(tree, location):
+    if not location:
+        return None
+    path = tree.path_for(location)
+    if path is None:
+        path = node_path([location])
+        if db.session.get(LocationNode, path) is None:
+            db.session.add(LocationNode(path=path, name=location.strip()))
+    return path
+
+# Point the current shard's users at their hierarchy nodes, by distinct location; with
+# only_missing, users that already have a path keep it. The caller commits.
+def attach_locations(tree, only_missing=True):
+    query = db.session.query(User.location).filter(User.location.isnot(None)).distinct()
+    if only_missing:
+        query = query.filter(User.location_path.is_(None))
+    locations = [location for (location,) in query]
+    for location in locations:
+        path = location_node_path(tree, location)
+        db.session.flush()
+        User.query.filter(User.location == location).update({"location_path": path}, synchronize_session=False)
+    return len(locations)
+
+# Registrations per hierarchy node over all shards, each node counting its subtree
+def location_counts():
+    return rollup_counts(row for rows in shard_router.scatter(lambda shard: count_by_path(db.session)) for row in rows)
+
+# Shard holding the user with this email (and type), or None
+def locate_user(email, user_type=None):
+    def lookup(shard):
+        query = db.session.query(User.id).filter(User.email == email)
+        if user_type:
+            query = query.filter(User.user_type == user_type)
+        return query.first() is not None
+
+    for shard, found in zip(shard_router.names, shard_router.scatter(lookup)):
+        if found:
+            return shard
+    return None
+
+# Load every user (without certificate blobs) for the in-memory snapshot
+def load_snapshot_rows():
+    columns = [getattr(User, field) for field in SNAPSHOT_FIELDS]
+    results = shard_router.scatter(
+        lambda shard: [tuple(row) for row in db.session.query(*columns).order_by(User.id).yield_per(10000)]
+    )
+    yield from merge_sorted(results, key=lambda row: row[0])
+
+# Snapshot row for a committed user, used to keep the snapshot in step with writes
+def snapshot_row(user):
+    return tuple(getattr(user, field) for field in SNAPSHOT_FIELDS)
+
+# Aggregate count rows a user contributes to, from its current attributes
+def user_count_keys(user):
+    return count_keys(
+        user.user_type, user.location, user.subject, user.class_level, user.capability_mask, user.withdrawn
+    )
+
+# Change log position of every shard as {shard: seq}, or with 'positions' given, the position
+# and the changes since it: (positions, snapshot rows of users changed since, ids of users gone
+# since). None when a shard has compacted entries the snapshot still needs.
+def load_snapshot_changes(positions):
+    columns = [getattr(User, field) for field in SNAPSHOT_FIELDS]
+
+    def changes(shard):
+        if positions is None:
+            return change_log_bounds(db.session)[1], [], set()
+        changed = changed_users(db.session, positions.get(shard, 0))
+        if changed is None:
+            return None
+        last, user_ids = changed
+        rows = [tuple(row) for row in db.session.query(*columns).filter(User.id.in_(user_ids))] if user_ids else []
+        return last, rows, user_ids - {row[0] for row in rows}
+
+    results = shard_router.scatter(changes)
+    if any(result is None for result in results):
+        return None
+    return (
+        {shard: last for shard, (last, _, _) in zip(shard_router.names, results)},
+        [row for _, rows, _ in results for row in rows],
+        set().union(*(gone for _, _, gone in results)),
+    )
+
+# Data version the snapshot is checked against; read at most once per request (or taken from
+# current_data_version), as a callback reads the snapshot several times. Versions the request's
+# own writes add do not matter here: those writes update the snapshot directly.
+def snapshot_data_version():
+    if not has_request_context():
+        return current_data_version()
+    if "snapshot_data_version" not in g:
+        g.snapshot_data_version = current_data_version()
+    return g.snapshot_data_version
+
+user_snapshot = SnapshotStore(
+    loader=load_snapshot_rows, version=snapshot_data_version, changes=load_snapshot_changes
+)
+edge_computer = EdgeComputer(
+    max_workers=server.config["EDGE_WORKERS"],
+    min_pairs=server.config["PARALLEL_EDGE_MIN_PAIRS"],
+)
+metrics.register_collector(
+    lambda: {f"snapshot.{key}": value for key, value in user_snapshot.stats().items()}
+)
+
+# Load all availability windows and exam sessions for the schedule index
+def load_schedule_rows():
+    def load(shard):
+        availability = db.session.query(
+            AvailabilityWindow.scribe_id, AvailabilityWindow.starts_at, AvailabilityWindow.ends_at
+        ).all()
+        sessions = db.session.query(
+            ExamSession.child_id, ExamSession.starts_at, ExamSession.ends_at
+        ).all()
+        return availability, sessions
+
+    results = shard_router.scatter(load)
+    return (
+        [row for availability, _ in results for row in availability],
+        [row for _, sessions in results for row in sessions],
+    )
+
+schedule_index = ScheduleIndex(loader=load_schedule_rows)
+
+# Replace a user's exam sessions (child) or availability windows (scribe); the caller commits
+def replace_schedule(user, slots):
+    model, owner = (ExamSession, "child_id") if user.user_type == "child" else (AvailabilityWindow, "scribe_id")
+    model.query.filter(getattr(model, owner) == user.id).delete()
+    for start, end in slots:
+        db.session.add(model(**{owner: user.id, "starts_at": start, "ends_at": end}))
+
+# Keep the subject rows and the unmatched-children report in step with a user change;
+# only the affected child, or the children in the scribe's old and new locations, are re-checked.
+# The caller commits.
+def refresh_match_state(user, previous_location=None):
+    replace_user_subjects(db.session, UserSubject, user)
+    db.session.flush()
+    if user.user_type == "child":
+        refresh_unmatched(db.session, child_ids=[user.id])
+    elif user.user_type == "scribe":
+        refresh_unmatched(db.session, locations={user.location, previous_location} - {None})
+
+# Admission control for the expensive requests: a token bucket per client, then a bound on how
+# many run at once. Requests turned away get a fast 429 with Retry-After instead of queueing
+# for the single process and the SQLite writer.
+rate_limiters = {kind: RateLimiter(rate, burst) for kind, (rate, burst) in server.config["RATE_LIMITS"].items()}
+concurrency_gates = {kind: ConcurrencyGate(limit) for kind, limit in server.config["MAX_IN_FLIGHT"].items()}
+metrics.register_collector(
+    lambda: {
+        **{f"admission.{kind}.in_flight": gate.in_flight for kind, gate in concurrency_gates.items()},
+        **{f"admission.{kind}.clients": limiter.clients() for kind, limiter in rate_limiters.items()},
+    }
+)
+
+# Kind of the current request for admission control, or None for requests that are cheap
+def admission_kind():
+    if request.path == f"{API_PREFIX}/network":
+        return "network"
+    if request.path != "/_dash-update-component":
+        return None
+    output = (request.get_json(silent=True) or {}).get("output", "")
+    if "registration_confirmation" in output or "update_confirmation" in output:
+        return "write"
+    if "matching-network.elements" in output or "network_full_elements.data" in output:
+        return "network"
+    return None
+
+def client_key():
+    if server.config["RATE_LIMIT_TRUST_FORWARDED_FOR"]:
+        forwarded = request.headers.get("X-Forwarded-For", "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return request.remote_addr or "unknown"
+
+@server.before_request
+def admit_request():
+    kind = admission_kind()
+    if kind is None:
+        return
+    limiter = rate_limiters.get(kind)
+    wait = limiter.acquire(client_key()) if limiter else 0
+    if wait:
+        metrics.increment(f"admission.{kind}.rate_limited")
+        raise ApiError(
+            "Too many requests; please try again shortly.",
+            status=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+    gate = concurrency_gates.get(kind)
+    if gate is not None:
+        entered = gate.enter()
+        if entered is None:
+            metrics.increment(f"admission.{kind}.gate_full")
+            raise ApiError(
+                "The server is busy; please try again shortly.",
+                status=429,
+                headers={"Retry-After": str(gate.retry_after())},
+            )
+        g.admission = (gate, entered)
+    metrics.increment(f"admission.{kind}.admitted")
+
+@server.teardown_request
+def release_admission(error):
+    admission = g.pop("admission", None)
+    if admission is not None:
+        gate, entered = admission
+        gate.leave(entered)
+
+# Expose process metrics as JSON
+@server.route("/metrics")
+def metrics_endpoint():
+    return jsonify(metrics.snapshot())
+
+# Write the outcome of a background certificate job back to the database
+def store_certificate_result(user_id, version, result):
+    with server.app_context(), shard_router.use(shard_router.shard_for_id(user_id)):
+        status = db.session.get(CertificateStatus, user_id)
+        if status is None or status.version != version:
+            return  # A newer upload has superseded this one
+        user = db.session.get(User, user_id)
+        if user is None:
+            return
+        status.status = result["status"]
+        status.original_size = result.get("original_size")
+        status.reason = result.get("reason")
+        if result["status"] == "ready":
+            user.certificate = result["data"]
+            status.content_type = result["content_type"]
+            status.stored_size = len(result["data"])
+            status.width = result["width"]
+            status.height = result["height"]
+            status.page_count = result["page_count"]
+            status.thumbnail = result["thumbnail"]
+        db.session.commit()
+
+certificate_pipeline = CertificatePipeline(
+    on_result=store_certificate_result,
+    max_workers=server.config["CERTIFICATE_WORKERS"],
+)
+
+# Mark a user's certificate as processing; returns the upload version to submit with
+def mark_certificate_processing(user):
+    db.session.flush()  # Assigns an id to newly added users
+    status = db.session.get(CertificateStatus, user.id)
+    if status is None:
+        status = CertificateStatus(user_id=user.id, version=0)
+        db.session.add(status)
+    status.version += 1
+    status.status = "processing"
+    status.reason = None
+    return status.version
+
+# Users of the opposite type that are eligible matches for the given user, as (UserRecord, subjects)
+# pairs read from the snapshot, so no user rows (or certificate blobs) are loaded. 'user' may
+# hold changes not yet in the snapshot; none once withdrawn.
+def eligible_matches(user):
+    if user.withdrawn or user.user_type not in ("child", "scribe"):
+        return []
+    snapshot = user_snapshot.current
+    other_type = "scribe" if user.user_type == "child" else "child"
+    rows = [
+        index
+        for index in snapshot.select(locations=[user.location], user_types=[other_type])
+        if snapshot.ids[index] != user.id
+    ]
+    children, scribes = next(iter(location_partitions(snapshot, rows).values()), ([], []))
+    entry = (
+        user.id,
+        user.class_level,
+        snapshot.subject_mask(split_subjects(user.subject)),
+        user.capability_mask or 0,
+    )
+    if user.user_type == "child":
+        edges = partition_edges([entry], scribes)
+    else:
+        edges = partition_edges(children, [entry])
+    other = 1 if user.user_type == "child" else 0
+    return [(snapshot.get(edge[other]), set(snapshot.subject_names(edge[2]))) for edge in edges]
+
+# Add outbox rows for matches of 'user' that are not in 'previous_ids'; the caller commits
+def queue_match_notifications(user, previous_ids=()):
+    for other, subjects in eligible_matches(user):
+        if other.id in previous_ids:
+            continue
+        subjects_text = ", ".join(sorted(subj.capitalize() for subj in subjects))
+        for recipient, match in ((user, other), (other, user)):
+            db.session.add(
+                OutboxMessage(
+                    recipient_id=recipient.id,
+                    recipient_email=recipient.email,
+                    kind="new_match",
+                    payload=json.dumps(
+                        {
+                            "match_id": match.id,
+                            "match_name": match.name,
+                            "match_type": match.user_type,
+                            "location": match.location,
+                            "subjects": subjects_text,
+                        }
+                    ),
                 )
-                db.session.add(user)
+            )
+
+# Queue (user id, other user id, similarity) pairs for review unless they were queued before;
+# returns how many were new. The caller commits.
+def queue_duplicate_review(pairs):
+    queued = 0
+    for user_id, other_id, score in pairs:
+        user_id, duplicate_of_id = max(user_id, other_id), min(user_id, other_id)
+        if DuplicateCandidate.query.filter_by(user_id=user_id, duplicate_of_id=duplicate_of_id).first():
+            continue
+        db.session.add(
+            DuplicateCandidate(
+                id=shard_router.first_row_id(DuplicateCandidate),
+                user_id=user_id,
+                duplicate_of_id=duplicate_of_id,
+                similarity=round(score, 3),
+            )
+        )
+        db.session.flush()
+        queued += 1
+    return queued
+
+# Mark a queued pair as reviewed. Merging withdraws the later registration, so it leaves matching
+# and its assignment is repaired, while the record stays for reference.
+def resolve_duplicate(candidate_id, merge):
+    with shard_router.use(shard_router.shard_for_id(candidate_id)):
+        candidate = db.session.get(DuplicateCandidate, candidate_id)
+        if candidate is None or candidate.status != "pending":
+            return "This pair has already been reviewed."
+        candidate.status = "merged" if merge else "dismissed"
+        candidate.reviewed_at = datetime.utcnow()
+        user = db.session.get(User, candidate.user_id)
+        if merge:
+            adjust_counts(db.session, DemandSupplyCount, user_count_keys(user), -1)
+            user.withdrawn = True
+            refresh_match_state(user)
+        db.session.commit()
+        if not merge:
+            return f"Kept {user.name} ({user.email}) as a separate registration."
+        user_snapshot.upsert(snapshot_row(user))
+        reassign_committed(user)
+        return f"Merged: {user.name} ({user.email}) has been withdrawn."
+
+DUPLICATE_TABLE_FIELDS = [
+    "id",
+    "similarity",
+    "user_type",
+    "location",
+    "class_level",
+    "name",
+    "email",
+    "duplicate_of_name",
+    "duplicate_of_email",
+]
+
+# Pending review pairs with both registrations side by side, most similar first
+def pending_duplicates(limit=100):
+    earlier = db.aliased(User)
+
+    def fetch(shard):
+        rows = (
+            db.session.query(
+                DuplicateCandidate.id,
+                DuplicateCandidate.similarity,
+                User.user_type,
+                User.location,
+                User.class_level,
+                User.name,
+                User.email,
+                earlier.name,
+                earlier.email,
+            )
+            .join(User, User.id == DuplicateCandidate.user_id)
+            .join(earlier, earlier.id == DuplicateCandidate.duplicate_of_id)
+            .filter(DuplicateCandidate.status == "pending")
+            .order_by(DuplicateCandidate.similarity.desc(), DuplicateCandidate.id)
+            .limit(limit)
+        )
+        return [tuple(row) for row in rows]
+
+    rows = merge_sorted(shard_router.scatter(fetch), key=lambda row: (-row[1], row[0]), limit=limit)
+    return [dict(zip(DUPLICATE_TABLE_FIELDS, row)) for row in rows]
+
+# Build the notification transport selected in the server config
+def notification_transport():
+    if server.config["NOTIFICATION_TRANSPORT"] == "smtp":
+        return SMTPTransport(server.config["SMTP_HOST"], server.config["SMTP_PORT"])
+    os.makedirs(server.instance_path, exist_ok=True)
+    return FileTransport(os.path.join(server.instance_path, server.config["NOTIFICATION_FILE"]))
+
+notification_worker = NotificationWorker(
+    server,
+    db,
+    OutboxMessage,
+    notification_transport(),
+    batch_size=server.config["NOTIFICATION_BATCH_SIZE"],
+    shards=shard_router.names,
+    use_shard=shard_router.use,
+)
+
+# Drop change feed entries older than the retention window on every shard
+def compact_change_log():
+    retention = server.config["CHANGE_LOG_RETENTION_DAYS"] * 86400
+
+    def compact(shard):
+        removed = compact_changes(db.session, retention)
+        db.session.commit()
+        return removed
+
+    try:
+        removed = sum(shard_router.scatter(compact))
+    except Exception:
+        metrics.increment("change_log.compact_errors")  # Retried at the next interval
+        return 0
+    metrics.increment("change_log.compacted", removed)
+    return removed
+
+change_log_compactor = ChangeLogCompactor(
+    compact_change_log, interval=server.config["CHANGE_LOG_COMPACT_INTERVAL"]
+)
+
+# Move users of academic years before 'before_year' (with their certificates and assignments)
+# to the archive tables, one batch per transaction, then give the children whose scribe was
+# archived a new one. Returns (users archived, children reassigned) per shard.
+def archive_past_years(before_year, batch_size):
+    def archive(shard):
+        archived, orphaned = 0, set()
+        while True:
+            rows = users_to_archive(db.session, before_year, batch_size)
+            if not rows:
+                return archived, sorted(orphaned)
+            user_ids = [row[0] for row in rows]
+            # Assignments to an archived scribe are archived with it, leaving the child without one
+            orphaned.update(
+                child_id
+                for (child_id,) in db.session.query(Assignment.child_id).filter(Assignment.scribe_id.in_(user_ids))
+            )
+            orphaned.difference_update(user_ids)
+            for row in rows:
+                adjust_counts(db.session, DemandSupplyCount, count_keys(*row[1:]), -1)
+            archive_users(db.session, user_ids, datetime.utcnow())
+            # Children left behind by an archived scribe may have lost their last match
+            scribe_locations = {row[2] for row in rows if row[1] == "scribe" and row[2]}
+            refresh_unmatched(db.session, locations=scribe_locations)
             db.session.commit()
+            archived += len(rows)
+
+    results = dict(zip(shard_router.names, shard_router.scatter(archive)))
+    # Repairs read eligibility from the in-memory indexes, which still hold the archived users
+    user_snapshot.reload()
+    schedule_index.reload()
+
+    def reassign(shard):
+        moved = repair_assignments(child_ids=results[shard][1])
+        db.session.commit()
+        return moved
+
+    reassigned = shard_router.scatter(reassign)
+    return {shard: (results[shard][0], moved) for shard, moved in zip(shard_router.names, reassigned)}
+
+@server.cli.command("archive-users")
+@click.option("--before", "before_year", type=int, help="First academic year to keep (default: the current one)")
+@click.option("--batch-size", type=int, default=None, help="Users per transaction")
+def archive_users_command(before_year, batch_size):
+    create_app()
+    before_year = before_year or current_academic_year()
+    archived = archive_past_years(before_year, batch_size or server.config["ARCHIVE_BATCH_SIZE"])
+    for shard, (count, reassigned) in archived.items():
+        print(
+            f"{shard}: archived {count} users from academic years before {before_year}, "
+            f"reassigned {reassigned} children."
+        )
+    # Running servers hold users in their snapshot until restarted
+    print("Restart running app processes to drop archived users from their in-memory snapshot.")
+
+@server.cli.command("compact-changes")
+def compact_changes_command():
+    create_app()
+    print(f"Removed {compact_change_log()} change log entries.")
+
+# Give every unassigned child a scribe where an augmenting path allows, e.g. after an import;
+# registrations and updates repair the assignment themselves
+@server.cli.command("repair-assignments")
+def repair_assignments_command():
+    create_app()
+
+    def repair(shard):
+        assigned = db.session.query(Assignment.child_id)
+        child_ids = [
+            row[0]
+            for row in db.session.query(User.id)
+            .filter(User.user_type == "child", User.withdrawn.is_(False), User.id.not_in(assigned))
+            .order_by(User.id)
+        ]
+        moved = repair_assignments(child_ids=child_ids)
+        db.session.commit()
+        return len(child_ids), moved
+
+    for shard, (unassigned, moved) in zip(shard_router.names, shard_router.scatter(repair)):
+        print(f"{shard}: {unassigned} unassigned children, {moved} assignments made or moved.")
+
+# Queue every pair of look-alike registrations for review, e.g. after an import; registrations
+# are checked as they arrive
+@server.cli.command("find-duplicates")
+@click.option("--rebuild", is_flag=True, help="Recompute every name signature first")
+def find_duplicates_command(rebuild):
+    create_app()
+    min_similarity = server.config["DUPLICATE_MIN_SIMILARITY"]
+
+    def scan(shard):
+        if rebuild:
+            rebuild_name_bands(db.session, NameBand, User)
+        queued = queue_duplicate_review(duplicate_pairs(db.session, NameBand, User, min_similarity))
+        db.session.commit()
+        return queued
+
+    for shard, queued in zip(shard_router.names, shard_router.scatter(scan)):
+        print(f"{shard}: queued {queued} possible duplicate registrations for review.")
+
+# Load a location hierarchy CSV (see read_hierarchy) into every shard and re-attach users to it;
+# stand-in nodes the hierarchy now covers are dropped
+@server.cli.command("import-locations")
+@click.argument("hierarchy", type=click.File())
+def import_locations_command(hierarchy):
+    create_app()
+    nodes = read_hierarchy(hierarchy)
+    imported = {path for path, _, _ in nodes}
+
+    def load(shard):
+        for path, name, level in nodes:
+            db.session.merge(LocationNode(path=path, name=name, level=level))
+        db.session.commit()
 
-# Run the function to add the sample data if needed
-add_sample_data()
+    shard_router.scatter(load)
+    tree = location_tree()
+
+    def attach(shard):
+        attached = attach_locations(tree, only_missing=False)
+        db.session.flush()
+        in_use = {path for (path,) in db.session.query(User.location_path).distinct()}
+        stand_ins = [
+            node
+            for node in LocationNode.query.filter(LocationNode.level.is_(None))
+            if node.path not in in_use and node.path not in imported
+        ]
+        for node in stand_ins:
+            db.session.delete(node)
+        db.session.commit()
+        return attached, len(stand_ins)
+
+    print(f"Loaded {len(nodes)} location nodes.")
+    for shard, (attached, dropped) in zip(shard_router.names, shard_router.scatter(attach)):
+        print(f"{shard}: re-attached users in {attached} locations, dropped {dropped} stand-in nodes.")
+
+# Human readable certificate state for the update form and the match modal. Callers load the
+# CertificateStatus row themselves, since the match modal also needs its thumbnail.
+def certificate_status_text(status):
+    if status is None:
+        return "not uploaded"
+    if status.status == "rejected":
+        return f"rejected ({status.reason})"
+    if status.status == "ready":
+        if status.page_count and status.content_type == "application/pdf":
+            return f"ready (PDF, {status.page_count} page(s))"
+        return f"ready ({status.width}x{status.height} image)"
+    return "processing"
 
 # Helper function to handle user registration
 def register_user(
@@ -174,7 +1128,9 @@ def register_user(
     disabilities,
     assistance,
     certificate,
+    skills=None,
 ):
+    # 'certificate' is the base64 upload payload; it is processed in the background
     # Validate required fields
     if user_type == "scribe":
         required_fields = [
@@ -207,35 +1163,59 @@ def register_user(
             )
 
     # Check if email already exists
-    existing_user = User.query.filter_by(email=email).first()
-    if existing_user:
+    if locate_user(email) is not None:
         return dbc.Alert("Email already registered.", color="warning")
 
-    try:
-        disabilities_str = ", ".join(disabilities) if disabilities else ""
-        assistance_str = ", ".join(assistance) if assistance else ""
-        new_user = User(
-            user_type=user_type,
-            name=name,
-            email=email,
-            location=location,
-            age_or_school=extra,
-            subject=subject,
-            class_level=class_level,
-            category_of_disability=category_of_disability if user_type == "child" else None,
-            disabilities=disabilities_str if user_type == "child" else None,
-            assistance_needed=assistance_str if user_type == "child" else None,
-            certificate=certificate if user_type == "child" else None,
-        )
-        db.session.add(new_user)
-        db.session.commit()
-        return dbc.Alert(
-            f"{user_type.capitalize()} registration for {name} completed successfully!",
-            color="success",
-        )
-    except Exception as e:
-        db.session.rollback()
-        return dbc.Alert(f"An error occurred during registration: {str(e)}", color="danger")
+    tree = location_tree()
+
+    # Written to the shard of the user's location, together with its derived rows
+    with shard_router.use(shard_router.shard_for(location)):
+        try:
+            disabilities_str = ", ".join(disabilities) if disabilities else ""
+            assistance_str = ", ".join(assistance) if assistance else ""
+            skills_str = ", ".join(skills) if skills else ""
+            new_user = User(
+                id=shard_router.first_row_id(User, ArchivedUser),
+                user_type=user_type,
+                name=name,
+                email=email,
+                location=location,
+                location_path=location_node_path(tree, location),
+                age_or_school=extra,
+                subject=subject,
+                class_level=class_level,
+                category_of_disability=category_of_disability if user_type == "child" else None,
+                disabilities=disabilities_str if user_type == "child" else None,
+                assistance_needed=assistance_str if user_type == "child" else None,
+                skills=skills_str if user_type == "scribe" else None,
+                capability_mask=capability_mask(user_type, assistance_str, skills_str),
+            )
+            # Earlier registrations of the same person under a slightly different name or email
+            duplicates = find_duplicates(
+                db.session, NameBand, User, new_user, server.config["DUPLICATE_MIN_SIMILARITY"]
+            )
+            db.session.add(new_user)
+            certificate_version = None
+            if user_type == "child" and certificate:
+                certificate_version = mark_certificate_processing(new_user)
+            db.session.flush()
+            replace_name_bands(db.session, NameBand, new_user)
+            queue_duplicate_review((new_user.id, other_id, score) for other_id, score in duplicates)
+            queue_match_notifications(new_user)
+            refresh_match_state(new_user)
+            adjust_counts(db.session, DemandSupplyCount, user_count_keys(new_user), 1)
+            db.session.commit()
+            user_snapshot.upsert(snapshot_row(new_user))
+            reassign_committed(new_user)
+            if certificate_version is not None:
+                certificate_pipeline.submit(new_user.id, certificate_version, certificate)
+            message = f"{user_type.capitalize()} registration for {name} completed successfully!"
+            if duplicates:
+                message += " It looks similar to an existing registration, which a coordinator will review."
+            return dbc.Alert(message, color="success")
+        except Exception as e:
+            db.session.rollback()
+            return dbc.Alert(f"An error occurred during registration: {str(e)}", color="danger")
 
 # Registration Form for Child or Scribe
 def registration_form(user_type):
@@ -459,6 +1439,25 @@ def registration_form(user_type):
             ),
         ]
 
+    # Assistance a scribe can give, matched against the children's needs
+    if user_type == "scribe":
+        form_fields += [
+            dbc.Row(
+                [
+                    dbc.Col(dbc.Label("Assistance You Can Give"), width=3),
+                    dbc.Col(
+                        dcc.Checklist(
+                            options=SKILL_OPTIONS,
+                            id={"type": "registration_skills", "user_type": user_type},
+                            inline=False,  # Set to False for vertical layout
+                        ),
+                        width=9,
+                    ),
+                ],
+                className="mb-3",
+            ),
+        ]
+
     # Submit Button and Confirmation
     form_fields += [
         dbc.Row(
@@ -552,6 +1551,7 @@ def update_form():
         State({"type": "registration_disabilities", "user_type": ALL}, "value"),
         State({"type": "registration_assistance", "user_type": ALL}, "value"),
         State({"type": "registration_certificate", "user_type": ALL}, "contents"),
+        State({"type": "registration_skills", "user_type": ALL}, "value"),
     ],
     prevent_initial_call=True,
 )
@@ -568,6 +1568,7 @@ def handle_registration(
     disabilities_list,
     assistance_list,
     certificates,
+    skills_list,
 ):
     ctx = callback_context
 
@@ -590,19 +1591,16 @@ def handle_registration(
     disabilities = disabilities_list[0]
     assistance = assistance_list[0]
     certificate_content = certificates[0]
+    skills = skills_list[0] if skills_list else None  # Only the scribe form has this field
 
-    # Decode the uploaded file (only required for child)
+    # The uploaded file is decoded and validated in the background (only required for child)
+    # The output is an ALL wildcard, so one value is returned per rendered form (only one is)
     if user_type == "child":
-        if certificate_content:
-            try:
-                content_type, content_string = certificate_content.split(',')
-                decoded = base64.b64decode(content_string)
-            except Exception:
-                decoded = None
-        else:
-            return dbc.Alert("Please upload your Disability Certificate.", color="danger")
+        if not certificate_content:
+            return [dbc.Alert("Please upload your Disability Certificate.", color="danger")]
+        certificate = upload_payload(certificate_content)
     else:
-        decoded = None  # Not required for scribe
+        certificate = None  # Not required for scribe
 
     # Register user
     confirmation = register_user(
@@ -616,10 +1614,11 @@ def handle_registration(
         category_of_disability,
         disabilities,
         assistance,
-        decoded,
+        certificate,
+        skills,
     )
 
-    return confirmation
+    return [confirmation]
 
 # Callback to render tab content based on active tab
 @app.callback(
@@ -636,6 +1635,10 @@ def render_tab_content(active_tab):
         return update_form()
     elif active_tab == "matching_network":
         return matching_layout()
+    elif active_tab == "admin_registrations":
+        return admin_layout()
+    elif active_tab == "supply_demand":
+        return analytics_layout()
     else:
         return html.P("This tab is not available.")
 
@@ -652,7 +1655,12 @@ def fetch_user_details(n_clicks, user_type, email):
     if n_clicks:
         if not email:
             return dbc.Alert("Please enter your registered email.", color="danger"), ""
-        user = User.query.filter_by(email=email, user_type=user_type).first()
+        with shard_router.use(locate_user(email, user_type) or DEFAULT_SHARD):
+            user = User.query.filter_by(email=email, user_type=user_type).first()
+            # Only the child form shows the certificate
+            certificate_status = (
+                db.session.get(CertificateStatus, user.id) if user and user_type == "child" else None
+            )
         if not user:
             return dbc.Alert(
                 f"No {user_type} registration found with this email.", color="warning"
@@ -777,6 +1785,27 @@ def fetch_user_details(n_clicks, user_type, email):
                 ],
                 className="mb-3",
             ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Label("Exam Sessions" if user_type == "child" else "Availability"),
+                        width=3,
+                    ),
+                    dbc.Col(
+                        dbc.Textarea(
+                            id="update_schedule",
+                            value=format_slots(
+                                schedule_index.sessions(user.id)
+                                if user_type == "child"
+                                else schedule_index.availability(user.id)
+                            ),
+                            placeholder="One slot per line, e.g. 2025-03-04 09:30-12:30",
+                        ),
+                        width=9,
+                    ),
+                ],
+                className="mb-3",
+            ),
         ]
 
         # Additional fields specific to 'child'
@@ -870,7 +1899,72 @@ def fetch_user_details(n_clicks, user_type, email):
                     ],
                     className="mb-3",
                 ),
+                dbc.Row(
+                    [
+                        dbc.Col(dbc.Label("Current Certificate"), width=3),
+                        dbc.Col(
+                            html.P(certificate_status_text(certificate_status)),
+                            width=9,
+                        ),
+                    ],
+                    className="mb-3",
+                ),
+                # update_user reads the scribe skills field; children have none
+                dcc.Checklist(id="update_skills", options=[], value=[], style={"display": "none"}),
             ]
+        else:
+            update_form_user += [
+                dbc.Row(
+                    [
+                        dbc.Col(dbc.Label("Assistance You Can Give"), width=3),
+                        dbc.Col(
+                            dcc.Checklist(
+                                options=SKILL_OPTIONS,
+                                id="update_skills",
+                                value=[s.strip() for s in user.skills.split(",")] if user.skills else [],
+                                inline=False,  # Set to False for vertical layout
+                            ),
+                            width=9,
+                        ),
+                    ],
+                    className="mb-3",
+                ),
+                # update_user reads the child-only fields as well; scribes have none
+                html.Div(
+                    [
+                        dcc.Dropdown(id="update_category_of_disability", options=[]),
+                        dcc.Checklist(id="update_disabilities", options=[], value=[]),
+                        dcc.Checklist(id="update_assistance", options=[], value=[]),
+                        dcc.Upload(id="update_certificate"),
+                    ],
+                    style={"display": "none"},
+                ),
+            ]
+
+        # Withdrawn users keep their registration but leave matching and lose their assignment
+        update_form_user += [
+            dbc.Row(
+                [
+                    dbc.Col(dbc.Label("Participation"), width=3),
+                    dbc.Col(
+                        dcc.Checklist(
+                            options=[
+                                {
+                                    "label": "Withdraw from this exam cycle"
+                                    if user_type == "child"
+                                    else "No longer available to scribe (withdraw)",
+                                    "value": "withdrawn",
+                                }
+                            ],
+                            id="update_withdrawn",
+                            value=["withdrawn"] if user.withdrawn else [],
+                        ),
+                        width=9,
+                    ),
+                ],
+                className="mb-3",
+            ),
+        ]
 
         # Submit Button and Confirmation
         update_form_user += [
@@ -888,7 +1982,7 @@ def fetch_user_details(n_clicks, user_type, email):
             html.Div(id="update_confirmation", className="mt-3"),
         ]
 
-        return dbc.Form(update_form_user)
+        return "", dbc.Form(update_form_user)
 
 # Callback to handle updating user details
 @app.callback(
@@ -908,6 +2002,9 @@ def fetch_user_details(n_clicks, user_type, email):
         State("update_disabilities", "value"),
         State("update_assistance", "value"),
         State("update_certificate", "contents"),  # For child
+        State("update_schedule", "value"),  # Exam sessions for child, availability for scribe
+        State("update_skills", "value"),  # For scribe
+        State("update_withdrawn", "value"),
     ],
     prevent_initial_call=True,
 )
@@ -924,6 +2021,9 @@ def update_user(
     disabilities,
     assistance,
     certificate_content,
+    schedule_text,
+    skills=None,
+    withdrawn=None,
 ):
     if n_clicks:
         # Validate required fields
@@ -961,112 +2061,191 @@ def update_user(
                     color="danger",
                 )
 
-        user = User.query.filter_by(email=email, user_type=user_type).first()
-        if not user:
+        try:
+            slots = parse_slots(schedule_text)
+        except ValueError as e:
+            return dbc.Alert(str(e), color="danger")
+
+        shard = locate_user(email, user_type)
+        if shard is None:
             return dbc.Alert(
                 f"No {user_type} registration found with this email.", color="warning"
             )
-        try:
-            user.name = name
-            user.location = location
-            user.age_or_school = extra
-            user.subject = subject
-            user.class_level = class_level
-            if user_type == "child":
-                user.category_of_disability = category_of_disability
-                user.disabilities = ", ".join(disabilities) if disabilities else ""
-                user.assistance_needed = ", ".join(assistance) if assistance else ""
-
-                # Handle certificate upload for child
-                if certificate_content:
-                    try:
-                        content_type, content_string = certificate_content.split(',')
-                        decoded = base64.b64decode(content_string)
-                        user.certificate = decoded
-                    except Exception:
+        if shard_router.shard_for(location) != shard:
+            # A user's rows live in the shard of its location group, and registrations are not moved
+            # between shards; a new registration would be refused too, as the email is already taken
+            shard_locations = server.config["SHARD_LOCATIONS"]
+            listed = sorted(place for place, name in shard_locations.items() if name == shard)
+            if listed:
+                choices = f"Locations it can move to: {', '.join(listed)}."
+            else:
+                choices = f"It can move to any location except {', '.join(sorted(shard_locations))}."
+            return dbc.Alert(
+                f"{location} is kept in a different database from this registration's current location, "
+                f"so the location cannot be changed to it. {choices}",
+                color="warning",
+            )
+        tree = location_tree()
+        with shard_router.use(shard):
+            user = User.query.filter_by(email=email, user_type=user_type).first()
+            try:
+                previous_match_ids = {other.id for other, _ in eligible_matches(user)}
+                previous_count_keys = user_count_keys(user)
+                previous_location = user.location
+                user.name = name
+                user.location = location
+                user.location_path = location_node_path(tree, location)
+                user.age_or_school = extra
+                user.subject = subject
+                user.class_level = class_level
+                user.academic_year = current_academic_year()  # Updating carries a registration into this cycle
+                if user_type == "child":
+                    user.category_of_disability = category_of_disability
+                    user.disabilities = ", ".join(disabilities) if disabilities else ""
+                    user.assistance_needed = ", ".join(assistance) if assistance else ""
+
+                    # Handle certificate upload for child
+                    certificate = upload_payload(certificate_content)
+                    if not certificate:
                         return dbc.Alert(
                             "There was an error processing the uploaded certificate.",
                             color="danger",
                         )
+                    certificate_version = mark_certificate_processing(user)
                 else:
-                    return dbc.Alert(
-                        "Please upload your Disability Certificate.", color="danger"
-                    )
-            db.session.commit()
-            return dbc.Alert(
-                f"{user_type.capitalize()} registration updated successfully!",
-                color="success",
-            )
-        except Exception as e:
-            db.session.rollback()
-            return dbc.Alert(f"An error occurred while updating: {str(e)}", color="danger")
+                    user.skills = ", ".join(skills) if skills else ""
+                user.capability_mask = capability_mask(user.user_type, user.assistance_needed, user.skills)
+                user.withdrawn = bool(withdrawn)
+                replace_schedule(user, slots)
+                replace_name_bands(db.session, NameBand, user)
+                queue_match_notifications(user, previous_match_ids)
+                refresh_match_state(user, previous_location)
+                adjust_counts(db.session, DemandSupplyCount, previous_count_keys, -1)
+                adjust_counts(db.session, DemandSupplyCount, user_count_keys(user), 1)
+                db.session.commit()
+                user_snapshot.upsert(snapshot_row(user))
+                if user_type == "child":
+                    schedule_index.set_sessions(user.id, slots)
+                else:
+                    schedule_index.set_availability(user.id, slots)
+                reassign_committed(user)
+                if user_type == "child":
+                    certificate_pipeline.submit(user.id, certificate_version, certificate)
+                return dbc.Alert(
+                    f"{user_type.capitalize()} registration updated successfully!",
+                    color="success",
+                )
+            except Exception as e:
+                db.session.rollback()
+                return dbc.Alert(f"An error occurred while updating: {str(e)}", color="danger")
     return ""
 
-# Matching Layout
-def matching_layout():
-    # Query data from the database to generate filters for locations and subjects
-    with server.app_context():
-        all_users = User.query.all()
-
-    locations = sorted(set([user.location for user in all_users if user.location]))
-    subjects = sorted(
-        set(
-            [
-                subj.strip()
-                for user in all_users
-                if user.subject
-                for subj in user.subject.split(",")
-            ]
-        )
-    )
-    user_types = ["child", "scribe"]
-
-    stylesheet = [
-        {
-            "selector": '[type = "child"]',
-            "style": {"background-color": "#FF4136", "shape": "rectangle"},
-        },
-        {
-            "selector": '[type = "scribe"]',
-            "style": {"background-color": "#0074D9", "shape": "ellipse"},
+# Children form the first row and their eligible scribes the next
+def network_layout():
+    name = server.config["NETWORK_LAYOUT"]
+    if name == "breadthfirst":
+        return {"name": name, "roots": 'node[type = "child"]', "spacingFactor": 1.2}
+    return {"name": name}
+
+# Cytoscape styles for the matching network
+NETWORK_STYLESHEET = [
+    {
+        "selector": '[type = "child"]',
+        "style": {"background-color": "#FF4136", "shape": "rectangle"},
+    },
+    {
+        "selector": '[type = "scribe"]',
+        "style": {"background-color": "#0074D9", "shape": "ellipse"},
+    },
+    {
+        "selector": "node",
+        "style": {
+            "label": "data(short_name)",
+            "text-valign": "center",
+            "text-halign": "center",
+            "font-size": "12px",
         },
-        {
-            "selector": "node",
-            "style": {
-                "label": "data(short_name)",
-                "text-valign": "center",
-                "text-halign": "center",
-                "font-size": "12px",
-            },
+    },
+    {
+        "selector": "edge",
+        "style": {
+            "label": "data(subjects)",
+            "text-rotation": "autorotate",  # Rotate text along the edge
+            "text-margin-y": -10,  # Slight adjustment to avoid overlap with edge line
+            "text-wrap": "wrap",
+            "text-max-width": 10,  # Narrow width to make it vertical
+            "curve-style": "bezier",
+            "target-arrow-shape": "triangle",
+            "line-color": "#ccc",
+            "target-arrow-color": "#ccc",
+            "width": 2,
+            "font-size": "10px",
         },
-        {
-            "selector": "edge",
-            "style": {
-                "label": "data(subjects)",
-                "text-rotation": "autorotate",  # Rotate text along the edge
-                "text-margin-y": -10,  # Slight adjustment to avoid overlap with edge line
-                "text-wrap": "wrap",
-                "text-max-width": 10,  # Narrow width to make it vertical
-                "curve-style": "bezier",
-                "target-arrow-shape": "triangle",
-                "line-color": "#ccc",
-                "target-arrow-color": "#ccc",
-                "width": 2,
-                "font-size": "10px",
-            },
+    },
+]
+
+# Style rule that makes one node stand out, used for search results
+def highlight_style(node_id):
+    return {
+        "selector": f'[id = "{node_id}"]',
+        "style": {
+            "border-width": 4,
+            "border-color": "#FFDC00",
+            "width": 40,
+            "height": 40,
         },
-    ]
+    }
+
+# Matching Layout
+# Location filter options: the hierarchy nodes that have registrations, indented under their
+# parents and labelled with the counts of their whole subtree
+def location_options():
+    tree, counts = location_tree(), location_counts()
+    options = []
+    for path in tree.walk():
+        if path in counts:
+            indent = "\u00a0" * 4 * (path_depth(path) - 1)
+            totals = counts[path]
+            options.append(
+                {
+                    "label": f"{indent}{tree.names[path]} (children: {totals['child']}, scribes: {totals['scribe']})",
+                    "value": path,
+                }
+            )
+    return options
+
+def matching_layout():
+    # Filter options: the location hierarchy, and subjects from the user snapshot
+    location_filter_options = location_options()
+    _, subjects = user_snapshot.current.facets()
+    user_types = NETWORK_USER_TYPES
 
     return dbc.Container(
         [
             html.H4("Scribe Matching Network"),
+            dbc.Row(
+                dbc.Col(
+                    [
+                        dbc.Input(
+                            id="user_search",
+                            type="search",
+                            placeholder="Search people by name, email, location, school or subject",
+                            debounce=0.25,
+                        ),
+                        html.Div(id="user_search_results", className="mt-2"),
+                    ],
+                    width=8,
+                ),
+                className="mb-3",
+            ),
             dbc.Row(
                 [
                     dbc.Col(
                         dcc.Dropdown(
                             id="location_filter",
-                            options=[{"label": loc, "value": loc} for loc in locations],
-                            value=locations,  # Select all locations by default
+                            options=location_filter_options,
+                            # Select every top-level region by default
+                            value=[option["value"] for option in location_filter_options if path_depth(option["value"]) == 1],
                             multi=True,
                             placeholder="Filter by Location",
                         ),
@@ -1097,110 +2276,429 @@ def matching_layout():
                 ],
                 className="mb-3",
             ),
+            dbc.Row(
+                dbc.Col(
+                    dcc.Checklist(
+                        id="schedule_filter",
+                        options=[
+                            {
+                                "label": "Only scribes free during the child's exam sessions",
+                                "value": "schedule",
+                            }
+                        ],
+                        value=["schedule"],
+                        inline=True,
+                    ),
+                ),
+                className="mb-3",
+            ),
             cyto.Cytoscape(
                 id="matching-network",
                 elements=[],
-                stylesheet=stylesheet,
+                stylesheet=NETWORK_STYLESHEET,
                 style={"width": "100%", "height": "600px"},
-                layout={"name": "dagre"},  # Layout type for node positioning
+                layout=network_layout(),  # Layout type for node positioning
             ),
+            dcc.Store(id="network_full_elements"),  # Whole graph when it is filtered in the browser
+            dcc.Store(id="network_server_query"),  # Filters to apply on the server otherwise
+            dcc.Store(id="network_diff_base"),  # Query and data version of the elements shown, to patch them
         ],
         fluid=True,
     )
 
-# Callback to update the matching network based on filters
-@app.callback(
-    Output("matching-network", "elements"),
-    [
-        Input("location_filter", "value"),
-        Input("subject_filter", "value"),
-        Input("user_type_filter", "value"),
-    ],
-)
-def update_matching_network(selected_locations, selected_subjects, selected_user_types):
-    elements = []
-
-    with server.app_context():
-        if not selected_locations:
-            selected_locations = [
-                user.location for user in User.query.all() if user.location
-            ]
-        if not selected_subjects:
-            selected_subjects = [
-                subj.strip()
-                for user in User.query.all()
-                if user.subject
-                for subj in user.subject.split(",")
-            ]
-        if not selected_user_types:
-            selected_user_types = ["child", "scribe"]
-
-        filtered_users = User.query.filter(
-            User.location.in_(selected_locations),
-            User.user_type.in_(selected_user_types),
-        ).all()
+NETWORK_USER_TYPES = ["child", "scribe"]
 
-    # Filter users based on subjects
-    filtered_users = [
-        user
-        for user in filtered_users
-        if any(
-            subj.strip().lower() in [s.lower() for s in user.subject.split(",")]
-            for subj in selected_subjects
-        )
-    ]
+# Cytoscape elements for selected rows and edges; 'tagged' adds the location and subject
+# codes the browser filters on
+def network_elements(snapshot, rows, edges, tagged=False):
+    elements = []
 
     # Create nodes for children and scribes
-    for user in filtered_users:
+    for index in rows:
+        user = snapshot.record(index)
         short_name = (
             user.name[:6] + "..." if len(user.name) > 6 else user.name
         )  # Shorten the name for display
+        data = {
+            "id": f"user_{user.id}",
+            "name": user.name,
+            "short_name": short_name,  # Shortened name for display
+            "label": user.name,
+            "type": user.user_type,
+            "tooltip": f"Name: {user.name}\nAge/School: {user.age_or_school}\nLocation: {user.location}\nSubjects: {user.subject}\nClass Level: {user.class_level}"
+            + (f"\nCan Give: {', '.join(capability_labels(user.capability_mask))}" if user.user_type == "scribe" else "")
+            + (f"\nNeeds: {', '.join(capability_labels(user.capability_mask)) or 'none'}" if user.user_type == "child" else ""),
+        }
+        if tagged:
+            mask = snapshot.subject_masks[index]
+            data["loc"] = snapshot.location_ids[index]
+            data["subj"] = [code for code in range(mask.bit_length()) if mask >> code & 1]
+        elements.append({"data": data})
+
+    # Create edges between children and scribes based on shared subjects, location, and class level
+    for child_id, scribe_id, shared_mask in edges:
         elements.append(
             {
                 "data": {
-                    "id": f"user_{user.id}",
-                    "name": user.name,
-                    "short_name": short_name,  # Shortened name for display
-                    "label": user.name,
-                    "type": user.user_type,
-                    "tooltip": f"Name: {user.name}\nAge/School: {user.age_or_school}\nLocation: {user.location}\nSubjects: {user.subject}\nClass Level: {user.class_level}",
+                    "id": f"edge_{child_id}_{scribe_id}",  # Stable id, so diffs match edges across filters
+                    "source": f"user_{child_id}",
+                    "target": f"user_{scribe_id}",
+                    "type": "child_scribe",
+                    "subjects": ", ".join(
+                        [subj.capitalize() for subj in snapshot.subject_names(shared_mask)]
+                    ),
+                    # Needs of the child the scribe covers; every edge covers all of them
+                    "assistance": ", ".join(
+                        capability_labels(snapshot.capability_masks[snapshot.index_of(child_id)])
+                    ) or "none",
                 }
             }
         )
 
+    return elements
+
+# Callback to ship the whole graph for client-side filtering; above CLIENT_FILTER_MAX_ELEMENTS
+# (or when it is 0) only {"mode": "server"} is sent and filters are applied on the server
+@app.callback(
+    Output("network_full_elements", "data"),
+    Input("schedule_filter", "value"),
+)
+def load_network_elements(schedule_filter):
+    key = (current_data_version(), bool(schedule_filter))
+    cached = _full_network_cache.get(key)
+    if cached is None:
+        cached = build_full_network(schedule_filter)
+        _full_network_cache.clear()
+        _full_network_cache[key] = cached
+    return cached
+
+# Last whole-graph payload by (data version, schedule filter): every coordinator opening the tab
+# asks for the same unfiltered view, so only the first after a change builds it
+_full_network_cache = {}
+
+def build_full_network(schedule_filter):
+    limit = server.config["CLIENT_FILTER_MAX_ELEMENTS"]
+    snapshot = user_snapshot.current
+    if not limit or len(snapshot.select(user_types=NETWORK_USER_TYPES)) > limit:
+        return {"mode": "server"}
+    snapshot, rows, edges = compute_network(None, None, NETWORK_USER_TYPES, schedule_filter)
+    if len(rows) + len(edges) > limit:
+        return {"mode": "server"}
+    tree = location_tree()
+    return {
+        "mode": "client",
+        "location_paths": [tree.path_for(location) for location in snapshot.locations],  # By location code
+        "subjects": {subject: code for code, subject in enumerate(snapshot.subjects)},
+        "elements": network_elements(snapshot, rows, edges, tagged=True),
+    }
+
+# Filter changes are handled in the browser (assets/network_filter.js): the full element set is
+# filtered there, or the filters are passed to network_server_query for the server fallback
+app.clientside_callback(
+    ClientsideFunction(namespace="network", function_name="filter_elements"),
+    Output("matching-network", "elements", allow_duplicate=True),
+    Output("matching-network", "autoRefreshLayout", allow_duplicate=True),
+    Output("network_diff_base", "data", allow_duplicate=True),
+    Output("network_server_query", "data"),
+    Input("location_filter", "value"),
+    Input("subject_filter", "value"),
+    Input("user_type_filter", "value"),
+    Input("network_full_elements", "data"),
+    State("schedule_filter", "value"),
+    prevent_initial_call=True,
+)
+
+def query_elements(query):
+    snapshot, rows, edges = compute_network(
+        None, query.get("subjects"), query.get("user_types"), query.get("schedule"), query.get("regions")
+    )
+    return network_elements(snapshot, rows, edges)
+
+# Elements of recent server-side queries by (data version, query), most recently used last; only
+# the current version's entries are kept, so a change drops them all
+_query_elements_cache = OrderedDict()
+_query_elements_lock = threading.Lock()
+
+def query_cache_key(version, query):
+    return version, json.dumps(query, sort_keys=True)
+
+# Elements for 'query' at 'version', built only when they are not cached
+def cached_query_elements(version, query):
+    key = query_cache_key(version, query)
+    with _query_elements_lock:
+        elements = _query_elements_cache.get(key)
+        if elements is not None:
+            _query_elements_cache.move_to_end(key)
+            return elements
+    elements = query_elements(query)
+    with _query_elements_lock:
+        for stale in [cached for cached in _query_elements_cache if cached[0] != version]:
+            del _query_elements_cache[stale]
+        _query_elements_cache[key] = elements
+        while len(_query_elements_cache) > server.config["NETWORK_QUERY_CACHE_SIZE"]:
+            _query_elements_cache.popitem(last=False)
+    return elements
+
+# Callback to update the matching network on the server when the graph is too large to ship.
+# When the browser shows the elements of an earlier query at the current data version, only the
+# elements that differ are sent as a Patch and the layout is not re-run, so nodes keep their
+# positions; nodes that were added are placed by network.place_added in assets/network_filter.js.
+@app.callback(
+    Output("matching-network", "elements"),
+    Output("matching-network", "autoRefreshLayout"),
+    Output("network_diff_base", "data"),
+    Input("network_server_query", "data"),
+    State("network_diff_base", "data"),
+    prevent_initial_call=True,
+)
+def update_matching_network(query, base):
+    version = current_data_version()
+    elements = cached_query_elements(version, query)
+    new_base = {"query": query, "version": version}
+    # The elements the browser holds, if the query that built them is still cached at this version;
+    # rebuilding them would double the work of every filter change, so a miss sends everything
+    previous = None
+    if base and base.get("version") == version:
+        with _query_elements_lock:
+            previous = _query_elements_cache.get(query_cache_key(version, base["query"]))
+    if previous is None:
+        metrics.increment("network.full_refresh")
+        return elements, True, new_base
+
+    removed, added = diff_elements(previous, elements)
+    changed = len(removed) + len(added)
+    if changed > server.config["NETWORK_PATCH_MAX_FRACTION"] * max(len(elements), 1):
+        metrics.increment("network.full_refresh")
+        return elements, True, new_base
+    metrics.increment("network.patch")
+    metrics.increment("network.patch.removed", len(removed))
+    metrics.increment("network.patch.added", len(added))
+    metrics.set_gauge("network.patch.last_fraction", round(changed / max(len(elements), 1), 4))
+    new_base["added_nodes"] = [element_id(element) for element in added if "source" not in element["data"]]
+    return elements_patch(removed, added), False, new_base
+
+# Lay out only the nodes a patch added, next to the graph already on screen
+app.clientside_callback(
+    ClientsideFunction(namespace="network", function_name="place_added"),
+    Output("matching-network", "autoRefreshLayout", allow_duplicate=True),  # Always left unchanged
+    Input("network_diff_base", "data"),
+    prevent_initial_call=True,
+)
+
+# Selected snapshot rows and (child_id, scribe_id, shared_mask) edges for a set of network filters;
+# 'regions' are hierarchy paths, and a location must lie inside one of them as well
+def compute_network(selected_locations, selected_subjects, selected_user_types, schedule_filter=None, regions=None):
+    snapshot = user_snapshot.current
+
+    # Empty filters mean "all"; the snapshot skips the column instead of listing every value
+    subject_mask = snapshot.subject_mask(selected_subjects) if selected_subjects else None
+    if not selected_user_types:
+        selected_user_types = ["child", "scribe"]
+    selected_locations = selected_locations or None
+    if regions:
+        selected_locations = location_tree().locations_within(selected_locations or snapshot.locations, regions)
+
+    rows = snapshot.select(
+        locations=selected_locations,
+        user_types=selected_user_types,
+        subject_mask=subject_mask,
+    )
+
     # Create edges between children and scribes based on shared subjects, location, and class level
-    for child in filtered_users:
-        if child.user_type != "child":
-            continue
-        for scribe in filtered_users:
-            if scribe.user_type != "scribe":
-                continue
-            # Check location, subjects, and class level
-            if child.location == scribe.location:
-                child_subjects = set(
-                    [subj.strip().lower() for subj in child.subject.split(",")]
-                )
-                scribe_subjects = set(
-                    [subj.strip().lower() for subj in scribe.subject.split(",")]
+    partitions = location_partitions(snapshot, rows)
+    mode = "parallel" if edge_computer.should_parallelize(partitions) else "inline"
+    with metrics.timer(f"edges.{mode}"):
+        edges = edge_computer.compute(partitions)
+
+    # Keep only pairs where the scribe is free for at least one of the child's exam sessions
+    if schedule_filter:
+        edges = [edge for edge in edges if schedule_index.can_cover(edge[0], edge[1])]
+
+    return snapshot, rows, edges
+
+# Eligible counterparts of one user as sorted (other_id, shared_mask) pairs, or None if unknown
+def candidates_for(user_id, schedule_filter=True):
+    snapshot = user_snapshot.current
+    index = snapshot.index_of(user_id)
+    if index is None:
+        return None
+    user = snapshot.record(index)
+    if user.user_type not in ("child", "scribe") or user.location is None or user.withdrawn:
+        return []
+    other_type = "scribe" if user.user_type == "child" else "child"
+    rows = snapshot.select(locations=[user.location], user_types=[other_type])
+    children, scribes = location_partitions(snapshot, rows + [index])[snapshot.location_ids[index]]
+    if user.user_type == "child":
+        edges = partition_edges([entry for entry in children if entry[0] == user_id], scribes)
+    else:
+        edges = partition_edges(children, [entry for entry in scribes if entry[0] == user_id])
+    if schedule_filter:
+        edges = [edge for edge in edges if schedule_index.can_cover(edge[0], edge[1])]
+    other = 1 if user.user_type == "child" else 0
+    return sorted((edge[other], edge[2]) for edge in edges)
+
+# Repair the child->scribe assignment with augmenting paths that start only from the given users:
+# unassigned children in 'child_ids' look for a scribe, scribes in 'scribe_ids' with room look for
+# an unassigned child. Eligibility comes from the committed snapshot and schedule index, so this
+# runs after the change that prompted it is committed. Runs in the current shard; the caller
+# commits. Returns the number of children whose scribe changed.
+def repair_assignments(child_ids=(), scribe_ids=()):
+    snapshot = user_snapshot.current
+    users = [snapshot.get(user_id) for user_id in [*child_ids, *scribe_ids]]
+    locations = sorted({user.location for user in users if user and user.location})
+    if not locations:
+        return 0
+    partitions = location_partitions(snapshot, snapshot.select(locations=locations))
+    entries = {
+        entry[0]: (location_id, is_child, entry)
+        for location_id, (children, scribes) in partitions.items()
+        for is_child, group in ((True, children), (False, scribes))
+        for entry in group
+    }
+    assignment = AssignmentMap(
+        db.session.query(Assignment.child_id, Assignment.scribe_id)
+        .join(User, User.id == Assignment.child_id)
+        .filter(User.location.in_(locations)),
+        server.config["SCRIBE_CAPACITY"],
+    )
+    max_visits = server.config["ASSIGNMENT_REPAIR_MAX_VISITS"]
+    candidates = {}
+
+    # Eligible counterparts within the user's location; withdrawn users have none
+    def eligible(user_id):
+        if user_id not in candidates:
+            if user_id not in entries:
+                return []
+            location_id, is_child, entry = entries[user_id]
+            children, scribes = partitions[location_id]
+            edges = partition_edges([entry], scribes) if is_child else partition_edges(children, [entry])
+            candidates[user_id] = [
+                edge[1] if is_child else edge[0]
+                for edge in edges
+                if schedule_index.can_cover(edge[0], edge[1])
+            ]
+        return candidates[user_id]
+
+    # A path can only end at a scribe with room, or at an unassigned child
+    def any_room(user_id):
+        _, scribes = partitions[entries[user_id][0]]
+        return any(assignment.has_room(entry[0]) for entry in scribes)
+
+    def any_unassigned(user_id):
+        children, _ = partitions[entries[user_id][0]]
+        return any(assignment.scribe_of(entry[0]) is None for entry in children)
+
+    moved = 0
+    with metrics.timer("assignment_repair"):
+        for child_id in child_ids:
+            if child_id in entries and assignment.scribe_of(child_id) is None and any_room(child_id):
+                moves = path_from_child(child_id, eligible, assignment.children_of, assignment.capacity, max_visits)
+                moved += assignment.apply(moves) if moves else 0
+        for scribe_id in scribe_ids:
+            while scribe_id in entries and assignment.has_room(scribe_id) and any_unassigned(scribe_id):
+                moves = path_from_scribe(scribe_id, eligible, assignment.scribe_of, max_visits)
+                if not moves:
+                    break
+                moved += assignment.apply(moves)
+
+        # Write back the children whose scribe changed; new assignments get ids of this shard
+        rows = {
+            row.child_id: row
+            for row in Assignment.query.filter(Assignment.child_id.in_(list(assignment.moves)))
+        }
+        for child_id, scribe_id in assignment.moves.items():
+            if child_id in rows:
+                rows[child_id].scribe_id = scribe_id
+                rows[child_id].assigned_at = datetime.utcnow()
+            else:
+                db.session.add(
+                    Assignment(
+                        id=shard_router.first_row_id(Assignment, ArchivedAssignment),
+                        child_id=child_id,
+                        scribe_id=scribe_id,
+                    )
                 )
-                common_subjects = child_subjects.intersection(scribe_subjects)
-                if common_subjects:
-                    # Ensure scribe's class_level is lower than child's class_level
-                    if scribe.class_level < child.class_level:
-                        elements.append(
-                            {
-                                "data": {
-                                    "source": f"user_{child.id}",
-                                    "target": f"user_{scribe.id}",
-                                    "type": "child_scribe",
-                                    "subjects": ", ".join(
-                                        [subj.capitalize() for subj in common_subjects]
-                                    ),
-                                }
-                            }
-                        )
+                db.session.flush()
+    return moved
+
+# Bring the assignment in line with a committed change of 'user': drop its assignments to
+# counterparts it is no longer eligible for (all of them once withdrawn), then repair from the
+# user and from whoever was freed. The caller commits.
+def reassign_after_change(user):
+    if user.user_type not in ("child", "scribe"):
+        return 0
+    is_child = user.user_type == "child"
+    eligible = {other_id for other_id, _ in candidates_for(user.id) or []}
+    freed = []
+    for assignment in Assignment.query.filter((Assignment.child_id if is_child else Assignment.scribe_id) == user.id):
+        other_id = assignment.scribe_id if is_child else assignment.child_id
+        if other_id not in eligible:
+            freed.append(other_id)
+            db.session.delete(assignment)
+    own = [] if user.withdrawn else [user.id]
+    if is_child:
+        return repair_assignments(child_ids=own, scribe_ids=freed)
+    return repair_assignments(child_ids=freed, scribe_ids=own)
+
+# reassign_after_change for a change that is already committed, in a transaction of its own. The
+# change stands if the repair fails; the assignment is then left for `flask repair-assignments`.
+def reassign_committed(user):
+    try:
+        reassign_after_change(user)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        metrics.increment("assignments.repair_errors")
 
-    return elements
+# Callback to show typeahead search results for coordinators
+@app.callback(
+    Output("user_search_results", "children"),
+    Input("user_search", "value"),
+    prevent_initial_call=True,
+)
+def show_search_results(query):
+    with metrics.timer("search"):
+        results = merge_sorted(
+            shard_router.scatter(lambda shard: search_users(db.session, query)),
+            key=lambda result: result["rank"],
+            limit=10,
+        )
+    if not results:
+        return html.Small("No matching people.", className="text-muted") if query else ""
+    return dbc.ListGroup(
+        [
+            dbc.ListGroupItem(
+                [
+                    html.Span(
+                        [
+                            html.Mark(piece) if matched else piece
+                            for piece, matched in highlight_parts(result["name_highlight"])
+                        ]
+                    ),
+                    html.Small(
+                        f" {result['user_type'].capitalize()}, {result['location']}, {result['email']}",
+                        className="text-muted",
+                    ),
+                ],
+                id={"type": "search_result", "user_id": result["id"]},
+                action=True,
+                n_clicks=0,
+            )
+            for result in results
+        ]
+    )
+
+# Callback to highlight the chosen search result in the network graph
+@app.callback(
+    Output("matching-network", "stylesheet"),
+    Input({"type": "search_result", "user_id": ALL}, "n_clicks"),
+    prevent_initial_call=True,
+)
+def highlight_search_result(n_clicks):
+    triggered_id = callback_context.triggered_id
+    if not triggered_id or not any(n_clicks):
+        raise dash.exceptions.PreventUpdate
+    return NETWORK_STYLESHEET + [highlight_style(f"user_{triggered_id['user_id']}")]
 
 # Callback to display a modal when a relationship (edge) is clicked
 @app.callback(
@@ -1230,14 +2728,33 @@ def toggle_modal(edge_data, n_close, is_open):
         except (IndexError, ValueError):
             return is_open, ""
 
-        # Query the database for child and scribe details
-        with server.app_context():
-            child = User.query.get(child_id)
-            scribe = User.query.get(scribe_id)
+        # Read child and scribe details from the snapshot; only the certificate comes from the database
+        snapshot = user_snapshot.current
+        child = snapshot.get(child_id)
+        scribe = snapshot.get(scribe_id)
+        with server.app_context(), shard_router.use(shard_router.shard_for_id(child_id)):
+            certificate_status = db.session.get(CertificateStatus, child_id)
+            certificate_text = certificate_status_text(certificate_status)
+            thumbnail = certificate_status.thumbnail if certificate_status else None
 
         if not child or not scribe:
             return is_open, ""
 
+        if schedule_index.sessions(child_id):
+            covered = schedule_index.covered_sessions(child_id, scribe_id)
+            covered_text = ", ".join(format_slot(slot) for slot in covered) or "none"
+        else:
+            covered_text = "no exam sessions recorded"
+
+        certificate_preview = (
+            html.Img(
+                src="data:image/jpeg;base64," + base64.b64encode(thumbnail).decode(),
+                style={"max-width": "160px"},
+            )
+            if thumbnail
+            else None
+        )
+
         # Prepare the modal content
         modal_content = html.Div(
             [
@@ -1252,6 +2769,8 @@ def toggle_modal(edge_data, n_close, is_open):
                 html.P(f"Category of Disability: {child.category_of_disability}"),
                 html.P(f"Disabilities: {child.disabilities}"),
                 html.P(f"Assistance Needed: {child.assistance_needed}"),
+                html.P(f"Certificate: {certificate_text}"),
+                certificate_preview,
                 html.Hr(),
                 html.H5(
                     "Scribe Details", style={"text-decoration": "underline"}
@@ -1261,6 +2780,7 @@ def toggle_modal(edge_data, n_close, is_open):
                 html.P(f"Location: {scribe.location}"),
                 html.P(f"Subjects: {scribe.subject}"),
                 html.P(f"Class Level: {scribe.class_level}"),
+                html.P(f"Assistance They Can Give: {', '.join(capability_labels(scribe.capability_mask))}"),
                 html.Hr(),
                 html.H5(
                     "Matching Criteria", style={"text-decoration": "underline"}
@@ -1268,54 +2788,715 @@ def toggle_modal(edge_data, n_close, is_open):
                 html.P(
                     f"Matched based on common subjects: {edge_data.get('subjects', '')}, location: {child.location}, and scribe's class level ({scribe.class_level}) is lower than child's class level ({child.class_level})."
                 ),
+                html.P(
+                    f"Assistance needs the scribe covers: {', '.join(capability_labels(child.capability_mask)) or 'none'}"
+                ),
+                html.P(f"Exam sessions the scribe is free for: {covered_text}"),
             ]
         )
         return True, modal_content
 
     return is_open, ""
 
-# Main Layout using Tabs
-app.layout = dbc.Container(
-    [
-        dcc.Location(id='url', refresh=False),
-        dbc.NavbarSimple(
-            brand="Scribe Matching Platform",
-            brand_href="/",
-            color="primary",
-            dark=True,
-            className="mb-4",
-        ),
-        dbc.Tabs(
-            [
-                dbc.Tab(label="Child Registration", tab_id="child_registration"),
-                dbc.Tab(label="Scribe Registration", tab_id="scribe_registration"),
-                dbc.Tab(label="Update Registration", tab_id="update_registration"),
-                dbc.Tab(label="Scribe Matching Network", tab_id="matching_network"),
-            ],
-            id="tabs",
-            active_tab="child_registration",  # Set a default active tab
+# Columns of the admin registrations table; certificate blobs are never selected
+ADMIN_TABLE_COLUMNS = [
+    "id",
+    "user_type",
+    "name",
+    "email",
+    "location",
+    "age_or_school",
+    "subject",
+    "class_level",
+    "category_of_disability",
+]
+ADMIN_SORTABLE_COLUMNS = {"id", "user_type", "name", "email", "location", "class_level"}
+
+# Admin Layout: a server-side paged, sorted and filtered list of registrations
+def admin_layout():
+    columns = [
+        {"name": column.replace("_", " ").title(), "id": column}
+        for column in ADMIN_TABLE_COLUMNS
+    ] + [{"name": "Certificate", "id": "certificate_status"}]
+    return dbc.Container(
+        [
+            html.H4("Registrations"),
+            html.P(
+                "Sorting is available on Id, User Type, Name, Email, Location and Class Level.",
+                className="text-muted",
+            ),
+            dash_table.DataTable(
+                id="admin_table",
+                columns=columns,
+                page_current=0,
+                page_size=25,
+                page_count=1,
+                page_action="custom",
+                sort_action="custom",
+                sort_mode="single",
+                sort_by=[],
+                filter_action="custom",
+                filter_query="",
+                style_table={"overflowX": "auto"},
+            ),
+            # Last (sort value, id) of each page seen, so the next page is an index seek
+            dcc.Store(id="admin_table_cursors", data={}),
+            html.Hr(),
+            html.H4("Possible Duplicates"),
+            html.P(
+                "Registrations whose name closely matches an earlier one of the same type, location "
+                "and class level. Merging withdraws the later registration from matching.",
+                className="text-muted",
+            ),
+            dash_table.DataTable(
+                id="duplicate_table",
+                columns=[
+                    {"name": "Similarity", "id": "similarity"},
+                    {"name": "User Type", "id": "user_type"},
+                    {"name": "Location", "id": "location"},
+                    {"name": "Class Level", "id": "class_level"},
+                    {"name": "Later Registration", "id": "name"},
+                    {"name": "Email", "id": "email"},
+                    {"name": "Earlier Registration", "id": "duplicate_of_name"},
+                    {"name": "Earlier Email", "id": "duplicate_of_email"},
+                ],
+                row_selectable="single",
+                selected_rows=[],
+                page_size=10,
+                style_table={"overflowX": "auto"},
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(dbc.Button("Merge", id="duplicate_merge", color="danger", n_clicks=0), width="auto"),
+                    dbc.Col(
+                        dbc.Button("Not a Duplicate", id="duplicate_dismiss", color="secondary", n_clicks=0),
+                        width="auto",
+                    ),
+                ],
+                className="my-2",
+            ),
+            html.Div(id="duplicate_alert"),
+        ],
+        fluid=True,
+    )
+
+# Callback to list the duplicate review queue and merge or dismiss the selected pair
+@app.callback(
+    Output("duplicate_table", "data"),
+    Output("duplicate_table", "selected_rows"),
+    Output("duplicate_alert", "children"),
+    Input("duplicate_merge", "n_clicks"),
+    Input("duplicate_dismiss", "n_clicks"),
+    State("duplicate_table", "data"),
+    State("duplicate_table", "selected_rows"),
+)
+def review_duplicates(n_merge, n_dismiss, rows, selected_rows):
+    alert = ""
+    triggered_id = callback_context.triggered_id
+    if triggered_id in ("duplicate_merge", "duplicate_dismiss"):
+        if not selected_rows or not rows:
+            alert = dbc.Alert("Select a pair first.", color="warning")
+        else:
+            message = resolve_duplicate(rows[selected_rows[0]]["id"], merge=triggered_id == "duplicate_merge")
+            alert = dbc.Alert(message, color="success")
+    return pending_duplicates(), [], alert
+
+# Callback to load one page of the admin table with paging, sorting and filtering done in SQL
+@app.callback(
+    Output("admin_table", "data"),
+    Output("admin_table", "page_count"),
+    Output("admin_table_cursors", "data"),
+    Input("admin_table", "page_current"),
+    Input("admin_table", "page_size"),
+    Input("admin_table", "sort_by"),
+    Input("admin_table", "filter_query"),
+    State("admin_table_cursors", "data"),
+)
+def update_admin_table(page_current, page_size, sort_by, filter_query, cursor_store):
+    page_current = page_current or 0
+    columns = {name: getattr(User, name) for name in ADMIN_TABLE_COLUMNS}
+    sort = (
+        sort_by[0]
+        if sort_by and sort_by[0]["column_id"] in ADMIN_SORTABLE_COLUMNS
+        else {"column_id": "id", "direction": "asc"}
+    )
+    sort_name = sort["column_id"]
+    descending = sort["direction"] == "desc"
+    filters = parse_filter_query(filter_query, columns)
+
+    # Cursors are only valid for the sort, filter and page size they were recorded under
+    signature = json.dumps([sort_name, descending, filters, page_size])
+    cursors = {}
+    if cursor_store and cursor_store.get("signature") == signature:
+        cursors = cursor_store["cursors"]
+    cursor = cursors.get(str(page_current - 1)) if page_current else None
+
+    # With several shards each one returns its first rows after the cursor (or up to the end of
+    # the requested page when there is no cursor) and the pages are merged in sort order
+    offset = page_current * page_size
+    scattered = len(shard_router.names) > 1
+    skip = offset if scattered and cursor is None else 0
+
+    def fetch(shard):
+        query = db.session.query(*columns.values(), CertificateStatus.status).outerjoin(
+            CertificateStatus, CertificateStatus.user_id == User.id
+        )
+        query = apply_filters(query, columns, filters)
+        rows, has_more = fetch_page(
+            query,
+            sort_expression(columns[sort_name]) if sort_name != "id" else User.id,
+            User.id,
+            descending,
+            page_size + skip,
+            cursor=cursor,
+            offset=0 if scattered else offset,
+        )
+        return [tuple(row) for row in rows], has_more
+
+    with metrics.timer("admin_table.page"):
+        results = shard_router.scatter(fetch)
+    sort_index = ADMIN_TABLE_COLUMNS.index(sort_name)
+    merged = merge_sorted(
+        [rows for rows, _ in results],
+        key=lambda row: (row[sort_index] if row[sort_index] is not None else "", row[0]),
+        reverse=descending,
+    )
+    rows = merged[skip : skip + page_size]
+    has_more = any(more for _, more in results) or len(merged) > skip + page_size
+
+    data = [dict(zip(ADMIN_TABLE_COLUMNS + ["certificate_status"], row)) for row in rows]
+    if data:
+        last = data[-1]
+        sort_value = last[sort_name] if last[sort_name] is not None else ""
+        cursors[str(page_current)] = [sort_value, last["id"]]
+    page_count = page_current + (2 if has_more else 1)
+    return data, page_count, {"signature": signature, "cursors": cursors}
+
+# Unmatched children ordered by their next exam, optionally limited to some locations
+def unmatched_children(now, locations=None, class_level=None):
+    rows = merge_sorted(
+        shard_router.scatter(
+            lambda shard: unmatched_report(db.session, now), shard_router.shards_for(locations)
         ),
-        html.Div(id="tab-content"),
-        # Modal for displaying match details
-        dbc.Modal(
-            [
-                dbc.ModalHeader("Scribe Match Details"),
-                dbc.ModalBody(id="modal-content"),
-                dbc.ModalFooter(
-                    dbc.Button(
-                        "Close", id="close-modal", className="ml-auto", n_clicks=0
+        key=lambda row: (row["next_exam"] is None, row["next_exam"] or "", -row["class_level"], row["id"]),
+    )
+    return [
+        dict(row, next_exam=row["next_exam"] and str(row["next_exam"]))
+        for row in rows
+        if (not locations or row["location"] in locations)
+        and (not class_level or row["class_level"] == class_level)
+    ]
+
+UNMATCHED_TABLE_COLUMNS = [
+    {"name": "Next Exam", "id": "next_exam"},
+    {"name": "Name", "id": "name"},
+    {"name": "Location", "id": "location"},
+    {"name": "Subjects", "id": "subject"},
+    {"name": "Class", "id": "class_level"},
+    {"name": "Disability Category", "id": "category_of_disability"},
+    {"name": "Assistance Needed", "id": "assistance_needed"},
+]
+
+# Analytics Layout: demand vs eligible scribe supply per location and subject
+def analytics_layout():
+    class_options = [{"label": "All classes", "value": 0}] + [
+        {"label": f"Class {i}", "value": i} for i in range(1, 13)
+    ]
+    return dbc.Container(
+        [
+            html.H4("Supply & Demand"),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Dropdown(
+                            id="analytics_class_level",
+                            options=class_options,
+                            value=0,
+                            clearable=False,
+                        ),
+                        width=3,
                     ),
-                ),
+                    dbc.Col(
+                        dcc.RadioItems(
+                            id="analytics_metric",
+                            options=[
+                                {"label": "Children without an eligible scribe", "value": "unserved_children"},
+                                {"label": "Children", "value": "children"},
+                                {"label": "Scribes", "value": "scribes"},
+                            ],
+                            value="unserved_children",
+                            inline=True,
+                        ),
+                        width=9,
+                    ),
+                ],
+                className="mb-3",
+            ),
+            dcc.Graph(id="analytics_heatmap"),
+            html.Div(
+                [
+                    html.H5("Children Without an Eligible Scribe", className="d-inline me-3"),
+                    html.A(
+                        "Download CSV",
+                        href=f"{API_PREFIX}/reports/unmatched-children?format=csv",
+                        className="btn btn-outline-primary btn-sm",
+                    ),
+                ],
+                className="mt-4 mb-2",
+            ),
+            dash_table.DataTable(
+                id="unmatched_table",
+                columns=UNMATCHED_TABLE_COLUMNS,
+                page_size=20,
+                style_table={"overflowX": "auto"},
+                style_cell={"textAlign": "left"},
+            ),
+        ],
+        fluid=True,
+    )
+
+# Callback to draw the heatmap from the aggregate counts table
+@app.callback(
+    Output("analytics_heatmap", "figure"),
+    Input("analytics_class_level", "value"),
+    Input("analytics_metric", "value"),
+)
+def update_analytics_heatmap(class_level, metric):
+    # Counts are keyed by location, so the shards' rows never overlap
+    rows = [
+        row
+        for shard_rows in shard_router.scatter(lambda shard: aggregate_rows(db.session, DemandSupplyCount))
+        for row in shard_rows
+    ]
+    cells = demand_supply(rows, class_level=class_level or None)
+    locations, subjects, matrix = heatmap_matrices(cells)
+    customdata = [
+        [
+            [matrix["children"][i][j], matrix["eligible_scribes"][i][j], matrix["unserved_children"][i][j]]
+            for j in range(len(subjects))
+        ]
+        for i in range(len(locations))
+    ]
+    figure = go.Figure(
+        go.Heatmap(
+            z=matrix[metric],
+            x=[subject.capitalize() for subject in subjects],
+            y=locations,
+            customdata=customdata,
+            colorscale="Blues" if metric == "scribes" else "Reds",
+            hovertemplate=(
+                "%{y} / %{x}<br>Children: %{customdata[0]}<br>"
+                "Eligible scribes: %{customdata[1]}<br>"
+                "Without an eligible scribe: %{customdata[2]}<extra></extra>"
+            ),
+        )
+    )
+    figure.update_layout(
+        height=max(400, 40 * len(locations)),
+        margin={"l": 120, "r": 20, "t": 20, "b": 80},
+    )
+    return figure
+
+# Callback to list unmatched children, most urgent exam first
+@app.callback(
+    Output("unmatched_table", "data"),
+    Input("analytics_class_level", "value"),
+)
+def update_unmatched_table(class_level):
+    return unmatched_children(datetime.utcnow(), class_level=class_level or None)
+
+# JSON API for partner organisations; responses carry strong ETags derived from the data version
+API_USER_FIELDS = [field for field in SNAPSHOT_FIELDS if field not in ("email", "capability_mask")]
+
+@server.errorhandler(ApiError)
+def handle_api_error(error):
+    return error_response(error)
+
+def api_user(record):
+    return {field: getattr(record, field) for field in API_USER_FIELDS}
+
+@server.route(f"{API_PREFIX}/users")
+def api_users():
+    after, limit = page_params()
+    user_type = request.args.get("user_type")
+    locations = list_param("location")
+    regions = list_param("region")  # Location hierarchy paths, e.g. /maharashtra/pune/
+
+    # Only the shards holding the requested locations are read
+    def fetch(shard):
+        query = db.session.query(*[getattr(User, field) for field in API_USER_FIELDS]).filter(
+            User.id > after
+        )
+        if user_type:
+            query = query.filter(User.user_type == user_type)
+        if locations:
+            query = query.filter(User.location.in_(locations))
+        if regions:
+            query = query.filter(
+                db.or_(
+                    *[(User.location_path >= region) & (User.location_path < path_end(region)) for region in regions]
+                )
+            )
+        return [row._asdict() for row in query.order_by(User.id).limit(limit)]
+
+    def build():
+        results = shard_router.scatter(fetch, shard_router.shards_for(locations))
+        return page(merge_sorted(results, key=lambda row: row["id"], limit=limit), limit)
+
+    return conditional_json(current_data_version(), build)
+
+@server.route(f"{API_PREFIX}/users/<int:user_id>")
+def api_user_detail(user_id):
+    version = current_data_version()
+    record = user_snapshot.current.get(user_id)
+    if record is None:
+        raise ApiError("User not found.", status=404)
+    return conditional_json(version, lambda: api_user(record))
+
+@server.route(f"{API_PREFIX}/users/<int:user_id>/candidates")
+def api_user_candidates(user_id):
+    after, limit = page_params()
+    schedule_filter = request.args.get("schedule", "1") != "0"
+    version = current_data_version()
+
+    def build():
+        candidates = candidates_for(user_id, schedule_filter=schedule_filter)
+        if candidates is None:
+            raise ApiError("User not found.", status=404)
+        snapshot = user_snapshot.current
+        rows = [
+            dict(api_user(snapshot.get(other_id)), shared_subjects=snapshot.subject_names(mask))
+            for other_id, mask in candidates
+            if other_id > after
+        ][:limit]
+        return page(rows, limit)
+
+    return conditional_json(version, build)
+
+@server.route(f"{API_PREFIX}/network")
+def api_network():
+    version = current_data_version()
+    schedule_filter = request.args.get("schedule", "1") != "0"
+
+    def build():
+        snapshot, rows, edges = compute_network(
+            list_param("location"),
+            list_param("subject"),
+            list_param("user_type"),
+            schedule_filter,
+            list_param("region"),
+        )
+        return {
+            "nodes": [api_user(snapshot.record(index)) for index in rows],
+            "edges": [
+                {
+                    "child_id": child_id,
+                    "scribe_id": scribe_id,
+                    "subjects": snapshot.subject_names(mask),
+                    "assistance": capability_labels(snapshot.capability_masks[snapshot.index_of(child_id)]),
+                }
+                for child_id, scribe_id, mask in edges
             ],
-            id="modal",
-            is_open=False,
-        ),
+        }
+
+    return conditional_json(version, build)
+
+# The location hierarchy, parents before children, with the registrations inside each node
+@server.route(f"{API_PREFIX}/locations")
+def api_locations():
+    def build():
+        tree, counts = location_tree(), location_counts()
+        return {
+            "data": [
+                {
+                    "path": path,
+                    "name": tree.names[path],
+                    "level": tree.levels[path],
+                    "depth": path_depth(path),
+                    "children": counts[path]["child"] if path in counts else 0,
+                    "scribes": counts[path]["scribe"] if path in counts else 0,
+                }
+                for path in tree.walk()
+            ]
+        }
+
+    return conditional_json(current_data_version(), build)
+
+@server.route(f"{API_PREFIX}/reports/unmatched-children")
+def api_unmatched_children():
+    export = request.args.get("format", "json")
+    if export not in ("json", "csv"):
+        raise ApiError("'format' must be 'json' or 'csv'.")
+    # Upcoming exams are judged from the start of the current hour, which also keys the ETag
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    locations = list_param("location")
+
+    def build():
+        rows = unmatched_children(now, locations)
+        return {"data": rows, "as_of": now.isoformat()}
+
+    if export == "csv":
+        return csv_response(report_csv(build()["data"]), "unmatched-children.csv")
+    return conditional_json(f"{current_data_version()}.{now:%Y%m%d%H}", build)
+
+@server.route(f"{API_PREFIX}/assignments")
+def api_assignments():
+    after, limit = page_params()
+
+    def fetch(shard):
+        return [
+            {
+                "id": assignment.id,
+                "child_id": assignment.child_id,
+                "scribe_id": assignment.scribe_id,
+                "assigned_at": assignment.assigned_at.isoformat(),
+            }
+            for assignment in Assignment.query.filter(Assignment.id > after)
+            .order_by(Assignment.id)
+            .limit(limit)
+        ]
+
+    def build():
+        rows = merge_sorted(shard_router.scatter(fetch), key=lambda row: row["id"], limit=limit)
+        return page(rows, limit)
+
+    return conditional_json(current_data_version(), build)
+
+# Archived users of past academic years, searched only when asked for:
+# ?q=<text> ranks matches like the live search; otherwise rows are paged by id.
+# ?academic_year= narrows either to one year.
+@server.route(f"{API_PREFIX}/archive/users")
+def api_archived_users():
+    after, limit = page_params()
+    query = request.args.get("q", "").strip()
+    try:
+        academic_year = int(request.args["academic_year"]) if request.args.get("academic_year") else None
+    except ValueError:
+        raise ApiError("'academic_year' must be an integer.")
+    fields = ["id", *API_USER_FIELDS[1:], "academic_year", "archived_at"]
+
+    def fetch(shard):
+        archived = db.session.query(*[getattr(ArchivedUser, field) for field in fields])
+        if academic_year is not None:
+            archived = archived.filter(ArchivedUser.academic_year == academic_year)
+        if not query:
+            archived = archived.filter(ArchivedUser.id > after).order_by(ArchivedUser.id).limit(limit)
+            return [row._asdict() for row in archived]
+        matches = search_users(db.session, query, limit=limit, table="user_archive", index="user_archive_search")
+        ranks = {match["id"]: match["rank"] for match in matches}
+        rows = [dict(row._asdict(), rank=ranks[row.id]) for row in archived.filter(ArchivedUser.id.in_(ranks))]
+        return sorted(rows, key=lambda row: row["rank"])
+
+    def build():
+        results = shard_router.scatter(fetch)
+        if query:
+            return {"data": merge_sorted(results, key=lambda row: row["rank"], limit=limit)}
+        return page(merge_sorted(results, key=lambda row: row["id"], limit=limit), limit)
+
+    # Archiving deletes from "user", which bumps the data version
+    return conditional_json(current_data_version(), build)
+
+# Change feed of user inserts, updates and deletes, oldest first. Pass the returned next_after
+# back as ?after= to continue; 410 means entries were compacted away and the consumer has to
+# re-read /users before following the feed again.
+@server.route(f"{API_PREFIX}/changes")
+def api_changes():
+    cursor = {shard_router.shard_for_id(seq): seq for seq in sequence_cursor()}
+    limit = limit_param()
+
+    def read(shard):
+        bounds = change_log_bounds(db.session)
+        if shard in cursor and cursor_expired(cursor[shard], bounds):
+            return bounds, None
+        after = cursor.get(shard, shard_router.shards[shard] * SHARD_ID_SPAN)
+        return bounds, fetch_changes(db.session, after, limit)
+
+    results = shard_router.scatter(read)
+    if any(rows is None for _, rows in results):
+        raise ApiError("'after' is older than the change log retention window.", status=410)
+
+    def build():
+        rows = merge_sorted(
+            [rows for _, rows in results], key=lambda row: (row["changed_at"], row["seq"]), limit=limit
+        )
+        last_seen = dict(cursor)
+        for row in rows:
+            last_seen[shard_router.shard_for_id(row["seq"])] = row["seq"]
+        next_after = ",".join(str(last_seen[shard]) for shard in shard_router.names if shard in last_seen)
+        return {
+            "data": rows,
+            "next_after": next_after or None,
+            "has_more": sum(len(rows) for _, rows in results) > len(rows)
+            or any(len(rows) == limit for _, rows in results),
+        }
+
+    # The log only changes by appending (last) or compacting (oldest)
+    version = ".".join(f"{oldest or 0}-{last}" for (oldest, last), _ in results)
+    return conditional_json(version, build)
+
+# Main Layout using Tabs; built per page load instead of at import
+def serve_layout():
+    return dbc.Container(
+        [
+            dcc.Location(id='url', refresh=False),
+            dbc.NavbarSimple(
+                brand="Scribe Matching Platform",
+                brand_href="/",
+                color="primary",
+                dark=True,
+                className="mb-4",
+            ),
+            dbc.Tabs(
+                [
+                    dbc.Tab(label="Child Registration", tab_id="child_registration"),
+                    dbc.Tab(label="Scribe Registration", tab_id="scribe_registration"),
+                    dbc.Tab(label="Update Registration", tab_id="update_registration"),
+                    dbc.Tab(label="Scribe Matching Network", tab_id="matching_network"),
+                    dbc.Tab(label="Registrations (Admin)", tab_id="admin_registrations"),
+                    dbc.Tab(label="Supply & Demand", tab_id="supply_demand"),
+                ],
+                id="tabs",
+                active_tab="child_registration",  # Set a default active tab
+            ),
+            html.Div(id="tab-content"),
+            # Modal for displaying match details
+            dbc.Modal(
+                [
+                    dbc.ModalHeader("Scribe Match Details"),
+                    dbc.ModalBody(id="modal-content"),
+                    dbc.ModalFooter(
+                        dbc.Button(
+                            "Close", id="close-modal", className="ml-auto", n_clicks=0
+                        ),
+                    ),
+                ],
+                id="modal",
+                is_open=False,
+            ),
+        ],
+        fluid=True,
+    )
+
+app.layout = serve_layout
+
+_startup_lock = threading.Lock()
+_started = False
+_workers_started = False
+
+# Application factory: the database work and optional layout bundles are deferred to here.
+# WSGI servers can point at "app:create_app()"; `flask --app app:create_app db ...` runs migrations.
+def create_app():
+    global _started
+    with _startup_lock:
+        if not _started:
+            from flask_migrate import Migrate  # Imports alembic; only needed once the app is built
+
+            Migrate(server, db)
+            if server.config["NETWORK_LAYOUT"] in CYTOSCAPE_EXTRA_LAYOUTS:
+                cyto.load_extra_layouts()
+            initialize_database()
+            _started = True
+    return server
+
+# Threads that serve the whole process. They start with its first request rather than in
+# create_app, so a server that builds the app and then forks workers (gunicorn --preload) runs
+# them in every worker instead of only in the parent.
+# Requests after the first see _workers_started set and skip the lock.
+def start_background_workers():
+    global _workers_started
+    warm_up.start()
+    if _workers_started:
+        return
+    with _startup_lock:  # Two first requests must not start a second thread
+        if not _workers_started:
+            if server.config["BACKGROUND_WORKERS"]:
+                notification_worker.start()
+                change_log_compactor.start()
+            _workers_started = True
+
+# Serving the module-level server directly still runs the startup before the first request
+@server.before_request
+def ensure_started():
+    if not _started:
+        create_app()
+    start_background_workers()
+
+# Tables whose indexes the matching, search and admin paths read on every request
+HOT_TABLES = [
+    model.__table__.name
+    for model in (User, UserSubject, Assignment, ExamSession, AvailabilityWindow, UnmatchedChild, NameBand, DemandSupplyCount)
+]
+
+# Warm-up steps, run once per process before /readyz reports ready
+def warm_snapshot():
+    snapshot = user_snapshot.current
+    schedule_index.sessions(None)  # Loads the index
+    locations, subjects = snapshot.facets()
+    return {"users": len(snapshot), "locations": len(locations), "subjects": len(subjects)}
+
+# The network tab opens on all locations, subjects and user types with the schedule filter on
+def warm_network():
+    return {"mode": load_network_elements(["schedule"])["mode"]}
+
+def warm_indexes():
+    return dict(zip(shard_router.names, shard_router.scatter(lambda shard: touch_indexes(db.session, HOT_TABLES))))
+
+# Dash encodes responses with plotly's encoder, which uses orjson when it is installed; orjson loads
+# numpy (where numpy happens to be installed) on the first value it cannot encode natively, and two
+# threads doing that at once crash the process. Neither package is a requirement of the app. Encoding the layout once before requests run side by side does it on one thread.
+def encode_layout():
+    return {"bytes": len(to_json_plotly(serve_layout()))}
+
+# The first requests for the layout and callback map serialise them; later ones are cached by Dash
+def warm_layout():
+    client = server.test_client()
+    return {path: client.get(path).status_code for path in ("/_dash-layout", "/_dash-dependencies")}
+
+def probe_database(samples=5):
+    return dict(zip(shard_router.names, shard_router.scatter(lambda shard: latency_probe(db.session, samples))))
+
+warm_up = WarmUp(
+    [
+        ("snapshot", warm_snapshot),
+        ("network", warm_network),
+        ("indexes", warm_indexes),
+        ("layout", warm_layout),
+        ("database", probe_database),
     ],
-    fluid=True,
+    context=lambda: server.app_context(),
+    prepare=[("encoder", encode_layout)],
 )
 
+# Liveness: the process is up and serving requests
+@server.route("/healthz")
+def healthz():
+    response = jsonify({"status": "ok"})
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+# Readiness: warm-up has finished and the database still answers quickly
+@server.route("/readyz")
+def readyz():
+    status = warm_up.status()
+    code = 200 if warm_up.ready else 503
+    if warm_up.ready:
+        try:
+            status["database"] = probe_database(samples=1)
+        except Exception as error:
+            status.update(status="unavailable", error=str(error))
+            code = 503
+        else:
+            limit = server.config["READY_MAX_DB_LATENCY_MS"]
+            if any(probe["max_ms"] > limit for probe in status["database"].values()):
+                status["status"] = "slow"
+                code = 503
+    response = jsonify(status)
+    response.status_code = code
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
 # Running the server
 if __name__ == "__main__":
-    # Run the app with Flask-Migrate support
-    # Ensure that you've initialized and applied migrations as per the steps below.
+    create_app()
+    start_background_workers()
     app.run(use_reloader=False, debug=True, host="0.0.0.0", port=8050)
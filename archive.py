@@ -0,0 +1,86 @@
+from sqlalchemy import bindparam, text
+
+
+# Academic year (by its starting calendar year) that a moment falls in
+def academic_year_of(moment, start_month):
+    return moment.year if moment.month >= start_month else moment.year - 1
+
+
+# Rows moved along with archived users: (live table, archive table, condition on :user_ids)
+ARCHIVED_TABLES = (
+    ("user", "user_archive", "id IN :user_ids"),
+    ("certificate_status", "certificate_status_archive", "user_id IN :user_ids"),
+    ("assignment", "assignment_archive", "child_id IN :user_ids OR scribe_id IN :user_ids"),
+)
+
+# Rows only needed while a user takes part in matching; deleted, not archived.
+# Dependent tables come before "user", which is deleted last.
+DROPPED_TABLES = (
+    ("exam_session", "child_id IN :user_ids"),
+    ("availability_window", "scribe_id IN :user_ids"),
+    ("user_subject", "user_id IN :user_ids"),
+    ("unmatched_child", "child_id IN :user_ids"),
+    ("outbox_message", "recipient_id IN :user_ids"),
+    ("name_band", "user_id IN :user_ids"),
+    ("duplicate_candidate", "user_id IN :user_ids OR duplicate_of_id IN :user_ids"),
+    ("certificate_status", "user_id IN :user_ids"),
+    ("assignment", "child_id IN :user_ids OR scribe_id IN :user_ids"),
+    ("user", "id IN :user_ids"),
+)
+
+
+# Add academic_year to a user table created before it existed; existing users are placed
+# in 'default_year'
+def ensure_academic_year(engine, default_year):
+    with engine.begin() as connection:
+        columns = {row[1] for row in connection.execute(text("PRAGMA table_info(user)"))}
+        if "academic_year" not in columns:
+            connection.execute(
+                text(f"ALTER TABLE user ADD COLUMN academic_year INTEGER NOT NULL DEFAULT {int(default_year)}")
+            )
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_user_academic_year ON user (academic_year, id)"))
+
+
+def _statement(sql):
+    return text(sql).bindparams(bindparam("user_ids", expanding=True))
+
+
+def _archived_columns(session, table):
+    return [row[1] for row in session.execute(text(f"PRAGMA table_info({table})")) if row[1] != "archived_at"]
+
+
+# Next batch of users registered before 'before_year', with the fields their counts depend on
+def users_to_archive(session, before_year, batch_size):
+    rows = session.execute(
+        text(
+            "SELECT id, user_type, location, subject, class_level, capability_mask, withdrawn FROM user "
+            "WHERE academic_year < :before_year ORDER BY academic_year, id LIMIT :limit"
+        ),
+        {"before_year": before_year, "limit": batch_size},
+    )
+    return [tuple(row) for row in rows]
+
+
+# Copy the users (with certificates, certificate status and assignments) to the archive tables
+# and remove them from the live ones. Their change log entries read 'archive' rather than
+# 'delete'. The caller adjusts aggregates and commits.
+def archive_users(session, user_ids, archived_at):
+    if not user_ids:
+        return
+    params = {"user_ids": list(user_ids)}
+    for table, archive_table, condition in ARCHIVED_TABLES:
+        columns = ", ".join(_archived_columns(session, archive_table))
+        session.execute(
+            _statement(
+                f"INSERT OR REPLACE INTO {archive_table} ({columns}, archived_at) "
+                f"SELECT {columns}, :archived_at FROM {table} WHERE {condition}"
+            ),
+            dict(params, archived_at=archived_at),
+        )
+    last_seq = session.execute(text("SELECT COALESCE(MAX(seq), 0) FROM user_change")).scalar()
+    for table, condition in DROPPED_TABLES:
+        session.execute(_statement(f"DELETE FROM {table} WHERE {condition}"), params)
+    session.execute(
+        text("UPDATE user_change SET operation = 'archive' WHERE seq > :last_seq AND operation = 'delete'"),
+        {"last_seq": last_seq},
+    )
@@ -0,0 +1,94 @@
+// Client-side filtering for the matching network (see load_network_elements in app.py)
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    network: {
+        // Returns [elements, autoRefreshLayout, diff base, server query]. With the full graph in the
+        // browser, the elements matching the filters are shown without a request; otherwise the
+        // filters go to the server. Elements set here are not a base the server can patch.
+        filter_elements: function (regions, subjects, userTypes, full, schedule) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (!full) {
+                return [noUpdate, noUpdate, noUpdate, noUpdate];
+            }
+            if (full.mode !== "client") {
+                return [
+                    noUpdate,
+                    noUpdate,
+                    noUpdate,
+                    {regions: regions, subjects: subjects, user_types: userTypes, schedule: schedule},
+                ];
+            }
+
+            // Same rules as compute_network: empty filters mean "all", unknown values match nothing
+            const codes = function (values, table, normalise) {
+                if (!values || values.length === 0) {
+                    return null;
+                }
+                return new Set(values.map((value) => table[normalise(value)]).filter((code) => code !== undefined));
+            };
+            // Regions are location hierarchy paths; a location is inside one when its path starts with it
+            let locationCodes = null;
+            if (regions && regions.length > 0) {
+                locationCodes = new Set();
+                full.location_paths.forEach(function (path, code) {
+                    if (path && regions.some((region) => path.startsWith(region))) {
+                        locationCodes.add(code);
+                    }
+                });
+            }
+            const subjectCodes = codes(subjects, full.subjects, (value) => value.trim().toLowerCase());
+            const types = new Set(userTypes && userTypes.length ? userTypes : ["child", "scribe"]);
+
+            const visible = new Set();
+            const nodes = full.elements.filter(function (element) {
+                const data = element.data;
+                if (data.source !== undefined) {
+                    return false;
+                }
+                const shown =
+                    types.has(data.type) &&
+                    (locationCodes === null || locationCodes.has(data.loc)) &&
+                    (subjectCodes === null || data.subj.some((code) => subjectCodes.has(code)));
+                if (shown) {
+                    visible.add(data.id);
+                }
+                return shown;
+            });
+            const edges = full.elements.filter(
+                (element) =>
+                    element.data.source !== undefined &&
+                    visible.has(element.data.source) &&
+                    visible.has(element.data.target)
+            );
+            return [nodes.concat(edges), true, null, noUpdate];
+        },
+
+        // After a server patch (see update_matching_network in app.py) the layout is not re-run,
+        // so the nodes it added are laid out on their own in a band below the existing graph
+        place_added: function (base) {
+            const noUpdate = window.dash_clientside.no_update;
+            const ids = base && base.added_nodes;
+            if (!ids || ids.length === 0 || !window.cy) {
+                return noUpdate;
+            }
+            // The patched elements reach Cytoscape in the same render as this store update
+            setTimeout(function () {
+                const cy = window.cy; // Set by dash-cytoscape for the graph on the page
+                const added = cy.collection(ids.map((id) => cy.getElementById(id)).filter((node) => node.nonempty()));
+                if (added.empty()) {
+                    return;
+                }
+                const existing = cy.nodes().difference(added);
+                const box = existing.nonempty() ? existing.boundingBox() : {x1: 0, y2: 0, w: cy.width()};
+                added
+                    .layout({
+                        name: "grid",
+                        fit: false,
+                        animate: false,
+                        boundingBox: {x1: box.x1, y1: box.y2 + 60, w: Math.max(box.w, 200), h: 120},
+                    })
+                    .run();
+            }, 0);
+            return noUpdate;
+        },
+    },
+});
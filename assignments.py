@@ -0,0 +1,110 @@
+from collections import defaultdict, deque
+
+from sqlalchemy import text
+
+
+# Shortest augmenting path from an unassigned child, as the (child_id, scribe_id) moves that apply
+# it: the child takes an eligible scribe, and any child displaced on the way moves on to another of
+# its eligible scribes, ending at a scribe with room. Breadth-first search keeps the number of
+# already assigned children that move to a minimum. Returns None when no path is found within
+# 'max_visits' children.
+#   scribes_for(child_id) -> eligible scribe ids
+#   children_of(scribe_id) -> ids of the children currently assigned to the scribe
+def path_from_child(child_id, scribes_for, children_of, capacity, max_visits):
+    parent = {child_id: None}  # Child -> (child taking its scribe, that scribe)
+    seen_scribes = set()
+    queue = deque([child_id])
+    while queue and max_visits > 0:
+        max_visits -= 1
+        child = queue.popleft()
+        for scribe in scribes_for(child):
+            if scribe in seen_scribes:
+                continue
+            seen_scribes.add(scribe)
+            holders = children_of(scribe)
+            if len(holders) < capacity:
+                moves = [(child, scribe)]
+                while parent[child] is not None:
+                    child, scribe = parent[child]
+                    moves.append((child, scribe))
+                return moves
+            for holder in holders:
+                if holder not in parent:
+                    parent[holder] = (child, scribe)
+                    queue.append(holder)
+    return None
+
+
+# Shortest augmenting path from a scribe with room to an unassigned child: assigned children on
+# the way move to the scribe before them, freeing their own for the next. Same moves, limits and
+# result as path_from_child.
+#   children_for(scribe_id) -> eligible child ids
+#   scribe_of(child_id) -> id of the child's current scribe, or None
+def path_from_scribe(scribe_id, children_for, scribe_of, max_visits):
+    parent = {scribe_id: None}  # Scribe -> (child leaving it, scribe the child moves to)
+    seen_children = set()
+    queue = deque([scribe_id])
+    while queue and max_visits > 0:
+        scribe = queue.popleft()
+        for child in children_for(scribe):
+            if child in seen_children:
+                continue
+            seen_children.add(child)
+            max_visits -= 1
+            current = scribe_of(child)
+            if current is None:
+                moves = [(child, scribe)]
+                while parent[scribe] is not None:
+                    child, scribe = parent[scribe]
+                    moves.append((child, scribe))
+                return moves
+            if current not in parent:
+                parent[current] = (child, scribe)
+                queue.append(current)
+    return None
+
+
+# In-memory copy of the assignment within the locations being repaired, so a search does not
+# query the database for every child it visits; 'moves' collects the changes to write back
+class AssignmentMap:
+    def __init__(self, pairs, capacity):
+        self.capacity = capacity
+        self.scribe_by_child = {}
+        self.children_by_scribe = defaultdict(list)
+        self.moves = {}
+        for child_id, scribe_id in pairs:
+            self.scribe_by_child[child_id] = scribe_id
+            self.children_by_scribe[scribe_id].append(child_id)
+
+    def scribe_of(self, child_id):
+        return self.scribe_by_child.get(child_id)
+
+    def children_of(self, scribe_id):
+        return self.children_by_scribe.get(scribe_id, [])
+
+    def has_room(self, scribe_id):
+        return len(self.children_of(scribe_id)) < self.capacity
+
+    def release(self, child_id):
+        scribe_id = self.scribe_by_child.pop(child_id, None)
+        if scribe_id is not None:
+            self.children_by_scribe[scribe_id].remove(child_id)
+
+    def apply(self, moves):
+        for child_id, scribe_id in moves:
+            self.release(child_id)
+            self.scribe_by_child[child_id] = scribe_id
+            self.children_by_scribe[scribe_id].append(child_id)
+            self.moves[child_id] = scribe_id
+        return len(moves)
+
+
+# Add the withdrawn flag to user tables created before it existed
+def ensure_withdrawn_column(engine):
+    with engine.begin() as connection:
+        for table in ("user", "user_archive"):
+            columns = {row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))}
+            if columns and "withdrawn" not in columns:
+                connection.execute(
+                    text(f"ALTER TABLE {table} ADD COLUMN withdrawn BOOLEAN NOT NULL DEFAULT 0")
+                )
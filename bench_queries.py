@@ -0,0 +1,220 @@
+# Count the SQL statements each Dash callback issues in a typical session and fail when one
+# exceeds its budget or repeats a statement often enough to look like an N+1 pattern:
+#   python bench_queries.py --users 200 --verbose
+# Runs against a new database in a temporary directory. tests/test_query_budgets.py runs the same
+# session under pytest, so the budgets are enforced with the rest of the test suite.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from dash_client import callback_payload, network_filter_payload, registration_payload, tap_edge_payload
+
+# Most statements each callback may issue, with every shard in one database. The counts do not
+# depend on how many users are registered, so each budget is the exact count with no headroom:
+# any added statement fails the check, and the change that needs it raises the budget with it.
+QUERY_BUDGETS = {
+    "handle_registration": 17,
+    "fetch_user_details": 2,
+    "update_user": 22,
+    "render_tab_content (network)": 6,
+    "load_network_elements": 2,
+    "update_matching_network": 1,
+    "toggle_modal": 2,
+    "show_search_results": 1,
+    "render_tab_content (admin)": 0,
+    "update_admin_table": 1,
+    "update_analytics_heatmap": 1,
+    "update_unmatched_table": 1,
+}
+
+LOCATIONS = ["Pune", "Mumbai", "Nagpur", "Chicago"]
+SUBJECTS = ["Mathematics", "Science", "English", "History"]
+# Codes from capabilities.SCRIBE_SKILLS, so the masks differ and the capability test rules pairs out
+CHILD_NEEDS = [[], ["amanuensis"], ["amanuensis", "interpreter"], ["computer_use"]]
+SCRIBE_SKILLS = [["amanuensis"], ["interpreter"], ["computer_use", "interpreter"]]
+
+
+# Register 'count' children and scribes spread over a few locations, outside any trace; scribes are
+# in a lower class than the children, so pairs that share a subject are matched on capabilities
+def seed_users(register_user, count):
+    for number in range(count):
+        user_type = "child" if number % 2 else "scribe"
+        register_user(
+            user_type,
+            f"Seed {user_type.capitalize()} {number}",
+            f"seed{number}@example.com",
+            LOCATIONS[number // 2 % len(LOCATIONS)],  # Each child next to the scribe before it
+            "14" if user_type == "child" else "Seed School",
+            ", ".join(SUBJECTS[number % len(SUBJECTS) : number % len(SUBJECTS) + 2]),
+            10 if user_type == "child" else 8,
+            "B" if user_type == "child" else None,
+            [],
+            CHILD_NEEDS[number // 2 % len(CHILD_NEEDS)] if user_type == "child" else [],
+            None,
+            SCRIBE_SKILLS[number // 2 % len(SCRIBE_SKILLS)] if user_type == "scribe" else None,
+        )
+
+
+# Submit of the update form for the traced scribe
+def update_payload(withdrawn=False):
+    state = [
+        ("update_user_type", "value", "scribe"),
+        ("update_email", "value", "traced@example.com"),
+        ("update_name", "value", "Traced Scribe"),
+        ("update_location", "value", LOCATIONS[0]),
+        ("update_extra", "value", "Traced School"),
+        ("update_subject", "value", f"{SUBJECTS[0]}, {SUBJECTS[1]}"),
+        ("update_class_level", "value", 10),
+        ("update_category_of_disability", "value", None),
+        ("update_disabilities", "value", None),
+        ("update_assistance", "value", None),
+        ("update_certificate", "contents", None),
+        ("update_schedule", "value", ""),
+        ("update_skills", "value", ["amanuensis", "interpreter"]),
+        ("update_withdrawn", "value", ["withdrawn"] if withdrawn else []),
+    ]
+    return callback_payload([("update_confirmation", "children")], [("update_button", "n_clicks", 1)], state=state)
+
+
+# (label, payload) for each callback, in the order a coordinator would trigger them; the
+# registration comes first so the later reads do not find their caches already warm
+def session_payloads(edge_for):
+    registration = {
+        "name": "Traced Scribe",
+        "email": "traced@example.com",
+        "location": LOCATIONS[0],
+        "extra": "Traced School",
+        "subject": SUBJECTS[0],
+        "class_level": 10,
+        "skills": ["amanuensis", "interpreter"],
+    }
+    yield "handle_registration", registration_payload("scribe", registration)
+    yield "fetch_user_details", callback_payload(
+        [("update_fetch_alert", "children"), ("update_form_content", "children")],
+        [("update_fetch", "n_clicks", 1)],
+        state=[("update_user_type", "value", "scribe"), ("update_email", "value", "traced@example.com")],
+    )
+    yield "update_user", update_payload()
+    yield "render_tab_content (network)", callback_payload(
+        [("tab-content", "children")], [("tabs", "active_tab", "matching_network")]
+    )
+    yield "load_network_elements", callback_payload(
+        [("network_full_elements", "data")], [("schedule_filter", "value", ["schedule"])]
+    )
+    yield "update_matching_network", network_filter_payload([], [])
+    yield "toggle_modal", tap_edge_payload(edge_for())
+    yield "show_search_results", callback_payload(
+        [("user_search_results", "children")], [("user_search", "value", "seed")]
+    )
+    yield "render_tab_content (admin)", callback_payload(
+        [("tab-content", "children")], [("tabs", "active_tab", "admin_registrations")]
+    )
+    yield "update_admin_table", callback_payload(
+        [("admin_table", "data"), ("admin_table", "page_count"), ("admin_table_cursors", "data")],
+        [
+            ("admin_table", "page_current", 0),
+            ("admin_table", "page_size", 25),
+            ("admin_table", "sort_by", []),
+            ("admin_table", "filter_query", ""),
+        ],
+        state=[("admin_table_cursors", "data", None)],
+    )
+    yield "update_analytics_heatmap", callback_payload(
+        [("analytics_heatmap", "figure")],
+        [("analytics_class_level", "value", None), ("analytics_metric", "value", "unserved_children")],
+    )
+    yield "update_unmatched_table", callback_payload(
+        [("unmatched_table", "data")], [("analytics_class_level", "value", None)]
+    )
+
+
+# Withdrawing a user must move the data version, or the API answers 304 with the old record and
+# the cached network views keep showing them. Returns a failure message, or None.
+def check_withdrawal(client, user_id):
+    path = f"/api/v1/users/{user_id}"
+    etag = client.get(path).headers["ETag"]
+    client.post("/_dash-update-component", json=update_payload(withdrawn=True))
+    response = client.get(path, headers={"If-None-Match": etag})
+    if response.status_code != 200 or not response.get_json()["withdrawn"]:
+        return f"withdrawal did not change the data version ({path} answered {response.status_code})"
+    return None
+
+
+def measure(users):
+    from app import User, create_app, db, register_user, server, shard_router, warm_up
+    from sqltrace import QueryTracer
+
+    server.config["BACKGROUND_WORKERS"] = False  # No notifications from the traced session
+    create_app()
+    client = server.test_client()
+    with server.app_context():
+        seed_users(register_user, users)
+        engines = list(db.engines.values())
+    # Let the warm-up finish first; its statements run on its own thread and are not traced anyway
+    client.get("/healthz")
+    while warm_up.state == "warming":
+        time.sleep(0.05)
+
+    tracer = QueryTracer(engines)
+    tracer.install()
+    traces = {}
+    edges = []
+
+    def edge_for():
+        return edges[0] if edges else {}
+
+    try:
+        for label, payload in session_payloads(edge_for):
+            with tracer.trace() as trace:
+                response = client.post("/_dash-update-component", json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"{label} failed with status {response.status_code}")
+            if label == "update_matching_network":
+                elements = response.get_json()["response"]["matching-network"]["elements"]
+                edges.extend(element["data"] for element in elements if "source" in element["data"])
+            traces[label] = trace
+    finally:
+        tracer.remove()
+    with server.app_context(), shard_router.use(shard_router.shard_for(LOCATIONS[0])):
+        user_id = User.query.filter_by(email="traced@example.com").one().id
+    return traces, check_withdrawal(client, user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the SQL statements each Dash callback issues.")
+    parser.add_argument("--users", type=int, default=100, help="registrations to seed before tracing")
+    parser.add_argument("--repeat-threshold", type=int, default=5, help="runs of one statement flagged as N+1")
+    parser.add_argument("--verbose", action="store_true", help="print every traced statement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-queries-") as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'queries.db')}"
+        traces, consistency_failure = measure(args.users)
+
+    failures = []
+    if consistency_failure:
+        print(consistency_failure)
+        failures.append("withdrawal")
+    print(f"{'callback':32}{'queries':>8}{'budget':>8}{'rows':>8}{'ms':>9}")
+    for label, trace in traces.items():
+        budget = QUERY_BUDGETS[label]
+        over = len(trace) > budget
+        print(
+            f"{label:32}{len(trace):8}{budget:8}{trace.rows:8}{trace.seconds * 1000:9.2f}"
+            + ("  OVER BUDGET" if over else "")
+        )
+        if over:
+            failures.append(label)
+        for count, statement in trace.repeated(args.repeat_threshold):
+            print(f"    possible N+1: {count} x {statement[:120]}")
+            failures.append(f"{label} (N+1)")
+        if args.verbose:
+            for record in trace.statements:
+                print(f"    {record.seconds * 1000:7.2f} ms {record.rows:6} rows  {record.statement[:110]}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Measure cold-start cost and fail when it exceeds the budgets:
+#   - import time of app.py, which must not touch the database
+#   - time to first request (index page and layout), on a new and on an existing database
+#   python bench_startup.py --runs 5 --import-budget 2.5 --first-request-budget 4.0
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+IMPORT_PROBE = """
+import json, os, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "database_created": os.path.exists(sys.argv[1])}))
+"""
+
+FIRST_REQUEST_PROBE = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+client = create_app().test_client()
+index = client.get("/")
+layout = client.get("/_dash-layout")
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "status": [index.status_code, layout.status_code]}))
+"""
+
+
+# Run a probe in a fresh interpreter so nothing is already imported or cached in-process
+def run_probe(probe, database):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    result = subprocess.run(
+        [sys.executable, "-c", probe, database],
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(runs):
+    imports, cold, warm = [], [], []
+    touched_database = False
+    for run in range(runs):
+        with tempfile.TemporaryDirectory(prefix="bench-startup-") as directory:
+            database = os.path.join(directory, "startup.db")
+            probe = run_probe(IMPORT_PROBE, database)
+            imports.append(probe["seconds"])
+            touched_database |= probe["database_created"]
+            for samples in (cold, warm):  # New database first, then the one it left behind
+                probe = run_probe(FIRST_REQUEST_PROBE, database)
+                if probe["status"] != [200, 200]:
+                    raise RuntimeError(f"first request failed with status {probe['status']}")
+                samples.append(probe["seconds"])
+    return {
+        "import": statistics.median(imports),
+        "first_request_new_database": statistics.median(cold),
+        "first_request_existing_database": statistics.median(warm),
+    }, touched_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time to first request.")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement (median reported)")
+    parser.add_argument("--import-budget", type=float, default=2.5, help="seconds allowed for importing app.py")
+    parser.add_argument("--first-request-budget", type=float, default=4.0, help="seconds allowed until the first page is served")
+    args = parser.parse_args()
+
+    timings, touched_database = measure(args.runs)
+    budgets = {
+        "import": args.import_budget,
+        "first_request_new_database": args.first_request_budget,
+        "first_request_existing_database": args.first_request_budget,
+    }
+    failures = []
+    for name, seconds in timings.items():
+        within = seconds <= budgets[name]
+        print(f"{name:34}{seconds:8.3f}s  (budget {budgets[name]:.1f}s){'' if within else '  OVER BUDGET'}")
+        if not within:
+            failures.append(name)
+    if touched_database:
+        print("importing app.py created the database; startup work must wait for create_app()")
+        failures.append("import_database_access")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
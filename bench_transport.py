@@ -0,0 +1,89 @@
+# Measure bytes transferred for a typical network-tab session, with and without compression
+# and on a repeat visit where immutable assets come from the browser cache.
+#   python bench_transport.py
+# Runs against a new database (with the sample users) in a temporary directory.
+import gzip
+import json
+import os
+import re
+import tempfile
+
+from dash_client import network_filter_payload, network_session_payloads
+
+ASSET_PATTERN = re.compile(r'(?:src|href)="(/(?:_dash-component-suites|assets)/[^"]+)"')
+
+
+def decoded(response):
+    data = response.get_data()
+    if response.headers.get("Content-Encoding") == "gzip":
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+def cacheable(response):
+    return "immutable" in response.headers.get("Cache-Control", "")
+
+
+def run_session(client, accept_encoding, cache=None):
+    from app import location_tree, user_snapshot
+
+    headers = {"Accept-Encoding": accept_encoding}
+    transferred = {}
+
+    def record(label, response):
+        transferred[label] = transferred.get(label, 0) + len(response.get_data())
+
+    index = client.get("/", headers=headers)
+    record("index", index)
+    for path in ASSET_PATTERN.findall(decoded(index)):
+        if cache is not None and path in cache:
+            continue  # Served from the browser cache without a request
+        response = client.get(path, headers=headers)
+        record("assets", response)
+        if cache is not None and cacheable(response):
+            cache.add(path)
+    for path in ("/_dash-layout", "/_dash-dependencies"):
+        record("layout", client.get(path, headers=headers))
+
+    regions, (_, subjects) = location_tree().roots(), user_snapshot.current.facets()
+    elements = None
+    for label, payload in network_session_payloads(regions, subjects):
+        response = client.post("/_dash-update-component", json=payload, headers=headers)
+        record(label, response)
+        if label == "update_matching_network":
+            elements = json.loads(decoded(response))["response"]
+    # A small filter edit afterwards (one region fewer) is answered with a patch
+    payload = network_filter_payload(regions[1:], subjects, base=elements["network_diff_base"]["data"])
+    record("update_matching_network (edit)", client.post("/_dash-update-component", json=payload, headers=headers))
+    edge = None
+    for element in elements["matching-network"]["elements"]:
+        if "source" in element["data"]:
+            edge = element["data"]
+            break
+    if edge is not None:
+        label, payload = network_session_payloads(regions, subjects, edge)[-1]
+        record(label, client.post("/_dash-update-component", json=payload, headers=headers))
+    return transferred
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="bench-transport-") as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'transport.db')}"
+        from app import create_app
+
+        client = create_app().test_client()
+        cache = set()
+        results = {
+            "identity": run_session(client, "identity"),
+            "gzip": run_session(client, "gzip", cache),
+            "gzip, repeat visit": run_session(client, "gzip", cache),
+        }
+    labels = sorted({label for result in results.values() for label in result})
+    print(f"{'request':28}" + "".join(f"{name:>20}" for name in results))
+    for label in labels:
+        print(f"{label:28}" + "".join(f"{result.get(label, 0):>20,}" for result in results.values()))
+    print(f"{'total':28}" + "".join(f"{sum(result.values()):>20,}" for result in results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from sqlalchemy import text
+
+from snapshot import split_subjects
+
+# Assistance a scribe can provide, in bit order; only append, as masks are stored per user.
+# The values match the children's "Assistance Needed" options; the other options there
+# (extra time, seating) are arranged by the exam centre and are not asked of the scribe.
+SCRIBE_SKILLS = (
+    ("amanuensis", "Amanuensis/Reader/Lab Assistant"),
+    ("computer_use", "Use of Computer with Adaptations"),
+    ("interpreter", "Interpreter for Sign Language"),
+    ("care_giver", "Care Giver Support"),
+)
+SKILL_BITS = {code: 1 << bit for bit, (code, _) in enumerate(SCRIBE_SKILLS)}
+SKILL_OPTIONS = [{"label": label, "value": code} for code, label in SCRIBE_SKILLS]
+
+# Reading and writing for the child is what every scribe does
+BASE_SKILLS = SKILL_BITS["amanuensis"]
+
+# Free-text needs recorded before the checklist existed
+NEED_ALIASES = {
+    "writing assistance": "amanuensis",
+    "reading aloud": "amanuensis",
+    "sign language": "interpreter",
+}
+
+
+# Needs a scribe must cover, from a child's assistance_needed text
+def needs_mask(assistance_needed):
+    mask = 0
+    for value in split_subjects(assistance_needed):
+        mask |= SKILL_BITS.get(NEED_ALIASES.get(value.lower(), value), 0)
+    return mask
+
+
+def skills_mask(skills):
+    mask = BASE_SKILLS
+    for value in split_subjects(skills):
+        mask |= SKILL_BITS.get(value, 0)
+    return mask
+
+
+# Bitmask stored with each user: needs for children, skills for scribes
+def capability_mask(user_type, assistance_needed, skills):
+    if user_type == "child":
+        return needs_mask(assistance_needed)
+    if user_type == "scribe":
+        return skills_mask(skills)
+    return 0
+
+
+# True when the scribe's skills include every need of the child
+def covers(needs, skills):
+    return not needs & ~skills
+
+
+def capability_labels(mask):
+    return [label for bit, (_, label) in enumerate(SCRIBE_SKILLS) if mask >> bit & 1]
+
+
+# Add the skills and capability_mask columns to user tables created before they existed,
+# and encode the masks of the users already there
+def ensure_capability_columns(engine):
+    with engine.begin() as connection:
+        for table in ("user", "user_archive"):
+            columns = {row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))}
+            if not columns or "capability_mask" in columns:
+                continue
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN skills VARCHAR(200)"))
+            connection.execute(
+                text(f"ALTER TABLE {table} ADD COLUMN capability_mask INTEGER NOT NULL DEFAULT 0")
+            )
+            rows = connection.execute(
+                text(f"SELECT id, user_type, assistance_needed, skills FROM {table}")
+            ).all()
+            if not rows:
+                continue
+            connection.execute(
+                text(f"UPDATE {table} SET capability_mask = :mask WHERE id = :id"),
+                [
+                    {"id": user_id, "mask": capability_mask(user_type, assistance_needed, skills)}
+                    for user_id, user_type, assistance_needed, skills in rows
+                ],
+            )
@@ -0,0 +1,137 @@
+import base64
+import io
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, UnidentifiedImageError
+
+# Limits applied while normalising uploaded certificates
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_IMAGE_SIDE = 1600  # Longest side kept for stored images
+JPEG_QUALITY = 80
+THUMBNAIL_SIZE = (160, 160)
+
+PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+# Detect the file type from its leading bytes instead of trusting the browser
+def sniff_content_type(data):
+    if data.startswith(b"%PDF-"):
+        return "application/pdf"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    return None
+
+
+def _rejected(reason, original_size):
+    return {
+        "status": "rejected",
+        "reason": reason,
+        "original_size": original_size,
+    }
+
+
+def _encode_jpeg(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+# Runs inside a worker process: decode, validate, recompress and thumbnail one upload
+def process_certificate(content_string):
+    try:
+        data = base64.b64decode(content_string, validate=True)
+    except (ValueError, TypeError):
+        return _rejected("The uploaded file could not be decoded.", 0)
+
+    original_size = len(data)
+    if original_size == 0:
+        return _rejected("The uploaded file is empty.", original_size)
+    if original_size > MAX_UPLOAD_BYTES:
+        return _rejected("The uploaded file is larger than 10 MB.", original_size)
+
+    content_type = sniff_content_type(data)
+    if content_type is None:
+        return _rejected("Only PDF, PNG and JPEG certificates are accepted.", original_size)
+
+    if content_type == "application/pdf":
+        # PDFs are stored as uploaded; only the page count is extracted
+        return {
+            "status": "ready",
+            "content_type": content_type,
+            "data": data,
+            "thumbnail": None,
+            "page_count": len(PDF_PAGE_PATTERN.findall(data)) or 1,
+            "width": None,
+            "height": None,
+            "original_size": original_size,
+        }
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError):
+        return _rejected("The uploaded image is corrupt or unreadable.", original_size)
+
+    image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    normalized = _encode_jpeg(image)
+    # Keep the original bytes when recompression would not make them smaller
+    if len(normalized) >= original_size and content_type == "image/jpeg":
+        normalized = data
+
+    preview = image.copy()
+    preview.thumbnail(THUMBNAIL_SIZE)
+
+    return {
+        "status": "ready",
+        "content_type": "image/jpeg",
+        "data": normalized,
+        "thumbnail": _encode_jpeg(preview),
+        "page_count": 1,
+        "width": image.width,
+        "height": image.height,
+        "original_size": original_size,
+    }
+
+
+# Background pipeline that hands uploads to a process pool and reports results
+class CertificatePipeline:
+    def __init__(self, on_result, max_workers=None):
+        self.on_result = on_result
+        self.max_workers = max_workers
+        self._executor = None
+
+    def _get_executor(self):
+        # The pool is created lazily so importing the app does not fork workers
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, user_id, version, content_string):
+        future = self._get_executor().submit(process_certificate, content_string)
+        future.add_done_callback(
+            lambda done: self._deliver(user_id, version, done)
+        )
+        return future
+
+    def _deliver(self, user_id, version, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = _rejected(f"Certificate processing failed: {e}", 0)
+        self.on_result(user_id, version, result)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Split a dcc.Upload "data:<type>;base64,<payload>" string into its payload
+def upload_payload(contents):
+    if not contents or "," not in contents:
+        return None
+    return contents.split(",", 1)[1]
@@ -0,0 +1,158 @@
+import json
+import threading
+
+from sqlalchemy import text
+
+# User columns recorded in the change log; the same ones the public API exposes
+CHANGE_FIELDS = (
+    "user_type",
+    "name",
+    "location",
+    "age_or_school",
+    "subject",
+    "class_level",
+    "category_of_disability",
+    "disabilities",
+    "assistance_needed",
+    "skills",
+    "withdrawn",
+)
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"  # UTC, sortable as text
+
+
+# JSON object of the row's values; with only_changed, just the fields an UPDATE changed
+def _fields_json(only_changed):
+    selects = " UNION ALL ".join(
+        f"SELECT '{field}' AS field, NEW.{field} AS value"
+        + (f" WHERE OLD.{field} IS NOT NEW.{field}" if only_changed else "")
+        for field in CHANGE_FIELDS
+    )
+    return f"(SELECT json_group_object(field, value) FROM ({selects}))"
+
+
+def _log_change(row, operation, fields):
+    return (
+        "INSERT INTO user_change (user_id, operation, changed_fields, changed_at) "
+        f"VALUES ({row}.id, '{operation}', {fields}, {NOW});"
+    )
+
+
+# Append-only log of user mutations, written by triggers in the transaction that makes them.
+# AUTOINCREMENT keeps sequence numbers increasing even after compaction deletes old entries.
+CHANGE_LOG_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS user_change ("
+    "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "user_id INTEGER NOT NULL, "
+    "operation TEXT NOT NULL, "  # 'insert', 'update' or 'delete'
+    "changed_fields TEXT, "  # JSON object of new values; NULL for deletes
+    "changed_at TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_user_change_changed_at ON user_change (changed_at)",
+    "CREATE TRIGGER IF NOT EXISTS user_change_insert AFTER INSERT ON user BEGIN "
+    + _log_change("NEW", "insert", _fields_json(only_changed=False))
+    + " END",
+    f"CREATE TRIGGER IF NOT EXISTS user_change_update AFTER UPDATE OF {', '.join(CHANGE_FIELDS)} ON user "
+    f"WHEN {' OR '.join(f'OLD.{field} IS NOT NEW.{field}' for field in CHANGE_FIELDS)} BEGIN "
+    + _log_change("NEW", "update", _fields_json(only_changed=True))
+    + " END",
+    "CREATE TRIGGER IF NOT EXISTS user_change_delete AFTER DELETE ON user BEGIN "
+    + _log_change("OLD", "delete", "NULL")
+    + " END",
+]
+
+
+# Create the log and (re)create its triggers, so they track CHANGE_FIELDS; sequence numbers of a new log start after first_seq, so
+# shards can hand out disjoint ranges
+def ensure_change_log(engine, first_seq=0):
+    with engine.begin() as connection:
+        for operation in ("insert", "update", "delete"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS user_change_{operation}"))
+        for statement in CHANGE_LOG_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(
+            text(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT 'user_change', :first_seq "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'user_change')"
+            ),
+            {"first_seq": first_seq},
+        )
+
+
+# Oldest retained sequence number (None when the log is empty) and the last one handed out
+def change_log_bounds(session):
+    oldest, last = session.execute(
+        text(
+            "SELECT (SELECT MIN(seq) FROM user_change), "
+            "(SELECT seq FROM sqlite_sequence WHERE name = 'user_change')"
+        )
+    ).one()
+    return oldest, last or 0
+
+
+# True when entries after 'after' have already been compacted away
+def cursor_expired(after, bounds):
+    oldest, last = bounds
+    return after < (last if oldest is None else oldest - 1)
+
+
+def fetch_changes(session, after, limit):
+    rows = session.execute(
+        text(
+            "SELECT seq, user_id, operation, changed_fields, changed_at FROM user_change "
+            "WHERE seq > :after ORDER BY seq LIMIT :limit"
+        ),
+        {"after": after, "limit": limit},
+    )
+    return [
+        {
+            "seq": seq,
+            "user_id": user_id,
+            "operation": operation,
+            "changed_fields": json.loads(changed_fields) if changed_fields else None,
+            "changed_at": changed_at,
+        }
+        for seq, user_id, operation, changed_fields, changed_at in rows
+    ]
+
+
+# Ids of the users with entries after 'after', and the last sequence number handed out; None
+# when some of those entries have been compacted away
+def changed_users(session, after):
+    bounds = change_log_bounds(session)
+    if cursor_expired(after, bounds):
+        return None
+    rows = session.execute(text("SELECT DISTINCT user_id FROM user_change WHERE seq > :after"), {"after": after})
+    return bounds[1], {user_id for (user_id,) in rows}
+
+
+# Drop entries older than the retention window; the caller commits
+def compact_changes(session, retention_seconds):
+    result = session.execute(
+        text("DELETE FROM user_change WHERE changed_at < strftime('%Y-%m-%d %H:%M:%f', 'now', :window)"),
+        {"window": f"-{int(retention_seconds)} seconds"},
+    )
+    return result.rowcount
+
+
+# Calls 'compact' every 'interval' seconds on a daemon thread
+class ChangeLogCompactor:
+    def __init__(self, compact, interval=3600.0):
+        self.compact = compact
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.compact()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="change-log-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,121 @@
+import json
+
+
+def _prop_id(component_id, prop):
+    if isinstance(component_id, dict):
+        component_id = json.dumps(component_id, sort_keys=True, separators=(",", ":"))
+    return f"{component_id}.{prop}"
+
+
+# Body of a POST to /_dash-update-component, shaped like the Dash renderer sends it.
+# outputs: [(id, prop)]; inputs/state: [(id, prop, value)], where an ALL wildcard input is
+# passed as (None, prop, [(id, value), ...])
+def callback_payload(outputs, inputs, state=(), changed=None):
+    def props(items):
+        payload = []
+        for component_id, prop, value in items:
+            if component_id is None:
+                payload.append([{"id": item_id, "property": prop, "value": item_value} for item_id, item_value in value])
+            else:
+                payload.append({"id": component_id, "property": prop, "value": value})
+        return payload
+
+    output_specs = [{"id": component_id, "property": prop} for component_id, prop in outputs]
+    if len(outputs) == 1:
+        output = _prop_id(*outputs[0])
+        output_field = output_specs[0]
+    else:
+        output = ".." + "...".join(_prop_id(*spec) for spec in outputs) + ".."
+        output_field = output_specs
+    if changed is None:
+        changed = [
+            _prop_id(component_id, prop)
+            for component_id, prop, _ in inputs
+            if component_id is not None
+        ]
+    return {
+        "output": output,
+        "outputs": output_field,
+        "inputs": props(inputs),
+        "state": props(state),
+        "changedPropIds": changed,
+    }
+
+
+# Filter change on the network tab as the server fallback receives it (graphs above
+# CLIENT_FILTER_MAX_ELEMENTS); smaller graphs are filtered in the browser without a request.
+# 'regions' are location hierarchy paths; 'base' is the network_diff_base of an earlier
+# response, to get a patch against its elements.
+def network_filter_payload(regions, subjects, user_types=("child", "scribe"), schedule_filter=True, base=None):
+    query = {
+        "regions": regions,
+        "subjects": subjects,
+        "user_types": list(user_types),
+        "schedule": ["schedule"] if schedule_filter else [],
+    }
+    return callback_payload(
+        [
+            ("matching-network", "elements"),
+            ("matching-network", "autoRefreshLayout"),
+            ("network_diff_base", "data"),
+        ],
+        [("network_server_query", "data", query)],
+        state=[("network_diff_base", "data", base)],
+    )
+
+
+# Tap on an edge of the network graph; 'edge' is the edge's data dict from the elements
+def tap_edge_payload(edge):
+    return callback_payload(
+        [("modal", "is_open"), ("modal-content", "children")],
+        [("matching-network", "tapEdgeData", edge), ("close-modal", "n_clicks", 0)],
+        state=[("modal", "is_open", False)],
+        changed=["matching-network.tapEdgeData"],
+    )
+
+
+# Submit of the child or scribe registration form; handle_registration matches its
+# components with ALL wildcards, and only the rendered form's components are present
+def registration_payload(user_type, fields):
+    def matched(component_type, prop, value):
+        return [{"id": {"type": component_type, "user_type": user_type}, "property": prop, "value": value}]
+
+    submit = {"type": "registration_submit", "user_type": user_type}
+    state = [matched("registration_submit", "id", submit)]
+    for field in (
+        "name",
+        "email",
+        "location",
+        "extra",
+        "subject",
+        "class_level",
+        "category_of_disability",
+        "disabilities",
+        "assistance",
+    ):
+        state.append(matched(f"registration_{field}", "value", fields.get(field)))
+    state.append(matched("registration_certificate", "contents", fields.get("certificate")))
+    state.append(matched("registration_skills", "value", fields.get("skills")))
+    return {
+        "output": '{"type":"registration_confirmation","user_type":["ALL"]}.children',
+        "outputs": [{"id": {"type": "registration_confirmation", "user_type": user_type}, "property": "children"}],
+        "inputs": [matched("registration_submit", "n_clicks", 1)],
+        "state": state,
+        "changedPropIds": [_prop_id(submit, "n_clicks")],
+    }
+
+
+# Typical requests made while using the network tab: open it, load the graph, tap an edge.
+# The filter request is the server fallback, as for a graph too large to filter in the browser.
+def network_session_payloads(regions, subjects, edge=None):
+    payloads = [
+        ("render_tab_content", callback_payload([("tab-content", "children")], [("tabs", "active_tab", "matching_network")])),
+        (
+            "load_network_elements",
+            callback_payload([("network_full_elements", "data")], [("schedule_filter", "value", ["schedule"])]),
+        ),
+        ("update_matching_network", network_filter_payload(regions, subjects)),
+    ]
+    if edge is not None:
+        payloads.append(("toggle_modal", tap_edge_payload(edge)))
+    return payloads
@@ -0,0 +1,131 @@
+import hashlib
+import random
+import re
+import zlib
+
+# MinHash signature length and its split into LSH bands. Two names collide in at least one
+# band with probability 1 - (1 - s**ROWS)**BANDS for shingle similarity s: about 0.5 at 0.45
+# and above 0.95 from 0.7.
+BANDS = 8
+ROWS = 3
+SIGNATURE_SIZE = BANDS * ROWS
+
+# Random hash functions h(x) = (a * x + b) mod p, fixed so signatures stay comparable across runs
+_PRIME = (1 << 61) - 1
+_random = random.Random(20240601)
+_HASHES = [(_random.randrange(1, _PRIME), _random.randrange(_PRIME)) for _ in range(SIGNATURE_SIZE)]
+
+SHINGLE_SIZE = 3
+
+
+# Lower-cased name words in sorted order, so "Kumar Ravi" and "ravi kumar" compare equal
+def normalize_name(name):
+    return " ".join(sorted(re.findall(r"[a-z0-9]+", (name or "").lower())))
+
+
+# Character shingles of the normalised name, padded so short names still have some
+def name_shingles(name):
+    text = f" {normalize_name(name)} "
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def similarity(shingles, other_shingles):
+    if not shingles or not other_shingles:
+        return 0.0
+    return len(shingles & other_shingles) / len(shingles | other_shingles)
+
+
+def minhash_signature(shingles):
+    values = [zlib.crc32(shingle.encode()) for shingle in shingles]
+    return [min((a * value + b) % _PRIME for value in values) for a, b in _HASHES]
+
+
+# One key per band, blocked by user type, location and class level: only registrations that agree
+# on all three and on every row of a band share a key
+def band_keys(signature, user_type, location, class_level):
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS : (band + 1) * ROWS]
+        digest = hashlib.blake2b(
+            f"{user_type}|{location}|{class_level}|{band}|{rows}".encode(), digest_size=8
+        ).digest()
+        keys.append((band, int.from_bytes(digest, "big", signed=True)))
+    return keys
+
+
+def user_band_keys(user):
+    return band_keys(
+        minhash_signature(name_shingles(user.name)), user.user_type, user.location, user.class_level
+    )
+
+
+# Rewrite a user's band rows; the caller commits
+def replace_name_bands(session, model, user):
+    session.query(model).filter(model.user_id == user.id).delete()
+    for band, key in user_band_keys(user):
+        session.add(model(user_id=user.id, band=band, key=key))
+
+
+def rebuild_name_bands(session, model, user_model):
+    session.query(model).delete()
+    rows = session.query(
+        user_model.id, user_model.user_type, user_model.name, user_model.location, user_model.class_level
+    ).yield_per(10000)
+    session.bulk_insert_mappings(
+        model,
+        [
+            {"user_id": user_id, "band": band, "key": key}
+            for user_id, user_type, name, location, class_level in rows
+            for band, key in band_keys(
+                minhash_signature(name_shingles(name)), user_type, location, class_level
+            )
+        ],
+    )
+
+
+# Users still taking part that share a band with 'user' and whose names are at least
+# 'min_similarity' alike, as (user_id, similarity) pairs, most similar first. The band index
+# makes this a few key lookups however many users there are.
+def find_duplicates(session, band_model, user_model, user, min_similarity):
+    keys = [key for _, key in user_band_keys(user)]
+    query = (
+        session.query(user_model.id, user_model.name)
+        .join(band_model, band_model.user_id == user_model.id)
+        .filter(band_model.key.in_(keys), user_model.withdrawn.is_(False))
+        .distinct()
+    )
+    if user.id is not None:
+        query = query.filter(user_model.id != user.id)
+    shingles = name_shingles(user.name)
+    scored = [(other_id, similarity(shingles, name_shingles(name))) for other_id, name in query]
+    return sorted(
+        [(other_id, score) for other_id, score in scored if score >= min_similarity],
+        key=lambda pair: (-pair[1], pair[0]),
+    )
+
+
+# All pairs of users sharing a band, as (user_id, other_id, similarity) with user_id the later
+# registration; one self-join on the band key rather than a pairwise scan
+def duplicate_pairs(session, band_model, user_model, min_similarity):
+    first, second = band_model.__table__.alias(), band_model.__table__.alias()
+    pairs = {
+        tuple(row)
+        for row in session.query(first.c.user_id, second.c.user_id).join(
+            second, (second.c.key == first.c.key) & (second.c.user_id < first.c.user_id)
+        )
+    }
+    names = {
+        user_id: name_shingles(name)
+        for user_id, name in session.query(user_model.id, user_model.name)
+        .filter(user_model.withdrawn.is_(False))
+        .yield_per(10000)
+    }
+    found = []
+    for user_id, other_id in sorted(pairs):
+        if user_id in names and other_id in names:
+            score = similarity(names[user_id], names[other_id])
+            if score >= min_similarity:
+                found.append((user_id, other_id, score))
+    return found
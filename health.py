@@ -0,0 +1,103 @@
+import statistics
+import threading
+import time
+
+from sqlalchemy import text
+
+
+# Runs named warm-up steps in order on a daemon thread; /readyz reports ready only after all of
+# them have finished. A failed run is retried from the first step with exponential backoff.
+class WarmUp:
+    def __init__(self, steps, context=None, prepare=(), retry_delay=1.0, max_retry_delay=60.0):
+        self.steps = steps  # (name, callable) pairs; a step's return value is kept as its detail
+        self.context = context  # Optional callable returning a context manager to run the steps in
+        self.prepare = prepare  # Steps that must finish before requests run side by side (see start)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.state = "pending"  # 'pending', 'warming', 'ready' or 'failed' (until the next attempt)
+        self.results = {}  # name -> {"seconds": ..., "detail": ...}
+        self.error = None
+        self.attempts = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # The 'prepare' steps run here, on the calling thread, and every caller waits for them; an error
+    # in one propagates and the next call runs them again. The other steps then start in the background.
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                for name, step in self.prepare:
+                    self._run_step(name, step)
+                self.state = "warming"
+                self._thread = threading.Thread(target=self.run, name="warm-up", daemon=True)
+                self._thread.start()
+
+    def run(self):
+        while True:
+            self.state = "warming"
+            self.attempts += 1
+            if self.context is None:
+                finished = self._run_steps()
+            else:
+                with self.context():
+                    finished = self._run_steps()
+            if finished:
+                return
+            time.sleep(min(self.max_retry_delay, self.retry_delay * 2 ** (self.attempts - 1)))
+
+    def _run_step(self, name, step):
+        started = time.perf_counter()
+        detail = step()
+        self.results[name] = {"seconds": round(time.perf_counter() - started, 4)}
+        if detail is not None:
+            self.results[name]["detail"] = detail
+
+    # True once every step has run; on an error the state is 'failed' until the next attempt
+    def _run_steps(self):
+        for name, step in self.steps:
+            try:
+                self._run_step(name, step)
+            except Exception as error:
+                self.error = f"{name}: {error}"
+                self.state = "failed"
+                return False
+        self.error = None
+        self.state = "ready"
+        return True
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def status(self):
+        status = {"status": self.state, "attempts": self.attempts, "steps": dict(self.results)}
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+# Median and worst round trip of 'samples' trivial queries, in milliseconds
+def latency_probe(session, samples=5):
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        session.execute(text("SELECT 1")).scalar()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "max_ms": round(max(timings), 3)}
+
+
+# Read through every index of the given tables so their pages are in the cache before the first
+# query needs them; returns the number of indexes touched
+def touch_indexes(session, tables):
+    indexes = session.execute(
+        text(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' "
+            f"AND tbl_name IN ({', '.join(f':t{i}' for i in range(len(tables)))})"
+        ),
+        {f"t{i}": table for i, table in enumerate(tables)},
+    ).all()
+    for name, table in indexes:
+        session.execute(text(f'SELECT count(*) FROM "{table}" INDEXED BY "{name}"')).scalar()
+    return len(indexes)
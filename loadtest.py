@@ -0,0 +1,390 @@
+# Load test the Dash callback endpoint with a mix of registrations, network filter changes
+# and edge taps, replayed as the browser would send them to /_dash-update-component.
+#   python loadtest.py --users 20 --ramp 10 --duration 60 --mix register=1,filter=6,tap=3
+# Without --url a local instance is started on a freshly seeded SQLite database in a
+# temporary directory, so the run needs no network access and leaves existing data alone.
+# The local instance runs without admission control, so the figures measure the callbacks rather
+# than the rate limiter; --admission-control keeps it on. Each virtual user then sends its own
+# X-Forwarded-For address, so per-client limits apply to it as to a separate client; requests
+# turned away with 429 are reported as "limited", not timed, and the user waits out Retry-After.
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from dash_client import network_filter_payload, registration_payload, tap_edge_payload
+
+SEED_LOCATIONS = ["Pune", "Mumbai", "Nagpur", "Nashik", "Delhi", "Chennai", "Kolkata", "Bengaluru"]
+SEED_SUBJECTS = ["Mathematics", "Science", "English", "History", "Geography", "Hindi", "Marathi"]
+SCENARIOS = ("register", "filter", "tap")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}', expected one of {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# Server side: seed the database and serve the app on a threaded development server
+def serve(port, seed_users, admission_control=False):
+    from analytics import rebuild_counts
+    from app import (
+        DemandSupplyCount,
+        NameBand,
+        User,
+        UserSubject,
+        app,
+        attach_locations,
+        concurrency_gates,
+        create_app,
+        db,
+        location_tree,
+        rate_limiters,
+        shard_router,
+    )
+    from duplicates import rebuild_name_bands
+    from reports import rebuild_user_subjects, refresh_unmatched
+
+    server = create_app()
+    server.config["RATE_LIMIT_TRUST_FORWARDED_FOR"] = True  # Virtual users identify themselves
+    if not admission_control:
+        rate_limiters.clear()
+        concurrency_gates.clear()
+    rng = random.Random(0)
+    users_by_shard = {}
+    for index in range(seed_users):
+        user_type = "child" if index % 2 == 0 else "scribe"
+        location = rng.choice(SEED_LOCATIONS)
+        users_by_shard.setdefault(shard_router.shard_for(location), []).append(
+            {
+                "user_type": user_type,
+                "name": f"Seed {user_type.capitalize()} {index}",
+                "email": f"seed{index}@loadtest.local",
+                "location": location,
+                "age_or_school": str(rng.randint(8, 18)) if user_type == "child" else "Seed School",
+                "subject": ", ".join(rng.sample(SEED_SUBJECTS, rng.randint(1, 3))),
+                "class_level": rng.randint(1, 12),
+                "category_of_disability": "VI" if user_type == "child" else None,
+            }
+        )
+    with server.app_context():
+        tree = location_tree()
+    # Bulk inserts skip what registration derives per user, so each derived table is rebuilt after
+    for shard, users in users_by_shard.items():
+        with server.app_context(), shard_router.use(shard):
+            first_id = shard_router.first_row_id(User)
+            if first_id is not None:
+                for offset, user in enumerate(users):
+                    user["id"] = first_id + offset
+            db.session.bulk_insert_mappings(User, users)
+            attach_locations(tree, only_missing=True)
+            rebuild_name_bands(db.session, NameBand, User)
+            rebuild_counts(db.session, DemandSupplyCount, User)
+            rebuild_user_subjects(db.session, UserSubject, User)
+            refresh_unmatched(db.session)
+            db.session.commit()
+    app.run(host="127.0.0.1", port=port, debug=False, threaded=True, use_reloader=False)
+
+
+def start_local_server(port, seed_users, directory, admission_control=False):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'loadtest.db')}")
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--port", str(port), "--seed-users", str(seed_users)]
+    if admission_control:
+        command.append("--admission-control")
+    process = subprocess.Popen(
+        command,
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=open(os.path.join(directory, "server.log"), "w"),
+        start_new_session=True,  # Own process group, so certificate workers are stopped with it
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited; see {os.path.join(directory, 'server.log')}")
+        try:
+            urllib.request.urlopen(base_url + "/_dash-layout", timeout=2).read()
+            return process, base_url
+        except OSError:
+            time.sleep(0.5)
+    stop_local_server(process)
+    raise RuntimeError("server did not become ready within 120 seconds")
+
+
+def stop_local_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait()
+
+
+def post_callback(base_url, payload, timeout, client=None):
+    headers = {"Content-Type": "application/json"}
+    if client:
+        headers["X-Forwarded-For"] = client
+    request = urllib.request.Request(
+        base_url + "/_dash-update-component",
+        data=json.dumps(payload).encode("utf-8"),
+        headers=headers,
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status, response.read()
+
+
+# Locations, location hierarchy paths and subjects to pick registrations and filters from,
+# read through the public API
+def fetch_facets(base_url):
+    with urllib.request.urlopen(base_url + "/api/v1/users?limit=500", timeout=30) as response:
+        users = json.loads(response.read())["data"]
+    with urllib.request.urlopen(base_url + "/api/v1/locations", timeout=30) as response:
+        regions = [node["path"] for node in json.loads(response.read())["data"]]
+    locations = sorted({user["location"] for user in users if user["location"]})
+    subjects = sorted(
+        {subj.strip() for user in users if user["subject"] for subj in user["subject"].split(",")}
+    )
+    return locations, regions, subjects
+
+
+def certificate_contents():
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "white").save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {name: [] for name in SCENARIOS}  # (latency seconds, ok)
+        self.limited = {name: 0 for name in SCENARIOS}  # Turned away with 429
+        self._lock = threading.Lock()
+
+    def add(self, scenario, latency, ok):
+        with self._lock:
+            self.samples[scenario].append((latency, ok))
+
+    def add_limited(self, scenario):
+        with self._lock:
+            self.limited[scenario] += 1
+
+
+# One simulated user; runs scenarios picked by weight until the deadline
+class VirtualUser:
+    def __init__(self, number, base_url, facets, mix, certificate, recorder, timeout):
+        self.number = number
+        self.base_url = base_url
+        self.locations, self.regions, self.subjects = facets
+        self.mix = mix
+        self.certificate = certificate
+        self.recorder = recorder
+        self.timeout = timeout
+        self.rng = random.Random(number)
+        self.client = f"10.{number // 65536 % 256}.{number // 256 % 256}.{number % 256}"
+        self.edges = []
+        self.registrations = 0
+        self.deadline = None
+
+    def _timed(self, scenario, payload, check=None):
+        started = time.perf_counter()
+        try:
+            status, body = post_callback(self.base_url, payload, self.timeout, self.client)
+            ok = status == 200 and (check is None or check(body))
+        except urllib.error.HTTPError as error:
+            if error.code == 429:
+                self.recorder.add_limited(scenario)
+                # Back off as a browser user would, rather than asking again at once
+                retry_after = float(error.headers.get("Retry-After") or 1)
+                time.sleep(max(0.0, min(retry_after, self.deadline - time.monotonic())))
+                return None
+            body, ok = b"", False
+        except (urllib.error.URLError, OSError):
+            body, ok = b"", False
+        self.recorder.add(scenario, time.perf_counter() - started, ok)
+        return body if ok else None
+
+    def register(self):
+        self.registrations += 1
+        user_type = self.rng.choice(["child", "scribe"])
+        fields = {
+            "name": f"Load User {self.number}-{self.registrations}",
+            "email": f"load{self.number}-{self.registrations}-{time.time_ns()}@loadtest.local",
+            "location": self.rng.choice(self.locations),
+            "extra": "12" if user_type == "child" else "Load School",
+            "subject": self.rng.choice(self.subjects),
+            "class_level": self.rng.randint(1, 12),
+        }
+        if user_type == "child":
+            fields.update(
+                category_of_disability="VI",
+                disabilities=["Visual Impairment"],
+                assistance=["Reading Aloud"],
+                certificate=self.certificate,
+            )
+        self._timed(
+            "register",
+            registration_payload(user_type, fields),
+            check=lambda body: b"completed successfully" in body,
+        )
+
+    def filter(self):
+        regions = self.rng.sample(self.regions, self.rng.randint(1, min(3, len(self.regions))))
+        subjects = self.rng.sample(self.subjects, self.rng.randint(1, min(3, len(self.subjects))))
+        body = self._timed("filter", network_filter_payload(regions, subjects))
+        if body is not None:
+            elements = json.loads(body)["response"]["matching-network"]["elements"]
+            self.edges = [element["data"] for element in elements if "source" in element["data"]]
+
+    def tap(self):
+        if not self.edges:
+            self.filter()  # Load a graph first, as a user must before tapping an edge
+            if not self.edges:
+                return
+        self._timed("tap", tap_edge_payload(self.rng.choice(self.edges)))
+
+    def run(self, start_at, deadline):
+        self.deadline = deadline
+        time.sleep(max(0.0, start_at - time.monotonic()))
+        names, weights = zip(*self.mix.items())
+        while time.monotonic() < deadline:
+            getattr(self, self.rng.choices(names, weights)[0])()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def summarise(recorder, elapsed):
+    summary = {"elapsed_seconds": round(elapsed, 2), "scenarios": {}}
+    total = errors = 0
+    for scenario, samples in recorder.samples.items():
+        if not samples:
+            continue
+        latencies = sorted(latency for latency, _ in samples)
+        failed = sum(1 for _, ok in samples if not ok)
+        total += len(samples)
+        errors += failed
+        summary["scenarios"][scenario] = dict(
+            {
+                "requests": len(samples),
+                "errors": failed,
+                "limited": recorder.limited[scenario],
+                "error_rate": round(failed / len(samples), 4),
+                "throughput": round(len(samples) / elapsed, 2),
+                "max_ms": round(latencies[-1] * 1000, 1),
+            },
+            **{f"p{pct}_ms": round(percentile(latencies, pct) * 1000, 1) for pct in PERCENTILES},
+        )
+    summary.update(
+        requests=total,
+        errors=errors,
+        error_rate=round(errors / total, 4) if total else 0.0,
+        throughput=round(total / elapsed, 2),
+        limited=sum(recorder.limited.values()),
+    )
+    return summary
+
+
+def print_summary(summary):
+    columns = ["requests", "errors", "limited", "throughput"] + [f"p{pct}_ms" for pct in PERCENTILES] + ["max_ms"]
+    print(f"{'scenario':<10}" + "".join(f"{column:>12}" for column in columns))
+    for scenario, stats in summary["scenarios"].items():
+        print(f"{scenario:<10}" + "".join(f"{stats[column]:>12}" for column in columns))
+    print(
+        f"\n{summary['requests']} requests in {summary['elapsed_seconds']}s: "
+        f"{summary['throughput']} req/s, error rate {summary['error_rate']:.2%}, "
+        f"{summary['limited']} turned away with 429"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Dash callback endpoint.")
+    subcommands = parser.add_subparsers(dest="command")
+    serve_parser = subcommands.add_parser("serve", help="seed a database and serve the app (used internally)")
+    serve_parser.add_argument("--port", type=int, default=8060)
+    serve_parser.add_argument("--seed-users", type=int, default=2000)
+    serve_parser.add_argument("--admission-control", action="store_true")
+    parser.add_argument("--url", help="target a running instance instead of starting one")
+    parser.add_argument("--port", type=int, default=8060, help="port for the local instance")
+    parser.add_argument("--seed-users", type=int, default=2000, help="synthetic users in the local database")
+    parser.add_argument(
+        "--admission-control", action="store_true", help="keep the rate limits and in-flight caps on the local instance"
+    )
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which users start")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load after the first user starts")
+    parser.add_argument("--mix", type=parse_mix, default="register=1,filter=6,tap=3")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        # Started on its own, the server seeds a temporary database rather than instance/users.db
+        if "DATABASE_URL" not in os.environ:
+            directory = tempfile.mkdtemp(prefix="loadtest-")
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'loadtest.db')}"
+        serve(args.port, args.seed_users, args.admission_control)
+        return
+
+    mix = args.mix
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as directory:
+        process = None
+        base_url = args.url
+        if base_url is None:
+            process, base_url = start_local_server(args.port, args.seed_users, directory, args.admission_control)
+        try:
+            facets = fetch_facets(base_url)
+            recorder = Recorder()
+            certificate = certificate_contents()
+            started = time.monotonic()
+            deadline = started + args.duration
+            threads = [
+                threading.Thread(
+                    target=VirtualUser(number, base_url, facets, mix, certificate, recorder, args.timeout).run,
+                    args=(started + args.ramp * number / args.users, deadline),
+                    daemon=True,
+                )
+                for number in range(args.users)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            summary = summarise(recorder, time.monotonic() - started)
+        finally:
+            if process is not None:
+                stop_local_server(process)
+
+    summary["config"] = {
+        "users": args.users,
+        "ramp": args.ramp,
+        "duration": args.duration,
+        "mix": mix,
+        "admission_control": args.admission_control if args.url is None else None,  # Unknown for --url
+    }
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as sink:
+            json.dump(summary, sink, indent=2)
+
+
+if __name__ == "__main__":
+    main()
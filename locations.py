@@ -0,0 +1,131 @@
+import csv
+import re
+from collections import defaultdict
+
+from sqlalchemy import text
+
+# Materialised paths of the location hierarchy: each node's path lists the slugs of its
+# ancestors and itself, e.g. "/maharashtra/pune/haveli/" or "/new-york/". Everything inside a region then sorts
+# between the region's path and path_end(path), so one indexed range predicate selects it.
+SEPARATOR = "/"
+
+
+def slug(name):
+    return re.sub(r"\s+", "-", (name or "").replace(SEPARATOR, " ").strip().lower())
+
+
+def node_path(names):
+    return SEPARATOR + "".join(f"{slug(name)}{SEPARATOR}" for name in names)
+
+
+# Exclusive upper bound of the paths at or below 'path'
+def path_end(path):
+    return path[:-1] + chr(ord(SEPARATOR) + 1)
+
+
+def path_depth(path):
+    return path.count(SEPARATOR) - 1
+
+
+def parent_path(path):
+    parent = path[: path.rstrip(SEPARATOR).rfind(SEPARATOR) + 1]
+    return parent if parent != SEPARATOR else None
+
+
+# In-memory copy of the hierarchy, built from (path, name, level) node rows
+class LocationTree:
+    def __init__(self, rows):
+        self.names = {}  # path -> display name
+        self.levels = {}  # path -> level name ('State', 'District', ...), None for stand-in nodes
+        self.children = defaultdict(list)
+        self._by_slug = {}  # slug -> path of the deepest node with that name
+        for path, name, level in sorted(rows):
+            if path in self.names:
+                continue  # Shards hold copies of the same node
+            self.names[path] = name
+            self.levels[path] = level
+            self.children[parent_path(path)].append(path)
+            known = self._by_slug.get(slug(name))
+            if known is None or path_depth(path) > path_depth(known):
+                self._by_slug[slug(name)] = path
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, path):
+        return path in self.names
+
+    # Node a user's free-text location belongs to, or None when the hierarchy does not know it
+    def path_for(self, location):
+        return self._by_slug.get(slug(location)) if location else None
+
+    def roots(self):
+        return self.children[None]
+
+    # Paths in display order, parents before their children
+    def walk(self, paths=None):
+        for path in self.roots() if paths is None else paths:
+            yield path
+            yield from self.walk(self.children.get(path, []))
+
+    # True when 'path' is one of 'regions' or lies inside one
+    @staticmethod
+    def within(path, regions):
+        return path is not None and any(path.startswith(region) for region in regions)
+
+    # The given free-text locations that lie inside any of the region paths
+    def locations_within(self, locations, regions):
+        return [location for location in locations if self.within(self.path_for(location), regions)]
+
+
+# Registrations per node as {path: {user_type: count}}, each node counting its whole subtree.
+# 'rows' are (location_path, user_type, count) for the leaves users are attached to.
+def rollup_counts(rows):
+    counts = defaultdict(lambda: defaultdict(int))
+    for path, user_type, count in rows:
+        while path is not None:
+            counts[path][user_type] += count
+            path = parent_path(path)
+    return counts
+
+
+def count_by_path(session):
+    return session.execute(
+        text(
+            "SELECT location_path, user_type, COUNT(*) FROM user "
+            "WHERE location_path IS NOT NULL AND withdrawn = 0 GROUP BY location_path, user_type"
+        )
+    ).all()
+
+
+# Nodes for a hierarchy CSV: a header row naming the levels from the top down (e.g.
+# State,District,Block), then one row per lowest-level place. Returns (path, name, level) rows.
+def read_hierarchy(lines):
+    reader = csv.reader(lines)
+    levels = [level.strip() for level in next(reader, [])]
+    nodes = {}
+    for row in reader:
+        names = [name.strip() for name in row[: len(levels)]]
+        while names and not names[-1]:
+            names.pop()  # A short row ends at a higher level
+        for depth in range(len(names)):
+            if not names[depth]:
+                raise ValueError(f"Missing {levels[depth]} in row: {', '.join(row)}")
+            path = node_path(names[: depth + 1])
+            nodes.setdefault(path, (path, names[depth], levels[depth]))
+    return list(nodes.values())
+
+
+# Add location_path, and its covering index for rollups and region filters, to user tables
+# created before it existed
+def ensure_location_path_column(engine):
+    with engine.begin() as connection:
+        columns = {row[1] for row in connection.execute(text("PRAGMA table_info(user)"))}
+        if "location_path" not in columns:
+            connection.execute(text("ALTER TABLE user ADD COLUMN location_path VARCHAR(300)"))
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_user_location_path "
+                "ON user (location_path, user_type, withdrawn)"
+            )
+        )
@@ -0,0 +1,133 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from snapshot import USER_TYPE_CODES
+
+
+# Group selected rows by location into (children, scribes) lists of
+# (id, class_level, subject_mask, capability_mask); withdrawn users are left out
+def location_partitions(snapshot, rows):
+    partitions = {}
+    child_code = USER_TYPE_CODES["child"]
+    scribe_code = USER_TYPE_CODES["scribe"]
+    for index in rows:
+        type_code = snapshot.types[index]
+        if type_code not in (child_code, scribe_code) or snapshot.withdrawn[index]:
+            continue
+        children, scribes = partitions.setdefault(snapshot.location_ids[index], ([], []))
+        entry = (
+            snapshot.ids[index],
+            snapshot.class_levels[index],
+            snapshot.subject_masks[index],
+            snapshot.capability_masks[index],
+        )
+        (children if type_code == child_code else scribes).append(entry)
+    return partitions
+
+
+# Edges within one location: shared subject, scribe's class level lower than the child's and
+# the scribe's skills covering every assistance need of the child (one bitwise test)
+def partition_edges(children, scribes):
+    edges = []
+    for child_id, child_level, child_mask, child_needs in children:
+        for scribe_id, scribe_level, scribe_mask, scribe_skills in scribes:
+            shared = child_mask & scribe_mask
+            if shared and scribe_level < child_level and not child_needs & ~scribe_skills:
+                edges.append((child_id, scribe_id, shared))
+    return edges
+
+
+# Pack partition entries into typed arrays so they pickle compactly
+def _pack(entries):
+    return (
+        array("q", [entry[0] for entry in entries]),
+        array("h", [entry[1] for entry in entries]),
+        [entry[2] for entry in entries],
+        array("i", [entry[3] for entry in entries]),
+    )
+
+
+def _pack_edges(edges):
+    return (
+        array("q", [edge[0] for edge in edges]),
+        array("q", [edge[1] for edge in edges]),
+        [edge[2] for edge in edges],
+    )
+
+
+def _unpack(packed):
+    return list(zip(*packed))
+
+
+# Worker entry point: compute edges for a chunk of packed partitions, returned packed as well
+def _chunk_edges(chunk):
+    return [
+        (location_id, _pack_edges(partition_edges(_unpack(children), _unpack(scribes))))
+        for location_id, children, scribes in chunk
+    ]
+
+
+# Split partitions into roughly equal chunks by pair count, largest first
+def _balanced_chunks(partitions, chunk_count):
+    chunks = [[] for _ in range(chunk_count)]
+    loads = [0] * chunk_count
+    ordered = sorted(
+        partitions.items(), key=lambda item: len(item[1][0]) * len(item[1][1]), reverse=True
+    )
+    for location_id, (children, scribes) in ordered:
+        target = loads.index(min(loads))
+        chunks[target].append((location_id, _pack(children), _pack(scribes)))
+        loads[target] += len(children) * len(scribes)
+    return [chunk for chunk in chunks if chunk]
+
+
+def pair_count(partitions):
+    return sum(len(children) * len(scribes) for children, scribes in partitions.values())
+
+
+# Computes edges per location, fanning out to a process pool for large requests
+class EdgeComputer:
+    def __init__(self, max_workers=None, min_pairs=2_000_000):
+        self.max_workers = max_workers
+        self.min_pairs = min_pairs  # Below this many candidate pairs work stays in-process
+        self._executor = None
+
+    def worker_count(self):
+        return self.max_workers or os.cpu_count() or 1
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.worker_count())
+        return self._executor
+
+    def should_parallelize(self, partitions):
+        return (
+            self.worker_count() > 1
+            and len(partitions) > 1
+            and pair_count(partitions) >= self.min_pairs
+        )
+
+    # Returns (child_id, scribe_id, shared_mask) tuples sorted by child and scribe id
+    def compute(self, partitions):
+        edges = []
+        if self.should_parallelize(partitions):
+            executor = self._get_executor()
+            chunks = _balanced_chunks(partitions, self.worker_count())
+            results = []
+            for chunk_result in executor.map(_chunk_edges, chunks):
+                results.extend(chunk_result)
+            # Merge in location order so the output does not depend on worker timing
+            for _, partition in sorted(results, key=lambda item: item[0]):
+                edges.extend(_unpack(partition))
+        else:
+            for location_id in sorted(partitions):
+                children, scribes = partitions[location_id]
+                edges.extend(partition_edges(children, scribes))
+        edges.sort()
+        return edges
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
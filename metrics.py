@@ -0,0 +1,47 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Process-wide counters and gauges, exposed as JSON on /metrics
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._collectors = []
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    # Collectors are called at scrape time and return a dict of gauge values
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    # Count calls and accumulate wall time under "<name>.calls" and "<name>.seconds"
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._counters[f"{name}.calls"] = self._counters.get(f"{name}.calls", 0) + 1
+                self._counters[f"{name}.seconds"] = self._counters.get(f"{name}.seconds", 0.0) + elapsed
+
+    def snapshot(self):
+        gauges = {}
+        for collector in self._collectors:
+            gauges.update(collector())
+        with self._lock:
+            gauges.update(self._gauges)
+            return {"counters": dict(self._counters), "gauges": gauges}
+
+
+metrics = Metrics()
@@ -0,0 +1,26 @@
+from dash import Patch
+
+
+def element_id(element):
+    return element["data"]["id"]
+
+
+# Elements of 'previous' missing from 'current' and elements of 'current' new to 'previous',
+# matched by id; both keep their original order (nodes before the edges that use them)
+def diff_elements(previous, current):
+    previous_ids = {element_id(element) for element in previous}
+    current_ids = {element_id(element) for element in current}
+    removed = [element for element in previous if element_id(element) not in current_ids]
+    added = [element for element in current if element_id(element) not in previous_ids]
+    return removed, added
+
+
+# Partial update of an elements property holding 'previous'. Removals match by value, so they do
+# not depend on the order the browser holds the elements in after earlier patches.
+def elements_patch(removed, added):
+    patch = Patch()
+    for element in removed:
+        patch.remove(element)
+    if added:
+        patch.extend(added)
+    return patch
@@ -0,0 +1,204 @@
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import smtplib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+
+# Transport that appends each notification as one JSON line; used locally and in tests
+class FileTransport:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, recipient, subject, body):
+        line = json.dumps(
+            {
+                "to": recipient,
+                "subject": subject,
+                "body": body,
+                "sent_at": datetime.utcnow().isoformat(),
+            }
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as sink:
+            sink.write(line + "\n")
+
+
+# Transport that delivers through an SMTP server (e.g. `python -m aiosmtpd -n` locally)
+class SMTPTransport:
+    def __init__(self, host="localhost", port=25, sender="no-reply@scribe-matching.local", timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    def send(self, recipient, subject, body):
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+
+# Render all pending events for one recipient as a single message
+def compose_digest(events):
+    names = [event["match_name"] for event in events]
+    if len(names) == 1:
+        subject = f"New eligible match: {names[0]}"
+    else:
+        subject = f"{len(names)} new eligible matches"
+    lines = [
+        f"- {event['match_name']} ({event['match_type']}, {event['location']}): {event['subjects']}"
+        for event in events
+    ]
+    body = "New matches are available on the Scribe Matching Platform:\n\n" + "\n".join(lines)
+    return subject, body
+
+
+# Exponential backoff with jitter, capped at max_delay seconds
+def backoff_delay(attempts, base_delay=5.0, max_delay=3600.0):
+    delay = min(max_delay, base_delay * (2 ** max(attempts - 1, 0)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+# Drains the outbox table in batches and hands coalesced digests to a transport
+class NotificationWorker:
+    def __init__(
+        self,
+        server,
+        db,
+        model,
+        transport,
+        batch_size=100,
+        poll_interval=5.0,
+        max_attempts=8,
+        max_error_delay=300.0,
+        shards=(None,),
+        use_shard=None,
+    ):
+        self.server = server
+        self.db = db
+        self.model = model
+        self.transport = transport
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.max_error_delay = max_error_delay  # Longest pause after repeated failures of a whole drain
+        self.shards = shards  # Databases holding outbox rows; each is drained separately
+        self.use_shard = use_shard or (lambda shard: contextlib.nullcontext())
+        self._stopping = None
+        self._thread = None
+
+    # Claim up to batch_size due messages, grouped by recipient in arrival order
+    def _fetch_batch(self, shard):
+        with self.server.app_context(), self.use_shard(shard):
+            now = datetime.utcnow()
+            rows = (
+                self.model.query.filter(
+                    self.model.status == "pending",
+                    self.model.next_attempt_at <= now,
+                )
+                .order_by(self.model.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            batch = OrderedDict()
+            unreadable = False
+            for row in rows:
+                try:
+                    payload = json.loads(row.payload)
+                except (TypeError, ValueError) as e:
+                    # Retrying cannot fix the payload; park the row so it does not block the rest
+                    logger.error("Outbox message %s has an unreadable payload: %s", row.id, e)
+                    row.status = "failed"
+                    row.last_error = f"Unreadable payload: {e}"[:200]
+                    unreadable = True
+                    continue
+                batch.setdefault(row.recipient_email, []).append((row.id, row.attempts, payload))
+            if unreadable:
+                self.db.session.commit()
+            return batch
+
+    def _record_result(self, shard, message_ids, attempts, error=None):
+        with self.server.app_context(), self.use_shard(shard):
+            rows = self.model.query.filter(self.model.id.in_(message_ids)).all()
+            now = datetime.utcnow()
+            for row in rows:
+                row.attempts = attempts
+                if error is None:
+                    row.status = "sent"
+                    row.sent_at = now
+                    row.last_error = None
+                else:
+                    row.last_error = str(error)[:200]
+                    if attempts >= self.max_attempts:
+                        row.status = "failed"
+                    else:
+                        row.next_attempt_at = now + timedelta(seconds=backoff_delay(attempts))
+            self.db.session.commit()
+
+    def _deliver(self, shard, recipient, entries):
+        message_ids = [message_id for message_id, _, _ in entries]
+        attempts = max(attempts for _, attempts, _ in entries) + 1
+        subject, body = compose_digest([payload for _, _, payload in entries])
+        try:
+            self.transport.send(recipient, subject, body)
+        except Exception as e:
+            self._record_result(shard, message_ids, attempts, error=e)
+            return False
+        self._record_result(shard, message_ids, attempts)
+        return True
+
+    # Process one batch per shard; returns the number of recipients notified
+    async def drain_once(self):
+        batches = await asyncio.gather(
+            *(asyncio.to_thread(self._fetch_batch, shard) for shard in self.shards)
+        )
+        results = await asyncio.gather(
+            *(
+                asyncio.to_thread(self._deliver, shard, recipient, entries)
+                for shard, batch in zip(self.shards, batches)
+                for recipient, entries in batch.items()
+            )
+        )
+        return sum(results)
+
+    # Drain until stopped. A failing drain (a database error, an unreadable outbox row) is logged
+    # and retried with backoff instead of ending the thread.
+    async def run(self):
+        self._stopping = asyncio.Event()
+        failures = 0
+        while not self._stopping.is_set():
+            try:
+                delivered = await self.drain_once()
+            except Exception:
+                failures += 1
+                logger.exception("Draining the notification outbox failed (%d in a row)", failures)
+                delay = backoff_delay(failures, base_delay=self.poll_interval, max_delay=self.max_error_delay)
+            else:
+                failures = 0
+                if delivered:
+                    continue  # Keep draining while there is a backlog
+                delay = self.poll_interval
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    # Run the worker on its own event loop in a daemon thread
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=asyncio.run, args=(self.run(),), daemon=True, name="notification-worker"
+            )
+            self._thread.start()
+        return self._thread
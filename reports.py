@@ -0,0 +1,131 @@
+import csv
+import io
+
+from sqlalchemy import bindparam, text
+
+from snapshot import split_subjects
+
+# Children still taking part with no scribe in the same location who has not withdrawn, shares a
+# subject, is in a lower class level and is able to give every assistance the child needs.
+# One set-based anti-join; {scope} narrows it to the children being refreshed.
+UNMATCHED_CHILDREN_SQL = """
+    SELECT c.id
+    FROM user c
+    WHERE c.user_type = 'child' AND c.withdrawn = 0 {scope}
+      AND NOT EXISTS (
+          SELECT 1
+          FROM user_subject cs
+          JOIN user_subject ss ON ss.subject = cs.subject AND ss.location = c.location
+          JOIN user s ON s.id = ss.user_id
+          WHERE cs.user_id = c.id
+            AND ss.user_type = 'scribe'
+            AND s.withdrawn = 0
+            AND s.class_level < c.class_level
+            AND (c.capability_mask & ~s.capability_mask) = 0
+      )
+"""
+
+SCOPES = {
+    "all": "",
+    "children": "AND c.id IN :child_ids",
+    "locations": "AND c.location IN :locations",
+}
+
+# Earliest upcoming exam first; children without recorded sessions last
+UNMATCHED_REPORT_SQL = """
+    SELECT u.id, u.name, u.location, u.subject, u.class_level,
+           u.category_of_disability, u.assistance_needed,
+           MIN(e.starts_at) AS next_exam
+    FROM unmatched_child m
+    JOIN user u ON u.id = m.child_id
+    LEFT JOIN exam_session e ON e.child_id = u.id AND e.starts_at >= :now
+    GROUP BY u.id
+    ORDER BY next_exam IS NULL, next_exam, u.class_level DESC, u.id
+"""
+
+REPORT_COLUMNS = [
+    "id",
+    "name",
+    "location",
+    "subject",
+    "class_level",
+    "category_of_disability",
+    "assistance_needed",
+    "next_exam",
+]
+
+
+# Rewrite a user's normalised subject rows; the caller commits
+def replace_user_subjects(session, model, user):
+    session.query(model).filter(model.user_id == user.id).delete()
+    for subject in sorted({subj.lower() for subj in split_subjects(user.subject) if subj}):
+        session.add(
+            model(
+                user_id=user.id,
+                subject=subject,
+                location=user.location,
+                user_type=user.user_type,
+            )
+        )
+
+
+def rebuild_user_subjects(session, model, user_model):
+    session.query(model).delete()
+    rows = session.query(
+        user_model.id, user_model.user_type, user_model.location, user_model.subject
+    ).yield_per(10000)
+    session.bulk_insert_mappings(
+        model,
+        [
+            {"user_id": user_id, "subject": subject, "location": location, "user_type": user_type}
+            for user_id, user_type, location, subject_text in rows
+            for subject in sorted({subj.lower() for subj in split_subjects(subject_text) if subj})
+        ],
+    )
+
+
+# Recompute unmatched_child for all children, or only for given child ids or locations
+def refresh_unmatched(session, child_ids=None, locations=None):
+    if child_ids is not None:
+        scope, params, parameter = "children", {"child_ids": list(child_ids)}, "child_ids"
+        clear = "DELETE FROM unmatched_child WHERE child_id IN :child_ids"
+    elif locations is not None:
+        scope, params, parameter = "locations", {"locations": list(locations)}, "locations"
+        clear = (
+            "DELETE FROM unmatched_child WHERE child_id IN "
+            "(SELECT id FROM user WHERE location IN :locations)"
+        )
+    else:
+        scope, params, parameter = "all", {}, None
+        clear = "DELETE FROM unmatched_child"
+    if parameter and not params[parameter]:
+        return
+
+    def statement(sql):
+        compiled = text(sql)
+        if parameter:
+            compiled = compiled.bindparams(bindparam(parameter, expanding=True))
+        return compiled
+
+    session.execute(statement(clear), params)
+    session.execute(
+        statement(
+            "INSERT INTO unmatched_child (child_id) "
+            + UNMATCHED_CHILDREN_SQL.format(scope=SCOPES[scope])
+        ),
+        params,
+    )
+
+
+def unmatched_report(session, now):
+    rows = session.execute(text(UNMATCHED_REPORT_SQL), {"now": now})
+    return [dict(row._mapping) for row in rows]
+
+
+def report_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=REPORT_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({column: row.get(column) for column in REPORT_COLUMNS})
+    return buffer.getvalue()
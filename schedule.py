@@ -0,0 +1,133 @@
+import bisect
+import threading
+from datetime import datetime
+
+# One slot per line, e.g. "2025-03-04 09:30-12:30"
+SLOT_DAY_FORMAT = "%Y-%m-%d"
+SLOT_TIME_FORMAT = "%H:%M"
+
+
+# Parse exam sessions or availability windows typed into the update form
+def parse_slots(text):
+    slots = []
+    for line_number, line in enumerate((text or "").splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            day, times = line.split(" ", 1)
+            start_text, end_text = [part.strip() for part in times.split("-", 1)]
+            start = datetime.strptime(f"{day} {start_text}", f"{SLOT_DAY_FORMAT} {SLOT_TIME_FORMAT}")
+            end = datetime.strptime(f"{day} {end_text}", f"{SLOT_DAY_FORMAT} {SLOT_TIME_FORMAT}")
+        except ValueError:
+            raise ValueError(f"Line {line_number}: expected 'YYYY-MM-DD HH:MM-HH:MM', got '{line}'.")
+        if end <= start:
+            raise ValueError(f"Line {line_number}: the end time must be after the start time.")
+        slots.append((start, end))
+    return sorted(slots)
+
+
+def format_slot(slot):
+    start, end = slot
+    return f"{start.strftime(SLOT_DAY_FORMAT)} {start.strftime(SLOT_TIME_FORMAT)}-{end.strftime(SLOT_TIME_FORMAT)}"
+
+
+def format_slots(slots):
+    return "\n".join(format_slot(slot) for slot in slots)
+
+
+# Merge overlapping or touching intervals into a sorted, disjoint list
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# Scribe availability and child exam sessions, indexed for slot queries
+class ScheduleIndex:
+    def __init__(self, loader):
+        self.loader = loader  # Callable returning (availability rows, session rows) of (user_id, start, end)
+        self._availability = {}  # scribe_id -> (starts, ends) of merged windows
+        self._sessions = {}  # child_id -> sorted [(start, end)]
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            availability_rows, session_rows = self.loader()
+            windows, sessions = {}, {}
+            for scribe_id, start, end in availability_rows:
+                windows.setdefault(scribe_id, []).append((start, end))
+            for child_id, start, end in session_rows:
+                sessions.setdefault(child_id, []).append((start, end))
+            for scribe_id, intervals in windows.items():
+                self._store_availability(scribe_id, intervals)
+            self._sessions = {child_id: sorted(slots) for child_id, slots in sessions.items()}
+            self._loaded = True
+
+    def _store_availability(self, scribe_id, intervals):
+        merged = merge_intervals(intervals)
+        if merged:
+            self._availability[scribe_id] = (
+                [start for start, _ in merged],
+                [end for _, end in merged],
+            )
+        else:
+            self._availability.pop(scribe_id, None)
+
+    # Load everything again, e.g. after rows were removed in bulk outside set_availability/set_sessions
+    def reload(self):
+        with self._lock:
+            self._availability = {}
+            self._sessions = {}
+            self._loaded = False
+            self._ensure_loaded()
+
+    def set_availability(self, scribe_id, intervals):
+        self._ensure_loaded()
+        with self._lock:
+            self._store_availability(scribe_id, intervals)
+
+    def set_sessions(self, child_id, intervals):
+        self._ensure_loaded()
+        with self._lock:
+            if intervals:
+                self._sessions[child_id] = sorted(intervals)
+            else:
+                self._sessions.pop(child_id, None)
+
+    def sessions(self, child_id):
+        self._ensure_loaded()
+        return self._sessions.get(child_id, [])
+
+    def availability(self, scribe_id):
+        self._ensure_loaded()
+        starts, ends = self._availability.get(scribe_id, ([], []))
+        return list(zip(starts, ends))
+
+    # O(log w): the window starting at or before 'start' is the only one that can contain the slot
+    def is_free(self, scribe_id, start, end):
+        self._ensure_loaded()
+        windows = self._availability.get(scribe_id)
+        if windows is None:
+            return False
+        starts, ends = windows
+        position = bisect.bisect_right(starts, start) - 1
+        return position >= 0 and ends[position] >= end
+
+    # Exam sessions of the child during which the scribe is free
+    def covered_sessions(self, child_id, scribe_id):
+        return [slot for slot in self.sessions(child_id) if self.is_free(scribe_id, *slot)]
+
+    # Children without recorded sessions are not constrained by the schedule
+    def can_cover(self, child_id, scribe_id):
+        sessions = self.sessions(child_id)
+        return not sessions or any(self.is_free(scribe_id, *slot) for slot in sessions)
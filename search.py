@@ -0,0 +1,111 @@
+import re
+
+from sqlalchemy import text
+
+# Columns of the user table indexed for full-text search, with their bm25 weights
+SEARCH_COLUMNS = (
+    ("name", 10.0),
+    ("email", 5.0),
+    ("location", 3.0),
+    ("age_or_school", 1.0),
+    ("subject", 2.0),
+)
+
+MIN_TERM_LENGTH = 2  # Single characters would match most of the table
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+_COLUMNS = ", ".join(column for column, _ in SEARCH_COLUMNS)
+_NEW_VALUES = ", ".join(f"new.{column}" for column, _ in SEARCH_COLUMNS)
+_OLD_VALUES = ", ".join(f"old.{column}" for column, _ in SEARCH_COLUMNS)
+
+
+# External-content FTS5 table over a user table ("user", or "user_archive" for archived
+# academic years), kept in sync by triggers
+def search_schema(table, index):
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+            {_COLUMNS},
+            content='{table}',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3 4'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {index}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {index}({index}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {_COLUMNS} ON {table} BEGIN
+            INSERT INTO {index}({index}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES});
+            INSERT INTO {index}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+        END
+        """,
+    ]
+
+
+# Create the FTS5 table and triggers; a newly created index is filled from existing rows
+def ensure_search_index(engine, table="user", index="user_search"):
+    with engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :index"), {"index": index}
+        ).first()
+        for statement in search_schema(table, index):
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text(f"INSERT INTO {index}({index}) VALUES ('rebuild')"))
+
+
+# Turn free text into an FTS5 query where every term must match as a prefix
+def build_match_query(query):
+    terms = [term for term in re.findall(r"\w+", query or "") if len(term) >= MIN_TERM_LENGTH]
+    return " AND ".join(f'"{term}"*' for term in terms)
+
+
+# Ranked prefix search; returns dicts with the user's id, type, email, location, highlighted
+# name and bm25 rank (lower is better)
+def search_users(session, query, user_type=None, limit=10, table="user", index="user_search"):
+    match = build_match_query(query)
+    if not match:
+        return []
+    weights = ", ".join(str(weight) for _, weight in SEARCH_COLUMNS)
+    type_clause = "AND u.user_type = :user_type" if user_type else ""
+    rows = session.execute(
+        text(
+            f"""
+            SELECT u.id, u.user_type, u.email, u.location,
+                   highlight({index}, 0, :start, :end) AS name_highlight,
+                   bm25({index}, {weights}) AS rank
+            FROM {index}
+            JOIN {table} u ON u.id = {index}.rowid
+            WHERE {index} MATCH :match {type_clause}
+            ORDER BY rank
+            LIMIT :limit
+            """
+        ),
+        {
+            "match": match,
+            "user_type": user_type,
+            "limit": limit,
+            "start": HIGHLIGHT_START,
+            "end": HIGHLIGHT_END,
+        },
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+# Split a highlighted string into (text, is_match) pieces for rendering
+def highlight_parts(value):
+    parts = []
+    for index, piece in enumerate(re.split(f"[{HIGHLIGHT_START}{HIGHLIGHT_END}]", value or "")):
+        if piece:
+            parts.append((piece, index % 2 == 1))
+    return parts
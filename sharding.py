@@ -0,0 +1,101 @@
+import contextvars
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import func
+
+DEFAULT_SHARD = "default"  # Lives in SQLALCHEMY_DATABASE_URI; other shards are SQLALCHEMY_BINDS keys
+SHARD_ID_SPAN = 1_000_000_000  # Shard n allocates user ids from n * SHARD_ID_SPAN, so ids stay globally unique
+
+_current_shard = contextvars.ContextVar("current_shard", default=DEFAULT_SHARD)
+
+
+# db.session class that sends every statement to the shard selected with ShardRouter.use().
+# One unit of work (up to its commit) must stay inside a single use() block.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        shard = _current_shard.get()
+        if bind is None and shard != DEFAULT_SHARD:
+            return self._db.engines[shard]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# Maps location groups to shards; routes single-shard work and scatter-gathers the rest
+class ShardRouter:
+    def __init__(self, server, db, shards, locations):
+        self.server = server
+        self.db = db
+        self.shards = shards  # Shard name -> shard number
+        self.locations = locations  # Location -> shard name; unlisted locations use the default shard
+        self._names_by_number = {number: name for name, number in shards.items()}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def names(self):
+        return sorted(self.shards, key=self.shards.get)
+
+    def shard_for(self, location):
+        return self.locations.get(location, DEFAULT_SHARD)
+
+    def shard_for_id(self, row_id):
+        return self._names_by_number.get(row_id // SHARD_ID_SPAN, DEFAULT_SHARD)
+
+    # Shards holding any of the locations; no filter means every shard
+    def shards_for(self, locations=None):
+        if not locations:
+            return self.names
+        wanted = {self.shard_for(location) for location in locations}
+        return [name for name in self.names if name in wanted]
+
+    def engine(self, name):
+        return self.db.engines[None if name == DEFAULT_SHARD else name]
+
+    @contextmanager
+    def use(self, name):
+        token = _current_shard.set(name)
+        try:
+            yield
+        finally:
+            _current_shard.reset(token)
+
+    def _run(self, fn, name):
+        with self.server.app_context(), self.use(name):
+            return fn(name)
+
+    # Call fn(shard) on each shard in its own app context (and so its own session), in
+    # parallel when there are several; results come back in shard order. A scatter from inside
+    # another one runs on the calling thread, as waiting on the pool it occupies could deadlock.
+    def scatter(self, fn, shards=None):
+        shards = self.names if shards is None else list(shards)
+        if len(shards) <= 1 or threading.current_thread().name.startswith("shard"):
+            return [self._run(fn, name) for name in shards]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=len(self.shards), thread_name_prefix="shard"
+                )
+        return list(self._executor.map(lambda name: self._run(fn, name), shards))
+
+    # Explicit id for the first row of a table in a non-default shard; later rows follow it,
+    # as SQLite assigns max(id) + 1. Rows moved to 'archive_model' keep their ids, so new rows
+    # continue after the highest archived id. Returns None when the database can choose the id.
+    def first_row_id(self, model, archive_model=None):
+        number = self.shards[_current_shard.get()]
+        live = self.db.session.query(func.max(model.id)).scalar()
+        if archive_model is not None:
+            archived = self.db.session.query(func.max(archive_model.id)).scalar()
+            if archived is not None and (live is None or archived > live):
+                return archived + 1
+        if number == 0 or live is not None:
+            return None
+        return number * SHARD_ID_SPAN + 1
+
+
+# Merge per-shard result lists that are each already sorted by 'key'
+def merge_sorted(results, key, reverse=False, limit=None):
+    return list(itertools.islice(heapq.merge(*results, key=key, reverse=reverse), limit))
@@ -0,0 +1,308 @@
+import sys
+import threading
+from array import array
+from collections import namedtuple
+
+# Columns kept in the snapshot, in the order rows are supplied (the certificate blob is never loaded)
+SNAPSHOT_FIELDS = (
+    "id",
+    "user_type",
+    "name",
+    "email",
+    "location",
+    "age_or_school",
+    "subject",
+    "class_level",
+    "category_of_disability",
+    "disabilities",
+    "assistance_needed",
+    "skills",
+    "capability_mask",
+    "withdrawn",
+)
+
+# Read-only view of one snapshot row; attribute names match the User model
+UserRecord = namedtuple("UserRecord", SNAPSHOT_FIELDS)
+
+USER_TYPES = ("child", "scribe", "mentor")
+USER_TYPE_CODES = {user_type: code for code, user_type in enumerate(USER_TYPES)}
+
+# String columns stored as indexes into the shared, interned string table
+INTERNED_FIELDS = (
+    "name",
+    "age_or_school",
+    "subject",
+    "category_of_disability",
+    "disabilities",
+    "assistance_needed",
+    "skills",
+)
+
+
+def split_subjects(subject):
+    return [subj.strip() for subj in subject.split(",")] if subject else []
+
+
+# Array-backed, column-per-field copy of the user table for read-heavy paths
+class UserSnapshot:
+    def __init__(self):
+        self.ids = array("q")
+        self.types = array("b")
+        self.location_ids = array("i")  # -1 when the user has no location
+        self.class_levels = array("h")
+        self.subject_masks = []  # Bit i set when the user lists subjects[i]
+        self.capability_masks = array("i")  # Needs of children, skills of scribes (see capabilities.py)
+        self.withdrawn = array("b")  # 1 when the user no longer takes part in matching
+        self.emails = []
+        self.string_columns = {field: array("i") for field in INTERNED_FIELDS}
+        self.strings = []
+        self.locations = []
+        self.subjects = []  # Lower-cased subject vocabulary
+        self._string_index = {}
+        self._location_index = {}
+        self._subject_index = {}
+        self._row_by_id = {}
+        self._facets = None  # Cached facets(); cleared by every upsert
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _intern(self, value):
+        if value is None:
+            return -1
+        index = self._string_index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(sys.intern(value))
+            self._string_index[value] = index
+        return index
+
+    def _location_code(self, location, create=False):
+        if location is None:
+            return -1
+        code = self._location_index.get(location)
+        if code is None and create:
+            code = len(self.locations)
+            self.locations.append(sys.intern(location))
+            self._location_index[location] = code
+        return code
+
+    def _subject_code(self, subject, create=False):
+        key = subject.strip().lower()
+        code = self._subject_index.get(key)
+        if code is None and create:
+            code = len(self.subjects)
+            self.subjects.append(sys.intern(key))
+            self._subject_index[key] = code
+        return code
+
+    def _mask(self, subjects, create=False):
+        mask = 0
+        for subject in subjects:
+            code = self._subject_code(subject, create=create)
+            if code is not None:
+                mask |= 1 << code
+        return mask
+
+    # Insert a new row or overwrite the row with the same id
+    def upsert(self, row):
+        values = dict(zip(SNAPSHOT_FIELDS, row))
+        with self._lock:
+            index = self._row_by_id.get(values["id"])
+            columns = (
+                (self.types, USER_TYPE_CODES.get(values["user_type"], -1)),
+                (self.location_ids, self._location_code(values["location"], create=True)),
+                (self.class_levels, values["class_level"]),
+                (self.subject_masks, self._mask(split_subjects(values["subject"]), create=True)),
+                (self.capability_masks, values["capability_mask"] or 0),
+                (self.withdrawn, 1 if values["withdrawn"] else 0),
+                (self.emails, values["email"]),
+            ) + tuple(
+                (self.string_columns[field], self._intern(values[field]))
+                for field in INTERNED_FIELDS
+            )
+            if index is None:
+                self._row_by_id[values["id"]] = len(self.ids)
+                self.ids.append(values["id"])
+                for column, value in columns:
+                    column.append(value)
+            else:
+                for column, value in columns:
+                    column[index] = value
+            self._facets = None
+
+    # Drop a user deleted or archived since the snapshot was built. Its row stays behind as a
+    # tombstone that no lookup or selection matches.
+    def remove(self, user_id):
+        with self._lock:
+            index = self._row_by_id.pop(user_id, None)
+            if index is None:
+                return
+            self.types[index] = -1
+            self.location_ids[index] = -1
+            self.withdrawn[index] = 1
+            self.string_columns["subject"][index] = -1
+            self._facets = None
+
+    def _string(self, field, index):
+        code = self.string_columns[field][index]
+        return self.strings[code] if code >= 0 else None
+
+    def record(self, index):
+        with self._lock:
+            location_id = self.location_ids[index]
+            type_code = self.types[index]
+            return UserRecord(
+                id=self.ids[index],
+                user_type=USER_TYPES[type_code] if type_code >= 0 else None,
+                name=self._string("name", index),
+                email=self.emails[index],
+                location=self.locations[location_id] if location_id >= 0 else None,
+                age_or_school=self._string("age_or_school", index),
+                subject=self._string("subject", index),
+                class_level=self.class_levels[index],
+                category_of_disability=self._string("category_of_disability", index),
+                disabilities=self._string("disabilities", index),
+                assistance_needed=self._string("assistance_needed", index),
+                skills=self._string("skills", index),
+                capability_mask=self.capability_masks[index],
+                withdrawn=bool(self.withdrawn[index]),
+            )
+
+    def index_of(self, user_id):
+        return self._row_by_id.get(user_id)
+
+    def get(self, user_id):
+        index = self._row_by_id.get(user_id)
+        return self.record(index) if index is not None else None
+
+    def subject_mask(self, subjects):
+        return self._mask(subjects)
+
+    def subject_names(self, mask):
+        return [subject for code, subject in enumerate(self.subjects) if mask >> code & 1]
+
+    # Row indexes matching the filters; None means "do not filter on this column"
+    def select(self, locations=None, user_types=None, subject_mask=None):
+        location_codes = (
+            None
+            if locations is None
+            else {self._location_index[loc] for loc in locations if loc in self._location_index}
+        )
+        type_codes = (
+            None
+            if user_types is None
+            else {USER_TYPE_CODES[t] for t in user_types if t in USER_TYPE_CODES}
+        )
+        with self._lock:
+            return [
+                index
+                for index, (location_id, type_code, mask) in enumerate(
+                    zip(self.location_ids, self.types, self.subject_masks)
+                )
+                if location_id >= 0
+                and (location_codes is None or location_id in location_codes)
+                and (type_codes is None or type_code in type_codes)
+                and (subject_mask is None or mask & subject_mask)
+            ]
+
+    # Distinct locations and subject labels currently in use, for the filter dropdowns
+    def facets(self):
+        with self._lock:
+            if self._facets is None:
+                locations = sorted(self.locations[code] for code in set(self.location_ids) if code >= 0)
+                subject_codes = set(self.string_columns["subject"])
+                subjects = sorted(
+                    set(
+                        subj
+                        for code in subject_codes
+                        if code >= 0
+                        for subj in split_subjects(self.strings[code])
+                    )
+                )
+                self._facets = (locations, subjects)
+            return self._facets
+
+    def memory_bytes(self):
+        with self._lock:
+            arrays = [self.ids, self.types, self.location_ids, self.class_levels, self.capability_masks, self.withdrawn]
+            arrays += list(self.string_columns.values())
+            total = sum(column.buffer_info()[1] * column.itemsize for column in arrays)
+            total += sys.getsizeof(self.subject_masks) + sum(
+                sys.getsizeof(mask) for mask in self.subject_masks
+            )
+            total += sys.getsizeof(self.emails) + sum(sys.getsizeof(e) for e in self.emails)
+            for table in (self.strings, self.locations, self.subjects):
+                total += sys.getsizeof(table) + sum(sys.getsizeof(s) for s in table)
+            total += sys.getsizeof(self._row_by_id)
+            return total
+
+    def bytes_per_user(self):
+        return self.memory_bytes() / len(self) if len(self) else 0.0
+
+
+# Holds the live snapshot; full reloads build a new one and swap it in atomically. Other
+# processes write to the database too, so with 'version' and 'changes' given, reads first check
+# the data version the snapshot was built at and catch up on the users changed since.
+class SnapshotStore:
+    def __init__(self, loader, version=None, changes=None):
+        self.loader = loader  # Callable returning an iterable of rows in SNAPSHOT_FIELDS order
+        self.version = version  # Callable returning the current data version
+        # Callable taking a change position (None for "now") and returning (new position, rows of
+        # the users changed since, ids of users gone since), or None when it cannot tell
+        self.changes = changes
+        self._snapshot = None
+        self._version = None  # Data version and change position the snapshot reflects
+        self._position = None
+        self._lock = threading.RLock()
+
+    @property
+    def current(self):
+        if self._snapshot is None:
+            return self.reload()
+        if self.version is not None:
+            version = self.version()
+            if version != self._version:
+                self.sync(version)
+        return self._snapshot
+
+    def reload(self):
+        with self._lock:
+            # Read before the rows, so writes made during the load are replayed by the next sync
+            version = self.version() if self.version is not None else None
+            position = self.changes(None)[0] if self.changes is not None else None
+            snapshot = UserSnapshot()
+            for row in self.loader():
+                snapshot.upsert(row)
+            self._snapshot, self._version, self._position = snapshot, version, position
+        return snapshot
+
+    # Bring the snapshot up to 'version' by re-reading the users changed since it was built
+    def sync(self, version):
+        with self._lock:
+            if version == self._version:
+                return
+            changed = self.changes(self._position) if self.changes is not None else None
+            if changed is None:
+                self.reload()
+                return
+            position, rows, removed = changed
+            for row in rows:
+                self._snapshot.upsert(row)
+            for user_id in removed:
+                self._snapshot.remove(user_id)
+            self._version, self._position = version, position
+
+    def upsert(self, row):
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot.upsert(row)
+
+    def stats(self):
+        snapshot = self.current
+        return {
+            "users": len(snapshot),
+            "memory_bytes": snapshot.memory_bytes(),
+            "bytes_per_user": round(snapshot.bytes_per_user(), 1),
+        }
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+# One statement seen by the tracer. 'rows' is the rowcount for writes and the number of rows
+# fetched so far for reads; 'seconds' covers the execute call, not later fetches.
+class TracedStatement:
+    __slots__ = ("statement", "seconds", "rows", "thread")
+
+    def __init__(self, statement, seconds, rows, thread):
+        self.statement = statement
+        self.seconds = seconds
+        self.rows = rows
+        self.thread = thread
+
+
+# Stands in for a DB-API cursor so the rows a result fetches are counted on its statement
+class _CountingCursor:
+    def __init__(self, cursor, record):
+        self._cursor = cursor
+        self._record = record
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._record.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._record.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._record.rows += len(rows)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# Statements issued while a trace was open
+class Trace:
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    @property
+    def seconds(self):
+        return sum(record.seconds for record in self.statements)
+
+    @property
+    def rows(self):
+        return sum(max(record.rows, 0) for record in self.statements)
+
+    # Statements run at least 'threshold' times with different parameters, as (count, statement),
+    # most repeated first: the shape of an N+1 pattern, one query per row of an earlier one
+    def repeated(self, threshold):
+        counts = Counter(record.statement for record in self.statements)
+        return sorted(
+            ((count, statement) for statement, count in counts.items() if count >= threshold),
+            key=lambda pair: (-pair[0], pair[1]),
+        )
+
+
+# Records the SQL statements the given engines execute while a trace is open. Only statements
+# from the thread that opened the trace, and from threads whose names start with one of
+# 'thread_prefixes' (the shard scatter pool), are recorded, so background workers do not count.
+class QueryTracer:
+    def __init__(self, engines, thread_prefixes=("shard",)):
+        self.engines = list(engines)
+        self.thread_prefixes = tuple(thread_prefixes)
+        self._active = None  # (owning thread, Trace) while a trace is open
+        self._started = threading.local()
+
+    def install(self):
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+
+    def remove(self):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._before)
+            event.remove(engine, "after_cursor_execute", self._after)
+
+    @contextmanager
+    def trace(self):
+        trace = Trace()
+        self._active = (threading.current_thread(), trace)
+        try:
+            yield trace
+        finally:
+            self._active = None
+
+    def _current(self):
+        active = self._active
+        if active is None:
+            return None
+        owner, trace = active
+        thread = threading.current_thread()
+        if thread is owner or thread.name.startswith(self.thread_prefixes):
+            return trace
+        return None
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if self._current() is not None:
+            self._started.value = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        trace = self._current()
+        started = getattr(self._started, "value", None)
+        if trace is None or started is None:
+            return
+        self._started.value = None
+        reads = cursor.description is not None
+        record = TracedStatement(
+            " ".join(statement.split()),
+            time.perf_counter() - started,
+            0 if reads else cursor.rowcount,
+            threading.current_thread().name,
+        )
+        if reads and context is not None:
+            context.cursor = _CountingCursor(cursor, record)
+        trace.statements.append(record)
@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+import pytest
+
+# The app binds its database when it is imported, so every test shares one temporary database,
+# set here before any test module imports the app; instance/users.db is never touched
+_directory = tempfile.TemporaryDirectory(prefix="scribe-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory.name, 'tests.db')}"
+
+
+# The built Flask server, without the notification and compaction threads
+@pytest.fixture(scope="session")
+def server():
+    from app import create_app, server
+
+    server.config["BACKGROUND_WORKERS"] = False
+    return create_app()
+
+
+# Register a user the way the registration form does; returns the form's alert
+@pytest.fixture(scope="session")
+def register(server):
+    from app import register_user
+
+    def register(user_type, name, email, location, subject, class_level, needs=(), skills=None):
+        child = user_type == "child"
+        with server.app_context():
+            return register_user(
+                user_type,
+                name,
+                email,
+                location,
+                "14" if child else "Test School",
+                subject,
+                class_level,
+                "B" if child else None,
+                [],
+                list(needs),
+                None,
+                skills,
+            )
+
+    return register
@@ -0,0 +1,52 @@
+import pytest
+
+from admin_table import fetch_page, sort_expression
+
+LOCATION = "Keysetville"
+# Repeated names and class levels, so most pages end inside a run of equal sort values
+NAMES = ["Asha", "Bala", "Asha", "Chitra", "Bala", "Asha", "Dev", "Bala", "Asha"]
+
+
+@pytest.fixture(scope="module")
+def users(server, register):
+    for number, name in enumerate(NAMES):
+        register("scribe", name, f"keyset{number}@example.com", LOCATION, "Art", number % 3 + 4)
+    return server
+
+
+# Walk every page through the cursor (last row's sort value and id) and through the offset
+def walk(server, column_name, descending, page_size, use_cursor):
+    from app import User, db, shard_router
+
+    column = getattr(User, column_name)
+    sort_column = User.id if column_name == "id" else sort_expression(column)
+    with server.app_context(), shard_router.use(shard_router.shard_for(LOCATION)):
+        query = db.session.query(User.id, column).filter(User.location == LOCATION)
+        pages, cursor, offset = [], None, 0
+        while True:
+            rows, has_more = fetch_page(
+                query, sort_column, User.id, descending, page_size, cursor=cursor, offset=offset
+            )
+            pages.append([row[0] for row in rows])
+            if not has_more:
+                return pages
+            if use_cursor:
+                cursor = (rows[-1][1], rows[-1][0])
+            else:
+                offset += page_size
+
+
+@pytest.mark.parametrize("column_name", ["name", "class_level", "location", "id"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_cursor_pages_match_offset_pages(users, column_name, descending):
+    from app import User, db, shard_router
+
+    with users.app_context(), shard_router.use(shard_router.shard_for(LOCATION)):
+        rows = db.session.query(User.id, getattr(User, column_name)).filter(User.location == LOCATION).all()
+    expected = [row[0] for row in sorted(rows, key=lambda row: (row[1], row[0]), reverse=descending)]
+
+    for page_size in (1, 2, 3, 4, len(NAMES)):
+        by_cursor = walk(users, column_name, descending, page_size, use_cursor=True)
+        assert [user_id for page in by_cursor for user_id in page] == expected
+        assert all(len(page) == page_size for page in by_cursor[:-1])
+        assert by_cursor == walk(users, column_name, descending, page_size, use_cursor=False)
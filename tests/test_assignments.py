@@ -0,0 +1,94 @@
+from assignments import AssignmentMap, path_from_child, path_from_scribe
+
+LOCATION = "Repairville"
+
+
+# Child 1 holds scribe 11, the only scribe child 2 can take; child 1 can move to scribe 12
+ELIGIBLE = {1: [11, 12], 2: [11]}
+ELIGIBLE_CHILDREN = {11: [1, 2], 12: [1]}
+
+
+def test_path_from_child_moves_the_holder_on():
+    assignment = AssignmentMap([(1, 11)], capacity=1)
+    moves = path_from_child(2, ELIGIBLE.get, assignment.children_of, 1, max_visits=10)
+    assert moves == [(1, 12), (2, 11)]
+    assignment.apply(moves)
+    assert assignment.scribe_by_child == {1: 12, 2: 11}
+
+
+def test_path_from_scribe_moves_the_holder_on():
+    assignment = AssignmentMap([(1, 11)], capacity=1)
+    moves = path_from_scribe(12, ELIGIBLE_CHILDREN.get, assignment.scribe_of, max_visits=10)
+    assert moves == [(2, 11), (1, 12)]
+
+
+def test_no_path_when_every_scribe_is_full():
+    assignment = AssignmentMap([(1, 11), (3, 12)], capacity=1)
+    eligible = {1: [11], 2: [11], 3: [12]}
+    assert path_from_child(2, eligible.get, assignment.children_of, 1, max_visits=10) is None
+
+
+def test_search_stops_after_max_visits():
+    assignment = AssignmentMap([(1, 11)], capacity=1)
+    assert path_from_child(2, ELIGIBLE.get, assignment.children_of, 1, max_visits=1) is None
+
+
+# Email of the scribe assigned to the child registered with 'email', or None
+def assigned_scribe(server, email):
+    from app import Assignment, User, db, shard_router
+
+    with server.app_context(), shard_router.use(shard_router.shard_for(LOCATION)):
+        child = User.query.filter_by(email=email).one()
+        assignment = Assignment.query.filter_by(child_id=child.id).first()
+        return assignment and db.session.get(User, assignment.scribe_id).email
+
+
+def unmatched_names(server):
+    from datetime import datetime
+
+    from app import unmatched_children
+
+    with server.app_context():
+        return {row["name"] for row in unmatched_children(datetime.utcnow(), locations=[LOCATION])}
+
+
+# Child A first takes S1, the only scribe then registered. Child B needs an interpreter, which
+# only S1 provides, so the repair moves A to S2 and gives S1 to B. Withdrawing S1 then leaves B
+# without a scribe who can interpret, while A keeps S2.
+def test_repair_frees_the_only_eligible_scribe_until_it_withdraws(server, register):
+    from app import update_user
+
+    register("scribe", "Repair Scribe One", "s1@repair.example.com", LOCATION, "Art", 5, skills=["interpreter"])
+    register("child", "Repair Child A", "a@repair.example.com", LOCATION, "Art", 9)
+    assert assigned_scribe(server, "a@repair.example.com") == "s1@repair.example.com"
+
+    register("scribe", "Repair Scribe Two", "s2@repair.example.com", LOCATION, "Art", 5)
+    assert assigned_scribe(server, "a@repair.example.com") == "s1@repair.example.com"
+
+    register("child", "Repair Child B", "b@repair.example.com", LOCATION, "Art", 9, needs=["interpreter"])
+    assert assigned_scribe(server, "a@repair.example.com") == "s2@repair.example.com"
+    assert assigned_scribe(server, "b@repair.example.com") == "s1@repair.example.com"
+    assert unmatched_names(server) == set()
+
+    with server.app_context():
+        result = update_user(
+            1,
+            "scribe",
+            "s1@repair.example.com",
+            "Repair Scribe One",
+            LOCATION,
+            "Test School",
+            "Art",
+            5,
+            None,
+            None,
+            None,
+            None,
+            "",
+            ["interpreter"],
+            ["withdrawn"],
+        )
+    assert result.color == "success"
+    assert assigned_scribe(server, "b@repair.example.com") is None
+    assert assigned_scribe(server, "a@repair.example.com") == "s2@repair.example.com"
+    assert unmatched_names(server) == {"Repair Child B"}
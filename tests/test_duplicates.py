@@ -0,0 +1,47 @@
+from duplicates import band_keys, minhash_signature, name_shingles, normalize_name, similarity
+
+
+def keys(name, location="Pune", class_level=10, user_type="child"):
+    return set(band_keys(minhash_signature(name_shingles(name)), user_type, location, class_level))
+
+
+def test_word_order_and_case_do_not_matter():
+    assert normalize_name("Kumar, RAVI") == normalize_name("ravi kumar") == "kumar ravi"
+    assert keys("Kumar Ravi") == keys("ravi kumar")
+
+
+# Signatures are seeded, so these collisions are the same on every run
+def test_similar_names_share_a_band():
+    assert similarity(name_shingles("Priyanka Deshmukh"), name_shingles("Priyanka Deshmuk")) > 0.7
+    assert keys("Priyanka Deshmukh") & keys("Priyanka Deshmuk")
+    assert keys("Ravi Kumar") & keys("Ravi Kumaar")
+
+
+def test_different_names_share_no_band():
+    assert not keys("Ravi Kumar") & keys("Meera Iyer")
+    assert not keys("Ananya Sharma") & keys("Rohit Verma")
+
+
+def test_bands_are_blocked_by_type_location_and_class_level():
+    same = keys("Ravi Kumar")
+    assert not same & keys("Ravi Kumar", location="Mumbai")
+    assert not same & keys("Ravi Kumar", class_level=9)
+    assert not same & keys("Ravi Kumar", user_type="scribe")
+
+
+def test_registration_queues_a_near_duplicate_for_review(server, register):
+    from app import DuplicateCandidate, User, shard_router
+
+    first = register("child", "Priyanka Deshmukh", "priyanka@dupes.example.com", "Dupeville", "Art", 9)
+    second = register("child", "Priyanka Deshmuk", "p.deshmuk@dupes.example.com", "Dupeville", "Art", 9)
+    other = register("child", "Rohit Verma", "rohit@dupes.example.com", "Dupeville", "Art", 9)
+    assert "looks similar" not in first.children
+    assert "looks similar" in second.children
+    assert "looks similar" not in other.children
+    with server.app_context(), shard_router.use(shard_router.shard_for("Dupeville")):
+        ids = {user.email: user.id for user in User.query.filter_by(location="Dupeville")}
+        pairs = {
+            (candidate.user_id, candidate.duplicate_of_id)
+            for candidate in DuplicateCandidate.query.filter(DuplicateCandidate.user_id.in_(ids.values()))
+        }
+    assert pairs == {(ids["p.deshmuk@dupes.example.com"], ids["priyanka@dupes.example.com"])}
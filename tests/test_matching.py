@@ -0,0 +1,34 @@
+from capabilities import SKILL_BITS
+from matching import partition_edges
+
+MATHS, SCIENCE = 1, 2
+AMANUENSIS = SKILL_BITS["amanuensis"]
+INTERPRETER = SKILL_BITS["interpreter"]
+
+
+def test_edges_need_a_shared_subject_and_a_lower_class_level():
+    children = [(1, 10, MATHS | SCIENCE, 0)]
+    scribes = [
+        (11, 8, SCIENCE, AMANUENSIS),
+        (12, 8, 4, AMANUENSIS),  # No shared subject
+        (13, 10, MATHS, AMANUENSIS),  # Same class level
+        (14, 11, MATHS, AMANUENSIS),  # Higher class level
+    ]
+    assert partition_edges(children, scribes) == [(1, 11, SCIENCE)]
+
+
+def test_edges_carry_every_shared_subject():
+    assert partition_edges([(1, 10, MATHS | SCIENCE, 0)], [(11, 8, MATHS | SCIENCE | 4, AMANUENSIS)]) == [
+        (1, 11, MATHS | SCIENCE)
+    ]
+
+
+def test_scribe_skills_must_cover_every_need():
+    children = [(1, 10, MATHS, AMANUENSIS | INTERPRETER), (2, 10, MATHS, AMANUENSIS)]
+    scribes = [(11, 8, MATHS, AMANUENSIS), (12, 8, MATHS, AMANUENSIS | INTERPRETER)]
+    assert partition_edges(children, scribes) == [(1, 12, MATHS), (2, 11, MATHS), (2, 12, MATHS)]
+
+
+def test_no_edges_without_children_or_scribes():
+    assert partition_edges([], [(11, 8, MATHS, AMANUENSIS)]) == []
+    assert partition_edges([(1, 10, MATHS, 0)], []) == []
@@ -0,0 +1,32 @@
+import pytest
+
+from bench_queries import QUERY_BUDGETS, measure
+
+REPEAT_THRESHOLD = 5
+
+
+# One traced session over a seeded database, shared by the checks below
+@pytest.fixture(scope="module")
+def session_traces(server):
+    return measure(users=100)
+
+
+def describe(trace):
+    return "\n".join(f"  {record.statement[:160]}" for record in trace.statements)
+
+
+@pytest.mark.parametrize("label", list(QUERY_BUDGETS))
+def test_callback_stays_within_query_budget(session_traces, label):
+    trace = session_traces[0][label]
+    assert len(trace) <= QUERY_BUDGETS[label], (
+        f"{label} issued {len(trace)} statements, budget {QUERY_BUDGETS[label]}:\n{describe(trace)}"
+    )
+
+
+@pytest.mark.parametrize("label", list(QUERY_BUDGETS))
+def test_callback_has_no_repeated_statements(session_traces, label):
+    assert session_traces[0][label].repeated(REPEAT_THRESHOLD) == []
+
+
+def test_withdrawal_moves_the_data_version(session_traces):
+    assert session_traces[1] is None
@@ -0,0 +1,25 @@
+# Download third-party CSS into assets/vendor so it is served locally with long-lived caching.
+# Run once at build time (see Dockerfile); the app falls back to the CDN when the file is missing.
+import os
+import sys
+import urllib.request
+
+import dash_bootstrap_components as dbc
+
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "vendor")
+VENDORED_FILES = {"flatly.min.css": dbc.themes.FLATLY}
+
+
+def main():
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    for filename, url in VENDORED_FILES.items():
+        target = os.path.join(VENDOR_DIR, filename)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        with open(target, "wb") as handle:
+            handle.write(data)
+        print(f"{url} -> {target} ({len(data)} bytes)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+from sqlalchemy import text
+
+# Tables whose changes are visible through the API, and the columns that matter. Every user
+# column that the snapshot, matching or the API reads belongs in the list; one left out lets a
+# cached view outlive an update of it.
+VERSIONED_TABLES = {
+    "user": "user_type, name, email, location, location_path, age_or_school, subject, class_level, "
+    "category_of_disability, disabilities, assistance_needed, skills, capability_mask, "
+    "academic_year, withdrawn",
+    "exam_session": None,
+    "availability_window": None,
+    "assignment": None,
+    "location_node": None,
+}
+
+# Single-row counter bumped by triggers on every relevant write
+VERSION_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS data_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)",
+]
+for _table, _columns in VERSIONED_TABLES.items():
+    for _event in ("INSERT", "UPDATE", "DELETE"):
+        _target = f"UPDATE OF {_columns}" if _event == "UPDATE" and _columns else _event
+        VERSION_SCHEMA.append(
+            f"CREATE TRIGGER IF NOT EXISTS data_version_{_table}_{_event.lower()} "
+            f"AFTER {_target} ON {_table} BEGIN "
+            f"UPDATE data_version SET version = version + 1 WHERE id = 1; END"
+        )
+
+
+# Create the counter and (re)create its triggers, so they track VERSIONED_TABLES
+def ensure_data_version(engine):
+    with engine.begin() as connection:
+        for table in VERSIONED_TABLES:
+            for event in ("insert", "update", "delete"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS data_version_{table}_{event}"))
+        for statement in VERSION_SCHEMA:
+            connection.execute(text(statement))
+
+
+# Current data version; changes whenever users, schedules, assignments or locations change
+def data_version(session):
+    return session.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar() or 0